@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTML-to-CSV extraction pipeline on synthetic trade pages
+
+Generates final-*.html style pages with a configurable number of trades,
+regions (50 states up to ~3,200 counties), WC class metrics and padded file
+size, then times and tracemalloc-profiles each extraction stage and writes
+a JSON report. Each stage is named after the function it times and runs on
+its inputs prepared up front: extract_trade on the decoded pages,
+extract_trade_mmap on the same pages memory-mapped, write_csv on
+already-extracted data. baseline_js_blocks times the per-metric regex
+searches that extract_js_blocks replaced, on the same pages, for comparison.
+
+Usage:
+    python3 benchmark_extraction.py
+    python3 benchmark_extraction.py --regions 50,3200 --metrics 2,8 --size-kb 0,4096
+"""
+
+import gc
+import re
+import json
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import importlib.util
+from contextlib import ExitStack
+from itertools import product
+from pathlib import Path
+from time import perf_counter
+
+from trade_dataset import STATE_CODES
+
+# extract-csv-data.py is a script with a hyphenated name, so load it by path
+_spec = importlib.util.spec_from_file_location('extract_csv_data', Path(__file__).with_name('extract-csv-data.py'))
+extractor = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(extractor)
+
+
+def region_codes(count):
+    """The 50 state codes, or synthetic county codes (C0001...) for larger maps"""
+    if count <= len(STATE_CODES):
+        return STATE_CODES[:count]
+    return [f'C{i:04d}' for i in range(1, count + 1)]
+
+
+def js_block(values, indent='            ', per_line=5):
+    entries = [f'{region}: {value}' for region, value in values.items()]
+    return (',\n' + indent).join(', '.join(entries[i:i + per_line]) for i in range(0, len(entries), per_line))
+
+
+def generate_page(regions, wc_classes, size_kb, seed):
+    """Build one synthetic trade page in the final-*.html layout"""
+    rng = random.Random(seed)
+    codes = [str(5000 + 37 * n) for n in range(wc_classes)]
+
+    buttons = '\n'.join(
+        f'        <button class="wc-sub-btn" data-wc-code="{code}">Class {code} (Type {n})</button>'
+        for n, code in enumerate(codes, 1)
+    )
+
+    ranges = {}
+    for region in regions:
+        low = round(rng.uniform(0.3, 3.0), 1)
+        ranges[region] = f'"{low}% - {round(low + rng.uniform(0.2, 2.0), 1)}%"'
+
+    blocks = {
+        'glPremium': {r: round(rng.uniform(0.5, 5.0), 2) for r in regions},
+        'glSavings': {r: round(rng.uniform(10, 70), 1) for r in regions},
+        'glCompetitiveness': {r: rng.randrange(0, 101, 10) for r in regions},
+    }
+    for code in codes:
+        blocks[f'wcRate{code}'] = {r: f'{rng.uniform(1, 40):.2f}' for r in regions}
+
+    state_data = ',\n'.join(f'        {name}: {{\n            {js_block(values)}\n        }}' for name, values in blocks.items())
+
+    head = f'''<style>
+#insurance-map-container {{ max-width: 1160px; }}
+</style>
+<div id="insurance-map-container">
+    <div class="metric-toggles">
+        <button class="metric-btn" data-metric="wcRate">WC Rate per $100</button>
+    </div>
+    <div class="wc-sub-buttons" id="wc-sub-buttons">
+{buttons}
+    </div>
+    <svg viewBox="0 0 959 593">
+'''
+    tail = f'''    </svg>
+</div>
+<script>
+(function() {{
+    'use strict';
+    var glPremiumRanges = {{
+        {js_block(ranges, indent='        ')}
+    }};
+
+    var stateData = {{
+{state_data}
+    }};
+}})();
+</script>
+'''
+
+    # Pad with path markup so large pages look like real exports (mostly SVG)
+    filler = []
+    target = size_kb * 1024 - len(head) - len(tail)
+    n = 0
+    while target > 0:
+        line = f'        <path id="region-{n}" class="state-path heat-0" d="m {rng.uniform(0, 959):.1f},{rng.uniform(0, 593):.1f} ' \
+               + ' '.join(f'{rng.uniform(-9, 9):.1f},{rng.uniform(-9, 9):.1f}' for _ in range(24)) + ' z"></path>\n'
+        filler.append(line)
+        target -= len(line)
+        n += 1
+
+    return head + ''.join(filler) + tail
+
+
+def baseline_js_blocks(content, wc_codes):
+    """The per-metric regex searches extract_js_blocks() replaced, kept as the speed baseline"""
+    blocks = {}
+    ranges = re.search(r'var glPremiumRanges = \{([^}]+)\}', content)
+    if ranges:
+        blocks['glPremiumRanges'] = {m.group(1): (float(m.group(2)), float(m.group(3)))
+                                     for m in re.finditer(r'(\w+):\s*"([\d.]+)%\s*-\s*([\d.]+)%"', ranges.group(1))}
+    state_data = re.search(r'var stateData = \{(.+?)\s*\};', content, re.DOTALL)
+    if state_data:
+        metrics = {}
+        for name in ['glSavings', 'glCompetitiveness'] + [f'wcRate{code}' for code in wc_codes]:
+            block = re.search(name + r':\s*\{([^}]+)\}', state_data.group(1))
+            if block:
+                metrics[name] = {m.group(1): float(m.group(2))
+                                 for m in re.finditer(r'(\w+):\s*([\d.]+)', block.group(1))}
+        blocks['stateData'] = metrics
+    return blocks
+
+
+def measure(func, repeat):
+    """Best wall time over repeat runs, plus tracemalloc peak of one extra run"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = perf_counter()
+        func()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def run_scenario(workdir, trades, region_count, wc_classes, size_kb, repeat):
+    """Generate one scenario's pages and profile every stage across them"""
+    regions = region_codes(region_count)
+    pages = []
+    for t in range(trades):
+        path = Path(workdir) / f'final-bench{t}.html'
+        path.write_text(generate_page(regions, wc_classes, size_kb, seed=t), encoding='utf-8')
+        pages.append(path)
+
+    contents = [path.read_text(encoding='utf-8') for path in pages]
+    configs = [extractor.extract_wc_config(content) for content in contents]
+    blocks = [extractor.extract_js_blocks(content) for content in contents]
+    quiet = lambda message: None
+
+    def read_pages():
+        for path in pages:
+            path.read_text(encoding='utf-8')
+
+    def wc_config():
+        for content in contents:
+            extractor.extract_wc_config(content)
+
+    def js_blocks():
+        for content in contents:
+            extractor.extract_js_blocks(content)
+
+    def js_blocks_baseline():
+        for content, config in zip(contents, configs):
+            baseline_js_blocks(content, [code for code, label in config['classes']])
+
+    def wc_data():
+        for content, config, block in zip(contents, configs, blocks):
+            extractor.extract_wc_data(content, config, block)
+
+    def extract_trade(buffers):
+        def run():
+            for content in buffers:
+                extractor.extract_trade(content, quiet, regions)
+        return run
+
+    def write_csvs():
+        for path, (data, config) in zip(pages, extracted):
+            extractor.write_csv(data, path.with_suffix('.csv'), config, quiet)
+
+    extracted = [extractor.extract_trade(content, quiet, regions) for content in contents]
+
+    with ExitStack() as stack:
+        # Mapped once up front, so extract_trade_mmap times the scan only
+        mapped = [stack.enter_context(extractor.open_page(path, use_mmap=True)) for path in pages]
+        stages = {
+            'read_text': read_pages,
+            'extract_wc_config': wc_config,
+            'extract_js_blocks': js_blocks,
+            'baseline_js_blocks': js_blocks_baseline,
+            'extract_wc_data': wc_data,
+            'extract_trade': extract_trade(contents),
+            'extract_trade_mmap': extract_trade(mapped),
+            'write_csv': write_csvs,
+        }
+        results = {name: measure(func, repeat) for name, func in stages.items()}
+
+    return {
+        'trades': trades,
+        'regions': region_count,
+        'wc_classes': wc_classes,
+        'size_kb': size_kb,
+        'page_bytes': sum(path.stat().st_size for path in pages),
+        'stages': results,
+    }
+
+
+def int_list(text):
+    return [int(part) for part in text.split(',') if part]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark extract-csv-data.py on synthetic trade pages')
+    parser.add_argument('--trades', type=int_list, default=[7], help='Comma-separated trade counts (default: 7)')
+    parser.add_argument('--regions', type=int_list, default=[50, 3200], help='Comma-separated region counts (default: 50,3200)')
+    parser.add_argument('--metrics', type=int_list, default=[2], help='Comma-separated WC class counts (default: 2)')
+    parser.add_argument('--size-kb', type=int_list, default=[0], help='Comma-separated minimum page sizes in KB (default: 0, no padding)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage; best is reported (default: 3)')
+    parser.add_argument('--output', default='benchmark-report.json', help='JSON report path (default: benchmark-report.json)')
+    args = parser.parse_args()
+
+    report = {
+        'extractor_version': extractor.EXTRACTOR_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'scenarios': [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix='trade-maps-bench-') as workdir:
+        for trades, regions, metrics, size_kb in product(args.trades, args.regions, args.metrics, args.size_kb):
+            print(f"Scenario: {trades} trades, {regions} regions, {metrics} WC classes, {size_kb} KB pages")
+            scenario = run_scenario(workdir, trades, regions, metrics, size_kb, args.repeat)
+            for name, result in scenario['stages'].items():
+                print(f"  {name:<30} {result['seconds'] * 1000:9.2f} ms  peak {result['peak_bytes'] / 1024:9.1f} KB")
+            report['scenarios'].append(scenario)
+            print()
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+    print(f"✓ Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Build delta CSVs against the last published snapshot
+
+import_csv upserts one row per (trade, state), so a CSV holding only the
+changed rows is a valid upload: it updates those rows and leaves the rest of
+insurance_map_data alone. This script compares each freshly extracted CSV in
+sample-data/ with the copy in published/ and writes, per trade, a CSV of just
+the changed states plus delta/manifest.json describing the change set.
+
+Usage:
+    python3 build_delta.py              # write delta/ from sample-data/ vs published/
+    python3 build_delta.py --publish    # after uploading, record sample-data/ as published
+"""
+
+import csv
+import json
+import shutil
+import hashlib
+import argparse
+from pathlib import Path
+
+from trade_dataset import TradeDataset, np
+from validate_trade_data import validate_csv
+
+MANIFEST_FILE = 'manifest.json'
+
+
+def file_sha256(path):
+    """SHA-256 of a file, or None if it does not exist"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _differing(old, new):
+    """Ordinals where two columns differ"""
+    if np is not None and hasattr(new, 'dtype'):
+        return np.nonzero(np.asarray(old) != np.asarray(new))[0].tolist()
+    return [i for i, (a, b) in enumerate(zip(old, new)) if a != b]
+
+
+def _presence_ordinals(bitmap, size):
+    return {i for i in range(size) if bitmap[i >> 3] & (1 << (i & 7))}
+
+
+def diff_datasets(old, new):
+    """Compare two TradeDatasets
+
+    Returns (changed, added, removed) lists of region codes. A change to the
+    trade's WC classes touches every row, so every region counts as changed.
+    """
+    size = len(new.regions)
+    old_rows = _presence_ordinals(old._any, size)
+    new_rows = _presence_ordinals(new._any, size)
+    added = new_rows - old_rows
+    removed = old_rows - new_rows
+
+    if old.wc_classes != new.wc_classes or set(old.metrics) != set(new.metrics):
+        changed = new_rows - added
+    else:
+        changed = set()
+        for metric in new.metrics:
+            changed.update(_differing(old.column(metric), new.column(metric)))
+            changed.update(_presence_ordinals(bytes(a ^ b for a, b in zip(old.presence[metric], new.presence[metric])), size))
+        changed = (changed & new_rows) - added
+
+    regions = new.regions
+    return ([regions[i] for i in sorted(changed)],
+            [regions[i] for i in sorted(added)],
+            [regions[i] for i in sorted(removed)])
+
+
+def write_delta_csv(source_csv, delta_csv, states):
+    """Copy the header and the rows for states from source_csv, unchanged"""
+    states = set(states)
+    with open(source_csv, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = [row for row in reader if row and row[0].strip().upper() in states]
+    with open(delta_csv, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return len(rows)
+
+
+def build_delta(source_dir, snapshot_dir, output_dir):
+    """Write delta CSVs and the manifest; returns the manifest dict"""
+    output_dir.mkdir(exist_ok=True)
+    manifest = {'source': str(source_dir), 'snapshot': str(snapshot_dir), 'trades': {}}
+
+    for source_csv in sorted(source_dir.glob('*.csv')):
+        trade = source_csv.stem
+        published_csv = snapshot_dir / source_csv.name
+        delta_csv = output_dir / source_csv.name
+        new = TradeDataset.from_csv(source_csv)
+
+        if published_csv.exists():
+            old = TradeDataset.from_csv(published_csv)
+            changed, added, removed = diff_datasets(old, new)
+        else:
+            changed, added, removed = [], [region for region in new.regions if new.has(region)], []
+
+        entry = {
+            'csv': None,
+            'source_sha256': file_sha256(source_csv),
+            'published_sha256': file_sha256(published_csv),
+            'full': not published_csv.exists(),
+            'changed': changed,
+            'added': added,
+            'removed': removed,
+            'rows': 0
+        }
+
+        if changed or added:
+            entry['rows'] = write_delta_csv(source_csv, delta_csv, changed + added)
+            entry['csv'] = delta_csv.name
+        elif delta_csv.exists():
+            delta_csv.unlink()
+
+        manifest['trades'][trade] = entry
+
+    with open(output_dir / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return manifest
+
+
+def publish(source_dir, snapshot_dir):
+    """Record the current CSVs as the published snapshot"""
+    snapshot_dir.mkdir(exist_ok=True)
+    copied = 0
+    for source_csv in sorted(source_dir.glob('*.csv')):
+        target = snapshot_dir / source_csv.name
+        if file_sha256(target) != file_sha256(source_csv):
+            shutil.copy2(source_csv, target)
+            copied += 1
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build delta CSVs of rows changed since the last upload')
+    parser.add_argument('--source', default='sample-data',
+                        help='Freshly extracted CSVs (default: sample-data)')
+    parser.add_argument('--snapshot', default='published',
+                        help='CSVs as last uploaded to WordPress (default: published)')
+    parser.add_argument('--output', default='delta',
+                        help='Where to write delta CSVs and the manifest (default: delta)')
+    parser.add_argument('--publish', action='store_true',
+                        help='Copy the source CSVs into the snapshot after a successful upload')
+    args = parser.parse_args()
+
+    source_dir = Path(args.source)
+    snapshot_dir = Path(args.snapshot)
+
+    if args.publish:
+        copied = publish(source_dir, snapshot_dir)
+        print(f"✓ Published {copied} updated CSV file(s) to {snapshot_dir}/")
+        return
+
+    output_dir = Path(args.output)
+    manifest = build_delta(source_dir, snapshot_dir, output_dir)
+
+    total = 0
+    for trade, entry in manifest['trades'].items():
+        if entry['csv']:
+            total += entry['rows']
+            label = 'full (no snapshot)' if entry['full'] else f"{len(entry['changed'])} changed, {len(entry['added'])} added"
+            print(f"✓ {trade}: {entry['rows']} row(s) → {output_dir / entry['csv']} ({label})")
+            # Partial files are fine for upload; only the row rules apply
+            for violation in validate_csv(output_dir / entry['csv'], partial=True):
+                print(f"  ✗ [{violation.code}] {violation.message}")
+        else:
+            print(f"= {trade}: no changes")
+        if entry['removed']:
+            print(f"  ⚠ {trade}: {', '.join(entry['removed'])} no longer in the data; remove them in WordPress by hand")
+
+    print(f"\n✅ {total} row(s) to upload; manifest written to {output_dir / MANIFEST_FILE}")
+    print("After uploading, run: python3 build_delta.py --publish")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Memoizing build engine for the per-trade WordPress blocks
+
+Models the page build as a DAG of stages instead of one script per page
+variant. For every trade with a final-<trade>.html page and a
+sample-data/<trade>.csv:
+
+    final-<trade>.html ──> clean-svg ──┐
+            │                          ├──> inject ──> es5 ──> wrap ──> build/wordpress/<trade>.html
+            └──────────────────────────┤
+    sample-data/<trade>.csv ──> data ──┘
+
+    clean-svg  first <svg> with inline event handlers removed
+    data       glPremiumRanges and stateData bodies rendered from the CSV
+    inject     page with the cleaned SVG and CSV data spliced in
+    es5        wordpress_transforms.to_es5
+    wrap       inline handlers stripped, scripts in IIFEs, cut to the
+               COPY EVERYTHING BELOW/ABOVE markers
+    minify     --profile production only: minify_html.minify_page, written
+               to build/wordpress-production/ with the bytes saved per trade
+
+With --shared-css, the rules every trade's block has go into one
+content-hashed stylesheet under plugin/assets/css/ (shared_styles), which
+the plugin enqueues, and each block keeps only its own rules inline.
+
+Each stage's result is pickled under .build-cache/ with a key made from
+its name, version, the hashes of its inputs and the source of its code:
+the stage function's module and every module of this repo it uses,
+directly or not (wordpress_transforms, js_es5, minify_html, ...). A stage only runs when
+that key changes; if it then produces the same result as before, the
+stages after it are reused too. Output files are only rewritten when
+their content changes.
+
+Usage:
+    python3 build_engine.py                  # every trade
+    python3 build_engine.py carpenter gc     # just these
+    python3 build_engine.py --force          # ignore the cache
+    python3 build_engine.py --profile production
+    python3 build_engine.py --shared-css     # common CSS in one cached file
+"""
+
+import io
+import os
+import re
+import sys
+import json
+import types
+import pickle
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+
+import build_trace
+from svg_reader import read_svg, strip_event_handlers
+from trade_dataset import TradeDataset
+from minify_html import PROFILES, minify_page, print_report
+from shared_styles import extract_shared, write_shared
+from wordpress_transforms import strip_inline_handlers, to_es5, wrap_scripts_iife, wordpress_block
+
+ROOT = Path(__file__).resolve().parent
+CACHE_DIR = Path('.build-cache')
+SOURCE_DIR = Path('sample-data')
+OUTPUT_DIR = Path('build/wordpress')
+OUTPUT_DIRS = {'debug': OUTPUT_DIR, 'production': Path('build/wordpress-production')}
+
+
+def _local_module(value):
+    """The module value is or was defined in, if its source is in this repo"""
+    module = value if isinstance(value, types.ModuleType) else sys.modules.get(getattr(value, '__module__', None))
+    path = getattr(module, '__file__', None)
+    if path and Path(path).resolve().parent == ROOT:
+        return module
+    return None
+
+
+def code_files(func):
+    """Source files of func's module and every repo module it uses, sorted
+
+    Modules are followed through their globals (imported modules, functions
+    and classes), so a stage calling wordpress_transforms.to_es5 also
+    depends on js_es5.
+    """
+    seen = set()
+    pending = [sys.modules[func.__module__]]
+    while pending:
+        module = pending.pop()
+        path = Path(module.__file__).resolve()
+        if path in seen:
+            continue
+        seen.add(path)
+        for value in list(vars(module).values()):
+            local = _local_module(value)
+            if local is not None:
+                pending.append(local)
+    return sorted(seen)
+
+
+def code_digest(func, digests=None):
+    """SHA-256 over code_files(func); digests caches results by module name"""
+    if digests is not None and func.__module__ in digests:
+        return digests[func.__module__]
+    digest = hashlib.sha256()
+    for path in code_files(func):
+        digest.update(path.name.encode() + b'\0')
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    result = digest.hexdigest()
+    if digests is not None:
+        digests[func.__module__] = result
+    return result
+
+
+class Engine:
+    """A DAG of file and stage nodes, evaluated lazily and memoized by input hash"""
+
+    def __init__(self, cache_dir=CACHE_DIR, use_cache=True):
+        self.cache_dir = Path(cache_dir)
+        self.use_cache = use_cache
+        self.nodes = {}
+        # name -> (digest, value) for nodes evaluated in this run
+        self.results = {}
+        self.ran = []
+        self.reused = []
+        # module name -> code_digest, computed once per run
+        self.code_digests = {}
+
+    def file(self, path):
+        """Node for a source file; its digest is the SHA-256 of its bytes"""
+        name = f"file:{path}"
+        self.nodes[name] = ('file', Path(path))
+        return name
+
+    def stage(self, name, func, deps, version=1, category='transform'):
+        """Node computing func(*dep values); bump version when func's output changes"""
+        self.nodes[name] = ('stage', (func, list(deps), version, category))
+        return name
+
+    def _slot(self, name):
+        return self.cache_dir / (re.sub(r'[^\w.-]', '_', name) + '.pickle')
+
+    def _load_slot(self, name, key):
+        try:
+            with open(self._slot(name), 'rb') as f:
+                entry = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None
+        if not isinstance(entry, dict) or entry.get('key') != key:
+            return None
+        return entry
+
+    def _save_slot(self, name, entry):
+        """Write atomically so an interrupted build never leaves half a file"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._slot(name))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def evaluate(self, name):
+        """(digest, value) of a node, evaluating its inputs first"""
+        if name in self.results:
+            return self.results[name]
+
+        kind, spec = self.nodes[name]
+        if kind == 'file':
+            with build_trace.span('read', spec.name) as span:
+                raw = spec.read_bytes()
+                span.bytes = len(raw)
+            result = (hashlib.sha256(raw).hexdigest(), raw.decode('utf-8'))
+            self.results[name] = result
+            return result
+
+        func, deps, version, category = spec
+        inputs = [self.evaluate(dep) for dep in deps]
+        key = hashlib.sha256(json.dumps(
+            [name, version, func.__module__, func.__qualname__, code_digest(func, self.code_digests),
+             [digest for digest, value in inputs]]
+        ).encode()).hexdigest()
+
+        entry = self._load_slot(name, key) if self.use_cache else None
+        if entry is not None:
+            self.reused.append(name)
+        else:
+            with build_trace.span(category, name) as span:
+                value = func(*[value for digest, value in inputs])
+                span.bytes = len(value) if isinstance(value, (str, bytes)) else 0
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            entry = {'key': key, 'digest': hashlib.sha256(blob).hexdigest(), 'value': value}
+            self._save_slot(name, entry)
+            self.ran.append(name)
+
+        result = (entry['digest'], entry['value'])
+        self.results[name] = result
+        return result
+
+
+# ----------------------------------------------------------------------
+# Stages
+
+def clean_svg(page):
+    """First <svg> of the page with inline event handlers removed"""
+    found = read_svg(io.StringIO(page))
+    if found is None:
+        raise ValueError("page has no <svg>")
+    return strip_event_handlers(found[0])
+
+
+def gl_ranges(data):
+    """[(state, low, high)] for states with a GL range; sets glPremium to each midpoint"""
+    ranges = []
+    for state in data.regions:
+        if data.has(state, 'glPremiumLow') and data.has(state, 'glPremiumHigh'):
+            low, high = data.get(state, 'glPremiumLow'), data.get(state, 'glPremiumHigh')
+            ranges.append((state, low, high))
+            data.set(state, 'glPremium', round((low + high) / 2, 3))
+    return ranges
+
+
+def format_ranges(ranges, decimals=1, per_line=5):
+    """'AL: "1.2% - 2.3%", ...' lines, per_line states to a line"""
+    entries = [f'{state}: "{low:.{decimals}f}% - {high:.{decimals}f}%"' for state, low, high in ranges]
+    lines = [', '.join(entries[i:i + per_line]) for i in range(0, len(entries), per_line)]
+    return [line + ',' for line in lines[:-1]] + lines[-1:]
+
+
+def render_data(csv_text):
+    """{'glPremiumRanges': [(state, low, high)], 'stateData': {key: lines}} from a trade CSV
+
+    stateData keys follow the pages: glPremium is the midpoint of the GL
+    range, wcRate<code> per WC class, and plain wcRate for class 1.
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+        f.write(csv_text)
+    try:
+        data = TradeDataset.from_csv(f.name)
+    finally:
+        os.unlink(f.name)
+
+    ranges = gl_ranges(data)
+    metrics = {'glPremium': 'glPremium', 'glSavings': 'glSavings',
+               'glCompetitiveness': 'glCompetitiveness', 'wcRate': 'wcRate1'}
+    for n, (code, label) in enumerate(data.wc_classes, 1):
+        metrics[f'wcRate{code}'] = f'wcRate{n}'
+
+    return {
+        'glPremiumRanges': ranges,
+        'stateData': {key: data.to_js_object(metric, indent='').split('\n')
+                      for key, metric in metrics.items() if metric in data.columns},
+    }
+
+
+VAR_OBJECT_RE = r'(\bvar {name}\s*=\s*\{{)'
+INNER_OBJECT_RE = r'(\b{name}\s*:\s*\{{)([^{{}}]*)(\}})'
+RANGE_DECIMALS_RE = re.compile(r'"\d+\.(\d+)%')
+
+
+def _range_lines(ranges, body):
+    """format_ranges() with as many decimals as the page already uses"""
+    match = RANGE_DECIMALS_RE.search(body)
+    return format_ranges(ranges, len(match.group(1)) if match else 1)
+
+
+def _reindent(lines, body):
+    """Join rendered lines using the indentation already in body"""
+    first = re.match(r'\s*', body).group(0)
+    last = re.search(r'\s*$', body).group(0)
+    indent = first.split('\n')[-1]
+    return first + ('\n' + indent).join(line.strip() for line in lines) + last
+
+
+def _object_span(page, name):
+    """(start, end) of the braces of 'var name = {...}' (flat string-free scan)"""
+    match = re.search(VAR_OBJECT_RE.format(name=name), page)
+    if not match:
+        return None
+    depth = 0
+    for i in range(match.end() - 1, len(page)):
+        if page[i] == '{':
+            depth += 1
+        elif page[i] == '}':
+            depth -= 1
+            if depth == 0:
+                return match.end(), i
+    raise ValueError(f"Unterminated {name} object")
+
+
+def inject(page, svg, data):
+    """Splice the cleaned SVG and the CSV data into the page"""
+    found = read_svg(io.StringIO(page))
+    if found is not None:
+        page = page.replace(found[0], svg, 1)
+
+    span = _object_span(page, 'glPremiumRanges')
+    if span:
+        start, end = span
+        body = page[start:end]
+        page = page[:start] + _reindent(_range_lines(data['glPremiumRanges'], body), body) + page[end:]
+
+    span = _object_span(page, 'stateData')
+    if span:
+        start, end = span
+        body = page[start:end]
+        for key, lines in data['stateData'].items():
+            body = re.sub(INNER_OBJECT_RE.format(name=re.escape(key)),
+                          lambda m: m.group(1) + _reindent(lines, m.group(2)) + m.group(3), body, count=1)
+        page = page[:start] + body + page[end:]
+    return page
+
+
+def wrap(page):
+    """The WordPress Custom HTML block: no inline handlers, scripts in IIFEs"""
+    return wrap_scripts_iife(strip_inline_handlers(wordpress_block(page)))
+
+
+def minify(block):
+    """The production block: minified, logging stripped"""
+    return minify_page(block, 'production')[0]
+
+
+def share_styles(*blocks):
+    """(CSS every block has, the blocks without it); see shared_styles"""
+    return extract_shared(list(blocks))
+
+
+def add_trade(engine, trade, source_dir=SOURCE_DIR, profile='debug'):
+    """Register one trade's stages; returns the names of its debug and final nodes"""
+    page = engine.file(f'final-{trade}.html')
+    csv_file = engine.file(Path(source_dir) / f'{trade}.csv')
+    svg = engine.stage(f'clean-svg:{trade}', clean_svg, [page], category='regex')
+    data = engine.stage(f'data:{trade}', render_data, [csv_file])
+    injected = engine.stage(f'inject:{trade}', inject, [page, svg, data])
+    es5 = engine.stage(f'es5:{trade}', to_es5, [injected], version=2)
+    block = engine.stage(f'wrap:{trade}', wrap, [es5])
+    if profile == 'production':
+        return block, engine.stage(f'minify:{trade}', minify, [block])
+    return block, block
+
+
+def write_if_changed(path, text):
+    path = Path(path)
+    if path.exists() and path.read_text() == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with build_trace.span('write', path.name) as span:
+        path.write_text(text)
+        span.bytes = len(text)
+    return True
+
+
+def find_trades(source_dir=SOURCE_DIR):
+    """Trades that have both a CSV and a final-<trade>.html page"""
+    return sorted(p.stem for p in Path(source_dir).glob('*.csv') if Path(f'final-{p.stem}.html').exists())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build every trade\'s WordPress block, redoing only changed stages')
+    parser.add_argument('trades', nargs='*', help='Trades to build (default: every CSV with a final-<trade>.html)')
+    parser.add_argument('--source', default=str(SOURCE_DIR), help=f'CSV directory (default: {SOURCE_DIR})')
+    parser.add_argument('--output', help='Output directory (default: build/wordpress/, '
+                                         'or build/wordpress-production/ for --profile production)')
+    parser.add_argument('--profile', choices=PROFILES, default='debug',
+                        help='production also minifies each block and strips logging (default: debug)')
+    parser.add_argument('--shared-css', action='store_true',
+                        help='Move the CSS every block has into plugin/assets/css/trade-maps-shared.<hash>.css '
+                             '(enqueued by the plugin) and leave only page-specific rules inline')
+    parser.add_argument('--force', action='store_true', help='Ignore the stage cache and run every stage')
+    parser.add_argument('--trace', metavar='PATH', help='Write a Chrome trace of the build to PATH')
+    args = parser.parse_args()
+
+    if args.trace:
+        build_trace.start(args.trace)
+
+    trades = args.trades or find_trades(args.source)
+    if not trades:
+        print(f"✗ No trades found in {args.source}")
+        return
+
+    engine = Engine(use_cache=not args.force)
+    targets = {trade: add_trade(engine, trade, args.source, args.profile) for trade in trades}
+    output_dir = Path(args.output or OUTPUT_DIRS[args.profile])
+
+    blocks = {}
+    for trade, (debug, target) in targets.items():
+        try:
+            blocks[trade] = engine.evaluate(target)[1]
+        except (OSError, ValueError) as e:
+            print(f"✗ {trade}: {e}")
+
+    written = 0
+    if args.shared_css and len(blocks) > 1:
+        shared = engine.stage('shared-css', share_styles, [targets[trade][1] for trade in blocks])
+        digest, (css, pages) = engine.evaluate(shared)
+        if css:
+            blocks = dict(zip(blocks, pages))
+            path, changed = write_shared(css, sources=list(blocks))
+            written += changed
+            print(f"{'✓ Wrote' if changed else '='} {path} ({len(css)} bytes shared by {len(blocks)} trades)")
+
+    sizes = []
+    for trade, block in blocks.items():
+        sizes.append((f'{trade}.html', len(engine.evaluate(targets[trade][0])[1].encode()), len(block.encode())))
+        output = output_dir / f'{trade}.html'
+        if write_if_changed(output, block):
+            written += 1
+            print(f"✓ Wrote {output} ({len(block)} bytes)")
+        else:
+            print(f"= {output} unchanged")
+
+    if args.profile == 'production' and sizes:
+        print("\nProduction blocks:")
+        print_report(sizes)
+    print(f"\n✅ {len(targets)} trades: {len(engine.ran)} stages ran, {len(engine.reused)} reused, {written} files written")
+
+
+if __name__ == '__main__':
+    main()
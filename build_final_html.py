@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 
 # Read the processed states file
-with open('/Users/curranclark/Documents/trade-maps/processed-states.txt', 'r') as f:
+with open('processed-states.txt', 'r') as f:
     states_svg = f.read()
 
 # Read the working HTML file
-with open('/Users/curranclark/Documents/trade-maps/index-working.html', 'r') as f:
+with open('index-working.html', 'r') as f:
     html_lines = f.readlines()
 
 # Find where to insert the SVG (replace the placeholder div)
@@ -50,7 +50,7 @@ for i, line in enumerate(html_lines):
     output_lines.append(line)
 
 # Write the final file
-with open('/Users/curranclark/Documents/trade-maps/index-complete.html', 'w') as f:
+with open('index-complete.html', 'w') as f:
     f.writelines(output_lines)
 
 print('Successfully created index-complete.html with direct SVG embedding!')
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Build the per-state geometry index for the plugin
+
+Parses each state-XX path in processed-states.txt once and writes
+plugin/assets/maps/geometry.json:
+
+    {"CA": {"bbox": [x, y, w, h], "centroid": [x, y], "area": px2, "label": [x, y]}, ...}
+
+All values are in viewBox units of the 959x593 map. The shortcode inlines the
+index into insuranceMapData.geometry, so map-interactive.js can anchor
+tooltips and labels without calling getBBox() on the live SVG.
+
+Usage:
+    python3 build_geometry_index.py
+"""
+
+import json
+import argparse
+from pathlib import Path
+
+from svg_path import DEFAULT_PRECISION
+from map_topology import load_shapes
+from map_geometry import geometry_index
+from build_lod_maps import write_if_changed
+
+GEOMETRY_FILE = Path('plugin/assets/maps/geometry.json')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build bounding boxes, centroids and label points for each state')
+    parser.add_argument('--source', default='processed-states.txt',
+                        help='State paths as written by process_svg.py (default: processed-states.txt)')
+    parser.add_argument('--output', default=str(GEOMETRY_FILE),
+                        help=f'Index file to write (default: {GEOMETRY_FILE})')
+    args = parser.parse_args()
+
+    with open(args.source, 'r') as f:
+        shapes = load_shapes(f.read())
+
+    index = geometry_index(shapes, DEFAULT_PRECISION)
+    skipped = sorted(set(shapes) - set(index))
+    if skipped:
+        print(f"⚠ No closed outline for: {', '.join(skipped)}")
+
+    text = json.dumps(index, sort_keys=True, separators=(',', ':')) + '\n'
+    output = Path(args.output)
+    if write_if_changed(output, text):
+        print(f"✓ Wrote {output} ({len(index)} states, {len(text)} bytes)")
+    else:
+        print(f"= {output} unchanged ({len(index)} states)")
+
+
+if __name__ == '__main__':
+    main()
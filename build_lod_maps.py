@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Build level-of-detail variants of the state map for the plugin
+
+Simplifies the state outlines from processed-states.txt (process_svg.py)
+with Douglas-Peucker at several tolerances. Borders are simplified once per
+shared arc (see map_topology.py), so neighbouring states never pull apart.
+
+Writes:
+    plugin/templates/svg-map-lod.html   hidden SVG source with the lightest level
+    plugin/assets/maps/map-<level>.json shared-arc topology for each finer level
+    plugin/assets/maps/levels.json      which level to load at which viewport width
+
+The page ships the lightest level inline; map-interactive.js swaps in the
+finer paths at init on wider viewports, so phones never download them.
+The finer levels store each border once (map_topology.encode_topology) and
+are decoded back into per-state paths in the browser.
+
+Usage:
+    python3 build_lod_maps.py
+"""
+
+import re
+import json
+import argparse
+from collections import Counter
+from pathlib import Path
+
+from svg_path import DEFAULT_PRECISION, format_path
+from map_topology import load_shapes, simplify_shapes, vertex_count, build_arcs, encode_topology
+
+# (name, tolerance in viewBox px, minimum viewport width in CSS px)
+# The map is 959 units wide, so on a 375px phone one unit is ~0.4 CSS px.
+LOD_LEVELS = [
+    ('desktop', 0.0, 1024),
+    ('tablet', 0.6, 600),
+    ('mobile', 1.2, 0),
+]
+
+SVG_TEMPLATE = Path('plugin/templates/svg-map.html')
+LOD_TEMPLATE = Path('plugin/templates/svg-map-lod.html')
+MAPS_DIR = Path('plugin/assets/maps')
+
+STATE_D_RE = re.compile(r'(<path\b[^>]*\sid="state-([A-Z]{2})"[^>]*\sd=")([^"]*)(")')
+
+
+def write_if_changed(path, text):
+    """Write text unless the file already holds it; returns True if written"""
+    if path.exists() and path.read_text() == text:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return True
+
+
+def build_levels(shapes, levels, precision=DEFAULT_PRECISION):
+    """{level name: {state: d}} for each (name, tolerance, min width)"""
+    scale = 10 ** precision
+    variants = {}
+    for name, tolerance, min_width in levels:
+        simplified = simplify_shapes(shapes, tolerance * scale)
+        variants[name] = {state: format_path(subpaths, precision) for state, subpaths in simplified.items()}
+        print(f"  {name:<8} tolerance {tolerance:<4} {vertex_count(simplified):>6} vertices "
+              f"{sum(len(d) for d in variants[name].values()):>7} bytes")
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build simplified map variants for smaller screens')
+    parser.add_argument('--source', default='processed-states.txt',
+                        help='State paths as written by process_svg.py (default: processed-states.txt)')
+    args = parser.parse_args()
+
+    with open(args.source, 'r') as f:
+        shapes = load_shapes(f.read())
+
+    arcs, rings = build_arcs(shapes)
+    uses = Counter(ref if ref >= 0 else ~ref for state_rings in rings.values()
+                   for refs, closed in state_rings for ref in refs)
+    shared = sum(1 for count in uses.values() if count > 1)
+    print(f"Loaded {len(shapes)} states: {vertex_count(shapes)} vertices, {len(arcs)} arcs ({shared} shared borders)")
+
+    variants = build_levels(shapes, LOD_LEVELS)
+
+    # Lightest level goes inline in the hidden SVG source
+    base = min(LOD_LEVELS, key=lambda level: level[2])[0]
+    template = SVG_TEMPLATE.read_text()
+    lod_template = STATE_D_RE.sub(lambda m: m.group(1) + variants[base][m.group(2)] + m.group(4), template)
+    if write_if_changed(LOD_TEMPLATE, lod_template):
+        print(f"✓ Wrote {LOD_TEMPLATE} ({len(template)} → {len(lod_template)} bytes)")
+
+    manifest = []
+    scale = 10 ** DEFAULT_PRECISION
+    for name, tolerance, min_width in LOD_LEVELS:
+        if name == base:
+            continue
+        filename = f"map-{name}.json"
+        topology = json.dumps(encode_topology(shapes, tolerance * scale), sort_keys=True, separators=(',', ':')) + '\n'
+        paths = json.dumps(variants[name], separators=(',', ':')) + '\n'
+        if write_if_changed(MAPS_DIR / filename, topology):
+            print(f"✓ Wrote {MAPS_DIR / filename} ({len(topology)} bytes, {len(paths)} as per-state paths)")
+        manifest.append({'name': name, 'minWidth': min_width, 'file': filename})
+
+    if write_if_changed(MAPS_DIR / 'levels.json', json.dumps(manifest, indent=2) + '\n'):
+        print(f"✓ Wrote {MAPS_DIR / 'levels.json'}")
+
+    print(f"\n✅ Done! Shared borders are simplified once, so neighbouring states match at every level")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""
+Timing spans for the build scripts, written as a Chrome trace
+
+Scripts wrap their read, regex, transform and write steps in spans:
+
+    import build_trace
+
+    build_trace.from_argv()          # honour --trace out.json
+
+    with build_trace.span('read', 'carpenter copy.html') as s:
+        content = f.read()
+        s.bytes = len(content)
+
+For long top-level blocks, span(...) can also be ended explicitly with
+.end(bytes=...). Tracing is off unless enabled, and a disabled span only
+costs a function call.
+
+The output loads in chrome://tracing or https://ui.perfetto.dev. Each span
+records its byte count and the process's peak RSS, and a memory counter
+track is emitted alongside. A per-category summary is printed at exit.
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CATEGORIES = ('read', 'regex', 'transform', 'write')
+
+_enabled = False
+_events = []
+
+
+def _now_us():
+    # CLOCK_MONOTONIC is shared by all processes, so worker spans line up
+    return time.perf_counter_ns() // 1000
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB (None if unknown)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class Span:
+    """One timed step; use as a context manager or call end()"""
+
+    __slots__ = ('category', 'name', 'args', 'bytes', 'start')
+
+    def __init__(self, category, name, args):
+        self.category = category
+        self.name = name
+        self.args = args
+        self.bytes = None
+        self.start = _now_us()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.end()
+
+    def end(self, bytes=None, **args):
+        end = _now_us()
+        if bytes is not None:
+            self.bytes = bytes
+        self.args.update(args)
+        if self.bytes is not None:
+            self.args['bytes'] = self.bytes
+        peak = peak_rss_kb()
+        if peak is not None:
+            self.args['peak_rss_kb'] = peak
+
+        pid, tid = os.getpid(), threading.get_ident()
+        _events.append({'name': self.name, 'cat': self.category, 'ph': 'X',
+                        'ts': self.start, 'dur': end - self.start,
+                        'pid': pid, 'tid': tid, 'args': self.args})
+        if peak is not None:
+            _events.append({'name': 'peak RSS (KiB)', 'ph': 'C', 'ts': end,
+                            'pid': pid, 'args': {'rss': peak}})
+
+
+class _NullSpan:
+    __slots__ = ('bytes',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def end(self, bytes=None, **args):
+        pass
+
+
+_NULL = _NullSpan()
+
+
+def span(category, name, **args):
+    """Start a span; category is one of CATEGORIES"""
+    if not _enabled:
+        return _NULL
+    return Span(category, name, args)
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def collect():
+    """Remove and return this process's events (to ship from a worker)"""
+    events = _events[:]
+    del _events[:]
+    return events
+
+
+def merge(events):
+    """Add events collected in another process"""
+    _events.extend(events)
+
+
+def summary():
+    """{category: (total µs, total bytes, span count)} over recorded spans"""
+    totals = {}
+    for event in _events:
+        if event['ph'] != 'X':
+            continue
+        total, size, count = totals.get(event['cat'], (0, 0, 0))
+        totals[event['cat']] = (total + event['dur'], size + event['args'].get('bytes', 0), count + 1)
+    return totals
+
+
+def print_summary():
+    totals = summary()
+    if not totals:
+        return
+    print("\nTrace summary:")
+    order = [c for c in CATEGORIES if c in totals] + sorted(c for c in totals if c not in CATEGORIES)
+    for category in order:
+        total, size, count = totals[category]
+        print(f"  {category:<10} {total / 1000:9.1f} ms  {size / 1024:9.1f} KiB  {count} span(s)")
+    peak = peak_rss_kb()
+    if peak is not None:
+        print(f"  peak RSS   {peak / 1024:9.1f} MiB")
+
+
+def write(path):
+    """Write the recorded events in Chrome trace-event format"""
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': _events, 'displayTimeUnit': 'ms'}, f)
+        f.write('\n')
+
+
+def from_argv(argv=None):
+    """Enable tracing if --trace PATH is on the command line
+
+    For scripts without an argument parser. Removes the option from argv,
+    and writes the trace and prints the summary at exit. Returns the path.
+    """
+    argv = sys.argv if argv is None else argv
+    path = None
+    for i, arg in enumerate(argv):
+        if arg == '--trace' and i + 1 < len(argv):
+            path = argv[i + 1]
+            del argv[i:i + 2]
+            break
+        if arg.startswith('--trace='):
+            path = arg.split('=', 1)[1]
+            del argv[i]
+            break
+    if path:
+        start(path)
+    return path
+
+
+def start(path):
+    """Enable tracing and write to path when the process exits"""
+    enable()
+
+    def finish():
+        print_summary()
+        write(path)
+        print(f"Trace written to {path}")
+
+    atexit.register(finish)
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 
 # Read the processed states file
-with open('/Users/curranclark/Documents/trade-maps/processed-states.txt', 'r') as f:
+with open('processed-states.txt', 'r') as f:
     states_content = f.read()
 
 # Read the working HTML file
-with open('/Users/curranclark/Documents/trade-maps/index-working.html', 'r') as f:
+with open('index-working.html', 'r') as f:
     html_content = f.read()
 
 # Find the SVG placeholder section
@@ -25,7 +25,7 @@ new_svg = '''const svgContent = `
 new_html = html_content[:svg_start] + new_svg + html_content[svg_end+2:]
 
 # Write the final file
-with open('/Users/curranclark/Documents/trade-maps/index-final.html', 'w') as f:
+with open('index-final.html', 'w') as f:
     f.write(new_html)
 
 print('Successfully created index-final.html with all 50 state paths integrated!')
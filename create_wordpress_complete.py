@@ -1,25 +1,21 @@
 #!/usr/bin/env python3
 
-import re
+import build_trace
+import geometry_cache
 
-# Read the carpenter copy.html file for the SVG paths
-with open('carpenter copy.html', 'r') as f:
-    content = f.read()
+build_trace.from_argv()
 
-# Extract the complete SVG section
-svg_match = re.search(r'<svg.*?</svg>', content, re.DOTALL)
-if not svg_match:
+# Complete SVG section of carpenter copy.html, event handlers already removed
+with build_trace.span('read', 'carpenter copy.html') as span:
+    geometry = geometry_cache.load('carpenter copy.html')
+    span.bytes = len(geometry.svg) if geometry else 0
+if geometry is None:
     print("SVG not found in carpenter copy.html")
     exit(1)
-    
-svg_content = svg_match.group(0)
-
-# Remove all event handlers from SVG
-svg_content = re.sub(r'\s+onclick="[^"]*"', '', svg_content)
-svg_content = re.sub(r'\s+onmouseover="[^"]*"', '', svg_content)
-svg_content = re.sub(r'\s+onmouseout="[^"]*"', '', svg_content)
+svg_content = geometry.svg
 
 # Create the complete WordPress HTML
+step = build_trace.span('transform', 'assemble page')
 wordpress_html = '''<style>
     /* Container Styles */
     #insurance-map-container {
@@ -644,8 +640,11 @@ console.log('WordPress Insurance Map Script Starting - DOM Ready');
 })();
 </script>'''
 
+step.end(bytes=len(wordpress_html))
+
 # Save the complete WordPress HTML
-with open('wordpress-complete.html', 'w') as f:
+with build_trace.span('write', 'wordpress-complete.html') as span, open('wordpress-complete.html', 'w') as f:
     f.write(wordpress_html)
+    span.bytes = len(wordpress_html)
 
 print("Complete WordPress HTML created successfully in wordpress-complete.html")
\ No newline at end of file
@@ -6,207 +6,581 @@ Version 1.1 - Updated for flexible WC class format
 """
 
 import re
+import sys
 import csv
+import json
+import mmap
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
-# State codes for all 50 states
-STATE_CODES = [
-    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
-    'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
-    'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
-    'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
-    'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
-]
+import build_trace
+from trade_dataset import STATE_CODES, TradeDataset
+from trade_pack import write_pack
+from wxr_source import iter_map_blocks, guess_trade
+from validate_trade_data import validate_csv
+
+# Bump whenever extraction or CSV output changes so cached trades are rebuilt
+EXTRACTOR_VERSION = '1.2.0'
+
+# Per-trade source/output hashes from the previous run
+CACHE_FILE = Path('.extract-cache.json')
+
+# CSVs always carry at least this many WC class column groups (the 11-column layout)
+MIN_WC_CLASSES = 2
+
+# Matches per-class stateData keys such as wcRate5437
+WC_BLOCK_RE = re.compile(r'^wcRate(\d+)$')
+
+# Map of HTML files to trade names
+TRADES = {
+    'final-carpenter.html': 'carpenter',
+    'final-electrician.html': 'electrician',
+    'final-plumber.html': 'plumber',
+    'final-hvac.html': 'hvac',
+    'final-gc.html': 'gc',
+    'final-landscaping.html': 'landscaping',
+    'final-painter.html': 'painter'
+}
+
+def _compile_both(pattern, flags=0):
+    """Compile pattern for both str pages and bytes/mmap pages"""
+    return {str: re.compile(pattern, flags), bytes: re.compile(pattern.encode('ascii'), flags)}
+
+def _pattern(patterns, content):
+    """Pick the compiled pattern matching the content type"""
+    return patterns[str] if isinstance(content, str) else patterns[bytes]
+
+def _text(value):
+    """Decode a captured bytes span; str and None pass through"""
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+# Top-level JS variables holding map data
+JS_DATA_VARS = ('stateData', 'glPremiumRanges')
+
+# Matches "1.2% - 2.3%" range strings from glPremiumRanges
+GL_RANGE_RE = re.compile(r'([\d.]+)%\s*-\s*([\d.]+)%')
+
+JS_STRING = r"""(?:"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')"""
+JS_TEXT = r'"[^"\\\n]*"'
+JS_NUMBER = r'-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?'
+JS_IDENT = r'[A-Za-z_$][\w$]*'
+JS_KEY = rf'(?:{JS_IDENT}|{JS_STRING}|\d+)'
+JS_SCALAR = rf'(?:{JS_STRING}|{JS_NUMBER}|{JS_IDENT})'
+
+def _flat_object_re(key, value):
+    """A whole {...} of key: value entries and nothing else; matching it finds the closing brace"""
+    return _compile_both(rf'\{{(?:\s*{key}\s*:\s*{value}\s*,)*\s*(?:{key}\s*:\s*{value}\s*)?\}}')
+
+# Flat objects, most specific first, each with the findall pattern for its entries:
+# plain numbers (the stateData blocks), plain double-quoted strings (glPremiumRanges), any scalars
+JS_NUMBER_OBJECT_RE = _flat_object_re(JS_IDENT, JS_NUMBER)
+JS_NUMBER_ENTRY_RE = re.compile(rf'({JS_IDENT})\s*:\s*({JS_NUMBER})')
+JS_TEXT_OBJECT_RE = _flat_object_re(JS_IDENT, JS_TEXT)
+JS_TEXT_ENTRY_RE = re.compile(rf'({JS_IDENT})\s*:\s*"([^"\\\n]*)"')
+JS_FLAT_OBJECT_RE = _flat_object_re(JS_KEY, JS_SCALAR)
+JS_FLAT_ENTRY_RE = re.compile(rf'({JS_KEY})\s*:\s*(?:({JS_STRING})|({JS_NUMBER})|({JS_IDENT}))')
+
+# One match per entry of anything else ("key: value", a bracket, a bare array item or a comment),
+# anchored after skipping the commas and whitespace between entries
+JS_SEPARATOR_RE = _compile_both(r'[\s,]*')
+JS_ENTRY_RE = _compile_both(
+    rf'(?P<comment>//[^\n]*|/\*.*?\*/)'
+    rf'|(?:(?P<key>{JS_KEY})\s*:\s*)?'
+    rf'(?:(?P<open>[{{\[])|(?P<close>[}}\]])'
+    rf'|(?P<string>{JS_STRING})|(?P<number>{JS_NUMBER})|(?P<ident>{JS_IDENT}))', re.DOTALL)
+
+# 'var' must start a word (so not myvar); the boundary is a lookbehind after the leading 'v'
+# because a leading \b stops the search skipping ahead to each literal occurrence
+JS_VAR_RE = _compile_both(r'v(?<![\w$]v)ar\s+(' + '|'.join(JS_DATA_VARS) + r')\s*=\s*(?=\{)')
+
+def _js_number(text):
+    return float(text) if '.' in text or 'e' in text or 'E' in text else int(text)
+
+def _js_key(key):
+    return key[1:-1] if key[0] in '"\'' else key
+
+def _span(text, start, end):
+    chunk = text[start:end]
+    return chunk if isinstance(chunk, str) else chunk.decode('utf-8')
+
+def _flat_object(text, pos):
+    """(value, end_offset) of a {...} at pos holding only key: scalar entries, or None
+
+    One regex match bracket-matches and checks the whole object, then one
+    findall over its span reads the entries.
+    """
+    match = _pattern(JS_NUMBER_OBJECT_RE, text).match(text, pos)
+    if match:
+        chunk = _span(text, pos, match.end())
+        return {key: _js_number(value) for key, value in JS_NUMBER_ENTRY_RE.findall(chunk)}, match.end()
+
+    match = _pattern(JS_TEXT_OBJECT_RE, text).match(text, pos)
+    if match:
+        return dict(JS_TEXT_ENTRY_RE.findall(_span(text, pos, match.end()))), match.end()
+
+    match = _pattern(JS_FLAT_OBJECT_RE, text).match(text, pos)
+    if not match:
+        return None
+    value = {}
+    for key, string, number, ident in JS_FLAT_ENTRY_RE.findall(_span(text, pos, match.end())):
+        if number:
+            value[_js_key(key)] = _js_number(number)
+        elif string:
+            value[_js_key(key)] = string[1:-1]
+        else:
+            value[_js_key(key)] = ident
+    return value, match.end()
+
+def parse_js_object(text, pos):
+    """Parse a JS object (or array) literal starting at text[pos] == '{' (or '[')
+
+    An object holding only scalars is bracket-matched by a single regex
+    match and its entries read with one findall over that span, so each
+    per-state block inside stateData costs two passes in C. Anything else
+    (nesting, arrays, comments) is read entry by entry, parsing nested
+    objects the same way.
+    text may be a str, bytes or mmap; only the matched spans are decoded.
+    Returns (value, end_offset).
+    """
+    flat = _flat_object(text, pos)
+    if flat:
+        return flat
+
+    separator_re = _pattern(JS_SEPARATOR_RE, text)
+    entry_re = _pattern(JS_ENTRY_RE, text)
+    current = None
+    p = pos
+    while True:
+        p = separator_re.match(text, p).end()
+        match = entry_re.match(text, p)
+        if match is None:
+            if p >= len(text):
+                raise ValueError(f"Unterminated object literal at offset {pos}")
+            raise ValueError(f"Unexpected {text[p:p + 1]!r} at offset {p} "
+                             f"in object literal at offset {pos}")
+        p = match.end()
+        kind = match.lastgroup
+        if kind == 'comment':
+            continue
+        if kind == 'close':
+            return current, p
+
+        if kind == 'open':
+            if current is None:
+                current = {} if match.group('open') in ('{', b'{') else []
+                continue
+            value, p = parse_js_object(text, match.start('open'))
+        else:
+            value = _text(match.group(kind))
+            value = _js_number(value) if kind == 'number' else value[1:-1] if kind == 'string' else value
+
+        if isinstance(current, list):
+            current.append(value)
+        elif match.group('key') is None:
+            raise ValueError(f"Missing key at offset {match.start()} in object literal at offset {pos}")
+        else:
+            current[_js_key(_text(match.group('key')))] = value
+
+def extract_js_blocks(html_content):
+    """Tokenize stateData and glPremiumRanges in one pass over the page
+
+    Returns a dict keyed by variable name, e.g.
+    {'glPremiumRanges': {'AL': '1.2% - 2.3%', ...},
+     'stateData': {'glSavings': {'AL': 32.3, ...}, 'wcRate5437': {...}, ...}}
+    """
+    var_re = _pattern(JS_VAR_RE, html_content)
+    blocks = {}
+    pos = 0
+    while len(blocks) < len(JS_DATA_VARS):
+        var_match = var_re.search(html_content, pos)
+        if not var_match:
+            break
+        value, pos = parse_js_object(html_content, var_match.end())
+        blocks.setdefault(_text(var_match.group(1)), value)
+    return blocks
+
+# Pattern: <button ... data-wc-code="5437">Class 5437 (Interior)</button>
+WC_BUTTON_RE = _compile_both(r'<button[^>]*data-wc-code="(\d+)"[^>]*>Class\s+(\d+)(?:\s*\(([^)]+)\))?</button>')
+
+# Pattern 1: <button ... data-metric="wcRate">WC Rate - 5190</button>
+# Pattern 2: <button ... data-metric="wcRate">WC Rate - 9102 (Lawncare)</button>
+WC_SINGLE_RE = _compile_both(r'data-metric="wcRate">WC Rate - (\d+)(?:\s*\(([^)]+)\))?</button>')
 
 def extract_wc_config(html_content):
-    """Extract WC class codes and labels from HTML"""
+    """Extract WC class codes and labels from HTML
+
+    'classes' lists every (code, label) pair in button order; the first two
+    are mirrored into class1/label1/class2/label2 for existing callers.
+    """
     wc_config = {
         'class1': None,
         'label1': None,
         'class2': None,
-        'label2': None
+        'label2': None,
+        'classes': []
     }
 
-    # Look for WC button definitions
-    # Pattern: <button ... data-wc-code="5437">Class 5437 (Interior)</button>
-    button_pattern = r'<button[^>]*data-wc-code="(\d+)"[^>]*>Class\s+(\d+)(?:\s*\(([^)]+)\))?</button>'
-    matches = re.findall(button_pattern, html_content)
-
-    if matches:
-        if len(matches) >= 1:
-            wc_config['class1'] = matches[0][1]
-            wc_config['label1'] = matches[0][2] if matches[0][2] else ''
-
-        if len(matches) >= 2:
-            wc_config['class2'] = matches[1][1]
-            wc_config['label2'] = matches[1][2] if matches[1][2] else ''
+    # Look for WC button definitions (one findall covers every class)
+    for match in _pattern(WC_BUTTON_RE, html_content).findall(html_content):
+        code, label = _text(match[1]), _text(match[2])
+        wc_config['classes'].append((code, label or ''))
 
     # Fallback: Look for single WC Rate button label
-    # Pattern 1: <button ... data-metric="wcRate">WC Rate - 5190</button>
-    # Pattern 2: <button ... data-metric="wcRate">WC Rate - 9102 (Lawncare)</button>
-    single_pattern = r'data-metric="wcRate">WC Rate - (\d+)(?:\s*\(([^)]+)\))?</button>'
-    single_match = re.search(single_pattern, html_content)
-
-    if single_match and not wc_config['class1']:
-        wc_config['class1'] = single_match.group(1)
-        wc_config['label1'] = single_match.group(2) if single_match.group(2) else ''
+    if not wc_config['classes']:
+        single_match = _pattern(WC_SINGLE_RE, html_content).search(html_content)
+        if single_match:
+            label = _text(single_match.group(2))
+            wc_config['classes'].append((_text(single_match.group(1)), label or ''))
 
+    _sync_legacy_wc_keys(wc_config)
     return wc_config
 
-def extract_wc_data(html_content, wc_config):
-    """Extract WC rate data for specific class codes"""
-    wc_data = {'rate1': {}, 'rate2': {}}
-
-    # Extract state data section
-    state_data_match = re.search(r'var stateData = \{(.+?)\s*\};', html_content, re.DOTALL)
-    if not state_data_match:
+def _sync_legacy_wc_keys(wc_config):
+    """Mirror the first two classes into the class1/label1/class2/label2 keys"""
+    for n, (code, label) in enumerate(wc_config['classes'][:MIN_WC_CLASSES], 1):
+        wc_config[f'class{n}'] = code
+        wc_config[f'label{n}'] = label
+
+def add_wc_block_classes(wc_config, state_data):
+    """Add classes that have a wcRate<code> block but no matching button"""
+    known = {code for code, label in wc_config['classes']}
+    for key in state_data:
+        block_match = WC_BLOCK_RE.match(key)
+        if block_match and block_match.group(1) not in known:
+            wc_config['classes'].append((block_match.group(1), ''))
+            known.add(block_match.group(1))
+    _sync_legacy_wc_keys(wc_config)
+
+def wc_class_count(wc_config):
+    """Number of WC column groups to emit for a trade"""
+    return max(MIN_WC_CLASSES, len(wc_config['classes']))
+
+def extract_wc_data(html_content, wc_config, js_blocks=None):
+    """Extract WC rate data for every class code
+
+    Returns {'rate1': {state: rate}, 'rate2': {...}, ...} with one entry per
+    CSV column group.
+    """
+    wc_data = {f'rate{n}': {} for n in range(1, wc_class_count(wc_config) + 1)}
+
+    # Reuse the tokenized blocks when the caller already has them
+    if js_blocks is None:
+        js_blocks = extract_js_blocks(html_content)
+
+    state_data = js_blocks.get('stateData')
+    if state_data is None:
         return wc_data
 
-    state_data_text = state_data_match.group(1)
+    for n, (code, label) in enumerate(wc_config['classes'], 1):
+        # Look for wcRate5437, wcRate5645, ... blocks
+        block = state_data.get(f'wcRate{code}')
 
-    # For trades with two WC classes (like carpenter)
-    if wc_config['class1'] and wc_config['class2']:
-        # Look for wcRate5437, wcRate5645 pattern
-        wc1_pattern = f"wcRate{wc_config['class1']}:\\s*\\{{([^}}]+)\\}}"
-        wc2_pattern = f"wcRate{wc_config['class2']}:\\s*\\{{([^}}]+)\\}}"
+        # Trades with a single WC class use a generic wcRate: { ... } block
+        if block is None and len(wc_config['classes']) == 1:
+            block = state_data.get('wcRate')
 
-        wc1_match = re.search(wc1_pattern, state_data_text)
-        if wc1_match:
-            for match in re.finditer(r'(\w+):\s*([\d.]+)', wc1_match.group(1)):
-                wc_data['rate1'][match.group(1)] = float(match.group(2))
+        for state, value in (block or {}).items():
+            wc_data[f'rate{n}'][state] = float(value)
 
-        wc2_match = re.search(wc2_pattern, state_data_text)
-        if wc2_match:
-            for match in re.finditer(r'(\w+):\s*([\d.]+)', wc2_match.group(1)):
-                wc_data['rate2'][match.group(1)] = float(match.group(2))
+    return wc_data
 
-    # For trades with single WC class
-    elif wc_config['class1']:
-        # Look for generic wcRate: { ... } pattern
-        wc_pattern = r"wcRate:\s*\{([^}]+)\}"
-        wc_match = re.search(wc_pattern, state_data_text)
+@contextmanager
+def open_page(html_file, use_mmap=False):
+    """Yield the raw page as bytes, or as a read-only mmap when use_mmap is set
+
+    The mmap path lets the byte-level patterns scan the file in place, so
+    only the captured spans are ever decoded.
+    """
+    with open(html_file, 'rb') as f:
+        if not use_mmap:
+            yield f.read()
+            return
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            yield b''
+            return
+        with mapping:
+            yield mapping
+
+def extract_data_from_html(html_file, log=print, use_mmap=False):
+    """Extract insurance data from HTML file"""
+    with open_page(html_file, use_mmap) as raw:
+        content = raw if use_mmap else raw.decode('utf-8')
+        data, wc_config = extract_trade(content, log)
+    return data
 
-        if wc_match:
-            for match in re.finditer(r'(\w+):\s*([\d.]+)', wc_match.group(1)):
-                wc_data['rate1'][match.group(1)] = float(match.group(2))
+def extract_trade(content, log=print, regions=STATE_CODES):
+    """Extract insurance data and WC configuration from page content
 
-    return wc_data
+    content may be a decoded str or a bytes-like buffer such as an mmap.
+    regions sets the dataset's region codes (the 50 states by default).
 
-def extract_data_from_html(html_file):
-    """Extract insurance data from HTML file"""
-    with open(html_file, 'r') as f:
-        content = f.read()
+    Returns (data, wc_config); data is None if the page is missing a data block.
+    """
+    step = build_trace.span('regex', 'tokenize page')
 
     # Extract WC configuration
     wc_config = extract_wc_config(content)
-    print(f"  WC Config: Class 1={wc_config['class1']} ({wc_config['label1']}), Class 2={wc_config['class2']} ({wc_config['label2']})")
+
+    # Tokenize stateData and glPremiumRanges in a single pass
+    js_blocks = extract_js_blocks(content)
+    step.end(bytes=len(content))
+
+    # Pick up any wcRate<code> blocks that have no button
+    if 'stateData' in js_blocks:
+        add_wc_block_classes(wc_config, js_blocks['stateData'])
+
+    log(f"  WC Config: Class 1={wc_config['class1']} ({wc_config['label1']}), Class 2={wc_config['class2']} ({wc_config['label2']})")
+    for n, (code, label) in enumerate(wc_config['classes'][MIN_WC_CLASSES:], MIN_WC_CLASSES + 1):
+        log(f"  WC Config: Class {n}={code} ({label})")
 
     # Extract WC data
-    wc_data = extract_wc_data(content, wc_config)
+    wc_data = extract_wc_data(content, wc_config, js_blocks)
 
     # Extract glPremiumRanges
-    gl_ranges_match = re.search(r'var glPremiumRanges = \{([^}]+)\}', content)
-    if not gl_ranges_match:
-        print(f"  Error: Could not find glPremiumRanges")
-        return None
+    if 'glPremiumRanges' not in js_blocks:
+        log(f"  Error: Could not find glPremiumRanges")
+        return None, wc_config
 
-    gl_ranges_text = gl_ranges_match.group(1)
     gl_ranges = {}
-    for match in re.finditer(r'(\w+):\s*"([\d.]+)%\s*-\s*([\d.]+)%"', gl_ranges_text):
-        state = match.group(1)
-        low = float(match.group(2))
-        high = float(match.group(3))
-        gl_ranges[state] = (low, high)
+    for state, range_text in js_blocks['glPremiumRanges'].items():
+        range_match = GL_RANGE_RE.match(str(range_text))
+        if range_match:
+            low = float(range_match.group(1))
+            high = float(range_match.group(2))
+            gl_ranges[state] = (low, high)
 
     # Extract stateData
-    state_data_match = re.search(r'var stateData = \{(.+?)\s*\};', content, re.DOTALL)
-    if not state_data_match:
-        print(f"  Error: Could not find stateData")
-        return None
-
-    state_data_text = state_data_match.group(1)
+    state_data = js_blocks.get('stateData')
+    if state_data is None:
+        log(f"  Error: Could not find stateData")
+        return None, wc_config
 
-    # Extract each metric
-    data = {}
+    # Extract each metric into one column per metric
+    step = build_trace.span('transform', 'build dataset')
+    data = TradeDataset(regions)
+    data.wc_classes = list(wc_config['classes'])
 
     # GL Premium (average values - not used in CSV, we use ranges)
     # GL Savings
-    gl_savings_match = re.search(r'glSavings:\s*\{([^}]+)\}', state_data_text)
-    if gl_savings_match:
-        for match in re.finditer(r'(\w+):\s*([\d.]+)', gl_savings_match.group(1)):
-            state = match.group(1)
-            if state not in data:
-                data[state] = {}
-            data[state]['glSavings'] = float(match.group(2))
+    data.update('glSavings', state_data.get('glSavings', {}))
 
     # GL Competitiveness
-    gl_comp_match = re.search(r'glCompetitiveness:\s*\{([^}]+)\}', state_data_text)
-    if gl_comp_match:
-        for match in re.finditer(r'(\w+):\s*(\d+)', gl_comp_match.group(1)):
-            state = match.group(1)
-            if state not in data:
-                data[state] = {}
-            data[state]['glCompetitiveness'] = int(match.group(2))
+    data.update('glCompetitiveness', state_data.get('glCompetitiveness', {}))
 
     # Combine all data
-    for state in gl_ranges:
-        if state not in data:
-            data[state] = {}
-        data[state]['glPremiumLow'] = gl_ranges[state][0]
-        data[state]['glPremiumHigh'] = gl_ranges[state][1]
-        data[state]['wcClass1'] = wc_config['class1'] or ''
-        data[state]['wcRate1'] = wc_data['rate1'].get(state, 0)
-        data[state]['wcLabel1'] = wc_config['label1'] or ''
-        data[state]['wcClass2'] = wc_config['class2'] or ''
-        data[state]['wcRate2'] = wc_data['rate2'].get(state, 0)
-        data[state]['wcLabel2'] = wc_config['label2'] or ''
+    data.update('glPremiumLow', {state: low for state, (low, high) in gl_ranges.items()})
+    data.update('glPremiumHigh', {state: high for state, (low, high) in gl_ranges.items()})
+    for n in range(1, wc_class_count(wc_config) + 1):
+        data.update(f'wcRate{n}', wc_data[f'rate{n}'])
+    step.end()
+
+    return data, wc_config
+
+def csv_header(wc_count=MIN_WC_CLASSES):
+    """CSV header: 5 GL columns plus a Class/Rate/Label group per WC class"""
+    header = ['State', 'GL_Premium_Low', 'GL_Premium_High', 'GL_Savings', 'GL_Competitiveness']
+    for n in range(1, wc_count + 1):
+        header += [f'WC_Class_{n}', f'WC_Rate_{n}', f'WC_Label_{n}']
+    return header
+
+def write_csv(data, output_file, wc_config, log=print):
+    """Write data to CSV file
+
+    Uses the 11-column format for trades with up to two WC classes and
+    widens by three columns for each additional class. Rows follow the
+    dataset's own regions (the 50 states for trade pages).
+    """
+    wc_count = wc_class_count(wc_config)
+    wc_classes = list(wc_config['classes'])
+    wc_classes += [('', '')] * (wc_count - len(wc_classes))
 
-    return data
-
-def write_csv(data, output_file, wc_config):
-    """Write data to CSV file with new 11-column format"""
     with open(output_file, 'w', newline='') as f:
         writer = csv.writer(f)
 
-        # Write header (new 11-column format)
-        writer.writerow(['State', 'GL_Premium_Low', 'GL_Premium_High', 'GL_Savings',
-                        'GL_Competitiveness', 'WC_Class_1', 'WC_Rate_1', 'WC_Label_1',
-                        'WC_Class_2', 'WC_Rate_2', 'WC_Label_2'])
+        writer.writerow(csv_header(wc_count))
 
-        # Write data for all 50 states
-        for state in STATE_CODES:
+        # Write data for every region of the dataset
+        for state in data.regions:
             if state in data:
                 row = [
                     state,
-                    data[state].get('glPremiumLow', 0),
-                    data[state].get('glPremiumHigh', 0),
-                    data[state].get('glSavings', 0),
-                    data[state].get('glCompetitiveness', 0),
-                    data[state].get('wcClass1', ''),
-                    data[state].get('wcRate1', 0),
-                    data[state].get('wcLabel1', ''),
-                    data[state].get('wcClass2', ''),
-                    data[state].get('wcRate2', 0),
-                    data[state].get('wcLabel2', '')
+                    data.get(state, 'glPremiumLow'),
+                    data.get(state, 'glPremiumHigh'),
+                    data.get(state, 'glSavings'),
+                    data.get(state, 'glCompetitiveness')
                 ]
+                for n, (code, label) in enumerate(wc_classes, 1):
+                    row += [code, data.get(state, f'wcRate{n}'), label]
                 writer.writerow(row)
             else:
-                print(f"  Warning: No data found for state {state}")
+                log(f"  Warning: No data found for state {state}")
+
+    log(f"✓ Created: {output_file}")
 
-    print(f"✓ Created: {output_file}")
+def file_sha256(path):
+    """Return the hex SHA-256 of a file, or None if it does not exist"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+def load_cache(cache_file=CACHE_FILE):
+    """Load the extraction cache, ignoring missing or unreadable files"""
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+def save_cache(cache, cache_file=CACHE_FILE):
+    """Write the extraction cache"""
+    with open(cache_file, 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def process_page(raw, source, trade_name, output_dir, cached=None, use_mmap=False):
+    """Extract one trade from raw page bytes (or an mmap) and write its CSV
+
+    source names the page in log lines. Returns (messages, cache_entry); log
+    lines are returned instead of printed so results from worker processes
+    can be reported in order. If cached matches the page hash, extractor
+    version and current CSV, the CSV is left untouched.
+    """
+    messages = []
+    csv_file = Path(output_dir) / f"{trade_name}.csv"
+    source_hash = hashlib.sha256(raw).hexdigest()
+
+    if (cached and cached.get('version') == EXTRACTOR_VERSION
+            and cached.get('source') == source_hash
+            and cached.get('csv') == file_sha256(csv_file)):
+        messages.append(f"= {trade_name} unchanged, skipping")
+        return messages, cached
+
+    messages.append(f"Processing {trade_name}...")
+    content = raw if use_mmap else raw.decode('utf-8')
+
+    # Extract data
+    data, wc_config = extract_trade(content, messages.append)
+
+    entry = None
+    if data:
+        # Write CSV
+        with build_trace.span('write', csv_file.name) as span:
+            write_csv(data, csv_file, wc_config, messages.append)
+            span.bytes = csv_file.stat().st_size
+        entry = {
+            'version': EXTRACTOR_VERSION,
+            'source': source_hash,
+            'csv': file_sha256(csv_file)
+        }
+    else:
+        messages.append(f"✗ Failed to extract data from {source}")
+
+    messages.append('')
+    return messages, entry
+
+def process_trade(html_file, trade_name, output_dir, cached=None, use_mmap=False):
+    """Extract one trade page file and write its CSV
+
+    Reads the page exactly once; see process_page for the return value.
+    """
+    html_path = Path(html_file)
+
+    if not html_path.exists():
+        return [f"⚠ Skipping {html_file} (file not found)"], None
+
+    read = build_trace.span('read', html_path.name)
+    with open_page(html_path, use_mmap) as raw:
+        read.end(bytes=len(raw))
+        return process_page(raw, html_file, trade_name, output_dir, cached, use_mmap)
+
+def traced_process_trade(*args):
+    """process_trade with tracing on; also returns the spans it recorded
+
+    Worker processes cannot write to the parent's trace, so their events
+    are shipped back with the result.
+    """
+    build_trace.enable()
+    messages, entry = process_trade(*args)
+    return messages, entry, build_trace.collect()
+
+def traced_process_page(*args):
+    """process_page with tracing on; also returns the spans it recorded"""
+    build_trace.enable()
+    messages, entry = process_page(*args)
+    return messages, entry, build_trace.collect()
+
+def process_wxr(wxr_file, output_dir, cache, overrides=None, executor=None, worker=process_page):
+    """Stream a WXR export and extract each trade's map block
+
+    Yields (trade_name, worker result) for each block. Pages are matched to
+    trades by slug (see wxr_source.guess_trade) unless overrides maps the
+    slug explicitly. Only the first block per trade is used.
+
+    Without an executor each block is extracted as soon as it is found. With
+    one, blocks are submitted while the export is still being read and
+    results are yielded in export order once it has been read.
+    """
+    overrides = overrides or {}
+    trades = list(TRADES.values())
+    seen = {}
+    pending = []
+    for block in iter_map_blocks(wxr_file):
+        source = f"{wxr_file} ({block.post_type} '{block.slug}', block {block.index + 1})"
+        trade_name = overrides.get(block.slug) or guess_trade(block.slug, trades)
+        if trade_name is None:
+            print(f"⚠ Skipping {source}: no trade matches this slug (use --wxr-trade {block.slug}=TRADE)")
+            continue
+        if trade_name in seen:
+            print(f"⚠ Skipping {source}: {trade_name} already read from '{seen[trade_name]}'")
+            continue
+        seen[trade_name] = block.slug
+        page_args = (block.html.encode('utf-8'), source, trade_name, output_dir, cache.get(trade_name))
+        if executor is None:
+            yield trade_name, worker(*page_args)
+        else:
+            pending.append((trade_name, executor.submit(worker, *page_args)))
+
+    for trade_name, future in pending:
+        yield trade_name, future.result()
+
+    missing = [trade for trade in trades if trade not in seen]
+    if missing:
+        print(f"⚠ No map block found for: {', '.join(missing)}")
 
 def main():
     """Main extraction process"""
-    # Map of HTML files to trade names
-    trades = {
-        'final-carpenter.html': 'carpenter',
-        'final-electrician.html': 'electrician',
-        'final-plumber.html': 'plumber',
-        'final-hvac.html': 'hvac',
-        'final-gc.html': 'gc',
-        'final-landscaping.html': 'landscaping',
-        'final-painter.html': 'painter'
-    }
+    parser = argparse.ArgumentParser(description='Extract insurance data from trade HTML pages into CSV files')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Number of worker processes (default: 1, serial)')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignore the extraction cache and rebuild every trade')
+    parser.add_argument('--mmap', action='store_true',
+                        help='Memory-map source pages and scan them as bytes (for very large pages)')
+    parser.add_argument('--pack', metavar='PATH',
+                        help='Also write every trade into one packed binary file (see trade_pack.py)')
+    parser.add_argument('--no-validate', action='store_true',
+                        help='Skip the pre-upload validation of the written CSVs')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='Write a Chrome trace (chrome://tracing, Perfetto) of every stage to PATH')
+    parser.add_argument('--wxr', metavar='EXPORT.xml',
+                        help='Read published map blocks from a WordPress WXR export instead of final-*.html')
+    parser.add_argument('--wxr-trade', metavar='SLUG=TRADE', action='append', default=[],
+                        help='Map a page slug to a trade when it cannot be guessed (repeatable)')
+    args = parser.parse_args()
+
+    if args.trace:
+        build_trace.start(args.trace)
 
     # Create output directory
     output_dir = Path('sample-data')
@@ -214,40 +588,90 @@ def main():
 
     print("Extracting insurance data from HTML files (v1.1 format with flexible WC classes)...\n")
 
-    # Process each trade
-    for html_file, trade_name in trades.items():
-        html_path = Path(html_file)
-
-        if not html_path.exists():
-            print(f"⚠ Skipping {html_file} (file not found)")
-            continue
-
-        print(f"Processing {trade_name}...")
-
-        # Extract data
-        data = extract_data_from_html(html_path)
-
-        if data:
-            # Get WC config for display
-            with open(html_path, 'r') as f:
-                content = f.read()
-            wc_config = extract_wc_config(content)
-
-            # Write CSV
+    cache = {} if args.force else load_cache()
+
+    html_files = list(TRADES)
+    trade_names = [TRADES[html_file] for html_file in html_files]
+    output_dirs = [output_dir] * len(html_files)
+    cached = [cache.get(trade_name) for trade_name in trade_names]
+    use_mmap = [args.mmap] * len(html_files)
+
+    # Process each trade; results come back in TRADES order either way
+    worker = traced_process_trade if args.trace else process_trade
+    if args.wxr:
+        overrides = dict(option.split('=', 1) for option in args.wxr_trade)
+        page_worker = traced_process_page if args.trace else process_page
+        if args.jobs > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                results = list(process_wxr(args.wxr, output_dir, cache, overrides, executor, page_worker))
+        else:
+            results = process_wxr(args.wxr, output_dir, cache, overrides, worker=page_worker)
+        trade_names = []
+    elif args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = list(zip(trade_names, executor.map(worker, html_files, trade_names, output_dirs, cached, use_mmap)))
+    else:
+        results = zip(trade_names, map(worker, html_files, trade_names, output_dirs, cached, use_mmap))
+
+    new_cache = {}
+    for trade_name, result in results:
+        messages, entry = result[:2]
+        if args.trace and len(result) > 2:
+            build_trace.merge(result[2])
+        if args.wxr:
+            trade_names.append(trade_name)
+        for message in messages:
+            print(message)
+        if entry:
+            new_cache[trade_name] = entry
+
+    if new_cache != cache:
+        save_cache(new_cache)
+
+    if args.pack:
+        # Build from the CSVs so cached (skipped) trades are included too
+        datasets = {}
+        for trade_name in trade_names:
             csv_file = output_dir / f"{trade_name}.csv"
-            write_csv(data, csv_file, wc_config)
+            if csv_file.exists():
+                datasets[trade_name] = TradeDataset.from_csv(csv_file)
+        with build_trace.span('write', args.pack):
+            written = write_pack(args.pack, datasets)
+        if written:
+            print(f"✓ Packed {len(datasets)} trades into {args.pack}")
         else:
-            print(f"✗ Failed to extract data from {html_file}")
+            print(f"= {args.pack} unchanged")
 
-        print()
+    invalid = 0
+    if not args.no_validate:
+        # Same rules as the plugin's import, so bad rows are caught before upload
+        print("\nValidating CSV files...")
+        for trade_name in trade_names:
+            csv_file = output_dir / f"{trade_name}.csv"
+            if not csv_file.exists():
+                continue
+            with build_trace.span('validate', csv_file.name):
+                violations = validate_csv(csv_file)
+            if violations:
+                invalid += 1
+                print(f"✗ {csv_file}: {len(violations)} problem(s)")
+                for violation in violations:
+                    print(f"  [{violation.code}] {violation.message}")
+            else:
+                print(f"✓ {csv_file}")
 
     print(f"\n✅ Done! CSV files created in {output_dir}/ with flexible WC class format")
     print(f"\nNew CSV format (11 columns):")
     print("  - Columns 1-5: State, GL data (same as before)")
     print("  - Columns 6-8: WC_Class_1, WC_Rate_1, WC_Label_1")
     print("  - Columns 9-11: WC_Class_2, WC_Rate_2, WC_Label_2")
+    print("  - Trades with 3+ WC classes add WC_Class_N, WC_Rate_N, WC_Label_N per extra class")
     print(f"\nYou can now upload these CSV files via WordPress admin:")
     print("  Dashboard → Insurance Maps → Upload CSV")
 
+    if invalid:
+        print(f"\n⚠ {invalid} CSV file(s) failed validation and will be rejected on upload")
+        sys.exit(1)
+
 if __name__ == '__main__':
     main()
@@ -1,21 +1,13 @@
 #!/usr/bin/env python3
 
-import re
+import geometry_cache
 
-# Read the carpenter copy.html file
-with open('carpenter copy.html', 'r') as f:
-    content = f.read()
+# SVG section of carpenter copy.html with onclick, onmouseover and
+# onmouseout removed (cached until the page changes)
+geometry = geometry_cache.load('carpenter copy.html')
+if geometry is not None:
+    svg_content = geometry.svg
 
-# Find the SVG section
-svg_match = re.search(r'<svg.*?</svg>', content, re.DOTALL)
-if svg_match:
-    svg_content = svg_match.group(0)
-    
-    # Remove all onclick, onmouseover, onmouseout attributes
-    svg_content = re.sub(r'\s+onclick="[^"]*"', '', svg_content)
-    svg_content = re.sub(r'\s+onmouseover="[^"]*"', '', svg_content)
-    svg_content = re.sub(r'\s+onmouseout="[^"]*"', '', svg_content)
-    
     # Save cleaned SVG
     with open('cleaned_svg.txt', 'w') as f:
         f.write(svg_content)
@@ -0,0 +1,94 @@
+"""
+On-disk cache of cleaned, parsed map geometry
+
+Every page generator needs the same thing from carpenter copy.html (or
+US_Map.svg): the <svg> markup with inline event handlers stripped, and the
+state paths inside it. load() does that work once per change to the source:
+the result is pickled under .geometry-cache/, keyed by the SHA-256 of the
+source file, and later runs only hash the file and unpickle.
+
+Bump CACHE_VERSION whenever the cleaned output changes shape so stale
+entries are rebuilt.
+"""
+
+import os
+import pickle
+import hashlib
+import tempfile
+from collections import namedtuple
+from pathlib import Path
+
+from svg_reader import EVENT_HANDLERS, read_svg, strip_event_handlers
+
+CACHE_VERSION = 1
+CACHE_DIR = Path('.geometry-cache')
+
+# svg: cleaned markup of the first <svg>; paths: PathRecords inside it,
+# without event handler attributes
+MapGeometry = namedtuple('MapGeometry', ['svg', 'paths'])
+
+
+def source_sha256(path):
+    """Hex SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_file(source, cache_dir=CACHE_DIR):
+    """One cache file per source name; its content hash decides if it's current"""
+    return Path(cache_dir) / (Path(source).name.replace(' ', '_') + '.pickle')
+
+
+def parse_geometry(source):
+    """Clean and parse the first <svg> in source; None if there isn't one"""
+    found = read_svg(source)
+    if found is None:
+        return None
+    svg, records = found
+    paths = []
+    for record in records:
+        attrs = {name: value for name, value in record.attrs.items() if name not in EVENT_HANDLERS}
+        paths.append(record._replace(attrs=attrs))
+    return MapGeometry(strip_event_handlers(svg), paths)
+
+
+def _read_cache(path, digest):
+    try:
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if not isinstance(entry, dict) or entry.get('version') != CACHE_VERSION or entry.get('source') != digest:
+        return None
+    return entry
+
+
+def _write_cache(path, entry):
+    """Write atomically so scripts running in parallel never see half a file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load(source, cache_dir=CACHE_DIR, use_cache=True):
+    """MapGeometry for source (None if it has no <svg>), from the cache when current"""
+    digest = source_sha256(source)
+    path = cache_file(source, cache_dir)
+    if use_cache:
+        entry = _read_cache(path, digest)
+        if entry is not None:
+            return entry['geometry']
+
+    geometry = parse_geometry(source)
+    if use_cache:
+        _write_cache(path, {'version': CACHE_VERSION, 'source': digest, 'geometry': geometry})
+    return geometry
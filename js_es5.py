@@ -0,0 +1,512 @@
+"""
+Single-pass ES6 -> ES5 down-levelling for the map scripts
+
+tokenize() splits a script into tokens in one linear scan. Strings,
+comments, regex literals and template literals are tokens of their own
+(template ${...} expressions are tokenized as code), so nothing inside
+them is mistaken for syntax, and bracket pairs are matched in the same
+scan. to_es5() then rewrites in one left-to-right walk over the tokens:
+
+    `a ${b} c`              'a ' + b + ' c'
+    x => expr               function(x) { return expr; }
+    (a, b) => { ... }       function(a, b) { ... }
+    ([a, b]) => ...         function(_ref) { var a = _ref[0], b = _ref[1]; ... }
+    const / let             var
+    f(...args)              f.apply(null, args)     (obj.f -> obj.f.apply(obj, args))
+    [a, ...b]               [].concat([a], b)
+
+Arrow functions become plain functions, so they do not keep the outer
+this; the map scripts never use this inside an arrow. A spread call
+is only rewritten when the spread is the sole argument of a plain
+a.b.c callee: f(a, ...b), g()(...b) and new F(...b) are left as they
+are. Anything left that ES5 cannot parse, those included, is listed
+by unconverted().
+"""
+
+import re
+from bisect import bisect_left
+
+WS, COMMENT, STRING, REGEX, NUMBER, NAME, PUNCT, TEMPLATE_HEAD, TEMPLATE_PART = range(9)
+
+SIMPLE_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<number>\.?\d[\w.]*)
+  | (?P<punct>=>|\.\.\.|===|!==|==|!=|<=|>=|&&|\|\||\+\+|--|<<|>>>?|[-+*/%&|^]=|.)
+''', re.VERBOSE | re.DOTALL)
+SIMPLE_KINDS = {'ws': WS, 'comment': COMMENT, 'string': STRING, 'name': NAME, 'number': NUMBER, 'punct': PUNCT}
+
+OPENERS = {'(': ')', '[': ']', '{': '}'}
+CLOSERS = {')', ']', '}'}
+# A / after one of these keywords starts a regex, not a division
+REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw',
+                  'case', 'do', 'else', 'yield', 'await'}
+# Names that are operators, not values (an arrow body or [ after them is an expression start)
+KEYWORDS = REGEX_KEYWORDS | {'var', 'const', 'let', 'if', 'while', 'for', 'switch', 'function'}
+
+
+class Tokens:
+    """Token kinds and texts, with bracket matching and significant-token links"""
+
+    def __init__(self, kinds, texts, match, parts, next, prev, first, candidates):
+        self.kinds = kinds
+        self.texts = texts
+        # opener index <-> closer index; template head <-> its closing part (itself with no parts)
+        self.match = match
+        # template head index -> [indices of its TEMPLATE_PART tokens]
+        self.parts = parts
+        # next/previous token that is not whitespace or a comment (len(kinds) / -1 at the ends)
+        self.next = next
+        self.prev = prev
+        self.first = first
+        # sorted indices of the only tokens to_es5 may rewrite from
+        self.candidates = candidates
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def is_punct(self, i, text):
+        return 0 <= i < len(self.kinds) and self.kinds[i] == PUNCT and self.texts[i] == text
+
+    def ends_value(self, i):
+        """True if token i can end an operand (so / after it divides and [ indexes)"""
+        if i < 0:
+            return False
+        kind, text = self.kinds[i], self.texts[i]
+        if kind == NAME:
+            return text not in KEYWORDS
+        if kind == PUNCT:
+            return text in CLOSERS
+        if kind in (TEMPLATE_HEAD, TEMPLATE_PART):
+            return _closes_template(self.match, kind, i)
+        return kind in (STRING, REGEX, NUMBER)
+
+
+def _closes_template(match, kind, i):
+    """True if token i ends a template literal (a head without ${, or the last part)"""
+    if kind == TEMPLATE_HEAD:
+        return match.get(i) == i
+    return kind == TEMPLATE_PART and i in match
+
+
+def _line(source, pos):
+    return source.count('\n', 0, pos) + 1
+
+
+def _scan_quoted(source, pos, quote):
+    """End of the string or regex class starting at pos (just past the quote)"""
+    while pos < len(source):
+        c = source[pos]
+        if c == '\\':
+            pos += 2
+            continue
+        if c == quote:
+            return pos + 1
+        if c == '\n':
+            break
+        pos += 1
+    raise ValueError(f"line {_line(source, pos)}: unterminated {quote} literal")
+
+
+def _scan_regex(source, pos):
+    """End of the regex literal whose opening / is at pos"""
+    pos += 1
+    while pos < len(source):
+        c = source[pos]
+        if c == '\\':
+            pos += 2
+            continue
+        if c == '[':
+            pos = _scan_quoted(source, pos + 1, ']')
+            continue
+        if c == '/':
+            pos += 1
+            while pos < len(source) and (source[pos].isalnum() or source[pos] in '_$'):
+                pos += 1
+            return pos
+        if c == '\n':
+            break
+        pos += 1
+    raise ValueError(f"line {_line(source, pos)}: unterminated regex literal")
+
+
+def _scan_template(source, pos):
+    """(raw text, end) of a template chunk starting at pos; end is past ` or ${"""
+    start = pos
+    while pos < len(source):
+        c = source[pos]
+        if c == '\\':
+            pos += 2
+            continue
+        if c == '`':
+            return source[start:pos], pos + 1
+        if c == '$' and source.startswith('${', pos):
+            return source[start:pos], pos + 2
+        pos += 1
+    raise ValueError(f"line {_line(source, start)}: unterminated template literal")
+
+
+def tokenize(source):
+    """Tokens for source in one pass; raises ValueError on unbalanced brackets"""
+    kinds, texts, match, parts = [], [], {}, {}
+    # prev[i] for every token; next is filled in a run at a time as each significant token arrives
+    prev, next = [], []
+    candidates = set()
+    # ('bracket', opener index) or ('template', head index) for each open ${
+    stack = []
+    last = -1  # last significant token
+    pos = 0
+    size = len(source)
+    simple = SIMPLE_RE.match
+
+    while pos < size:
+        c = source[pos]
+        if c == '`':
+            raw, end = _scan_template(source, pos + 1)
+            kind, text = TEMPLATE_HEAD, raw
+        elif c == '}' and stack and stack[-1][0] == 'template':
+            raw, end = _scan_template(source, pos + 1)
+            kind, text = TEMPLATE_PART, raw
+        elif c == '/' and source[pos + 1:pos + 2] not in ('/', '*') and not (last >= 0 and (
+                (kinds[last] == NAME and texts[last] not in REGEX_KEYWORDS)
+                or (kinds[last] == PUNCT and texts[last] in CLOSERS)
+                or kinds[last] in (STRING, REGEX, NUMBER)
+                or _closes_template(match, kinds[last], last))):
+            end = _scan_regex(source, pos)
+            kind, text = REGEX, source[pos:end]
+        else:
+            found = simple(source, pos)
+            kind = SIMPLE_KINDS[found.lastgroup]
+            text = found.group()
+            end = found.end()
+
+        index = len(kinds)
+        kinds.append(kind)
+        texts.append(text)
+        prev.append(last)
+        next.append(None)
+        if kind == WS or kind == COMMENT:
+            pos = end
+            continue
+        start = last if last >= 0 else 0
+        next[start:index] = [index] * (index - start)
+
+        if kind == PUNCT:
+            if text in OPENERS:
+                stack.append(('bracket', index))
+            elif text in CLOSERS:
+                if not stack or stack[-1][0] != 'bracket' or OPENERS[texts[stack[-1][1]]] != text:
+                    raise ValueError(f"line {_line(source, pos)}: unexpected {text}")
+                opener = stack.pop()[1]
+                match[opener] = index
+                match[index] = opener
+            elif text == '=>':
+                candidates.add(match[last] if kinds[last] == PUNCT and texts[last] == ')' else last)
+            elif text == '...':
+                if stack and stack[-1][0] == 'bracket':
+                    candidates.add(stack[-1][1])
+            elif text in '"\'':
+                raise ValueError(f"line {_line(source, pos)}: unterminated {text} literal")
+            elif text == '/' and source.startswith('*', end):
+                raise ValueError(f"line {_line(source, pos)}: unterminated comment")
+        elif kind == NAME:
+            if text == 'const' or text == 'let':
+                candidates.add(index)
+        elif kind == TEMPLATE_HEAD:
+            candidates.add(index)
+            parts[index] = []
+            if source[end - 1] == '`':
+                match[index] = index
+            else:
+                stack.append(('template', index))
+        elif kind == TEMPLATE_PART:
+            head = stack[-1][1]
+            parts[head].append(index)
+            if source[end - 1] == '`':
+                stack.pop()
+                match[head] = index
+                match[index] = head
+        last = index
+        pos = end
+
+    if stack:
+        raise ValueError(f"unclosed {'template literal' if stack[-1][0] == 'template' else texts[stack[-1][1]]}")
+    count = len(kinds)
+    start = last if last >= 0 else 0
+    next[start:] = [count] * (count - start)
+    # Sentinels so next[count] and prev[count] work
+    next.append(count)
+    prev.append(last)
+    first = 0 if count and kinds[0] not in (WS, COMMENT) else next[0]
+    return Tokens(kinds, texts, match, parts, next, prev, first, sorted(candidates))
+
+
+def _template_string(raw):
+    """Raw template text as a single-quoted ES5 string literal"""
+    out = []
+    i = 0
+    while i < len(raw):
+        c = raw[i]
+        if c == '\\' and i + 1 < len(raw):
+            following = raw[i + 1]
+            out.append(following if following in '`$' else c + following)
+            i += 2
+            continue
+        out.append({"'": "\\'", '\n': '\\n', '\r': '\\r'}.get(c, c))
+        i += 1
+    return "'" + ''.join(out) + "'"
+
+
+class _Converter:
+
+    def __init__(self, tokens):
+        self.t = tokens
+        self.refs = 0
+
+    def _skip(self, i):
+        """Index just past the group or template starting at i"""
+        t = self.t
+        if t.kinds[i] == TEMPLATE_HEAD:
+            return t.match[i] + 1
+        if t.kinds[i] == PUNCT and t.texts[i] in OPENERS:
+            return t.match[i] + 1
+        return i + 1
+
+    def _items(self, start, end):
+        """Split [start, end) at top-level commas into (first, end) ranges of significant tokens"""
+        t = self.t
+        items = []
+        i = first = t.next[start - 1] if start > 0 else t.first
+        while i < end:
+            if t.is_punct(i, ','):
+                items.append((first, self._trim(first, i)))
+                first = t.next[i]
+                i = first
+                continue
+            i = t.next[self._skip(i) - 1]
+        if first < end:
+            items.append((first, self._trim(first, end)))
+        return items
+
+    def _trim(self, start, end):
+        """end moved back over trailing whitespace and comments"""
+        while end > start and self.t.kinds[end - 1] in (WS, COMMENT):
+            end -= 1
+        return end
+
+    def _expression_end(self, start, end):
+        """End of an arrow's expression body starting at start"""
+        t = self.t
+        i = start
+        questions = 0  # ? of conditionals opened inside the body, each owed a :
+        while i < end:
+            kind, text = t.kinds[i], t.texts[i]
+            if kind == PUNCT and text in (',', ';') or kind == PUNCT and text in CLOSERS:
+                return i
+            if kind == PUNCT and text == '?':
+                if i + 1 < end and t.kinds[i + 1] == PUNCT and t.texts[i + 1] in ('?', '.'):
+                    i += 2  # ?? and ?. are not conditionals
+                    continue
+                questions += 1
+            elif kind == PUNCT and text == ':':
+                if not questions:
+                    return i  # the : of a conditional around the arrow: c ? x => 1 : 2
+                questions -= 1
+            if kind == WS and '\n' in text:
+                # Automatic semicolon: a value, a line break, then something that starts a new statement
+                before, after = t.prev[i], t.next[i]
+                if (t.ends_value(before) and after < end
+                        and (t.kinds[after] in (NAME, NUMBER, STRING) or t.kinds[after] == TEMPLATE_HEAD)):
+                    return i
+            i = self._skip(i)
+        return end
+
+    def _simple(self, start, end):
+        """True if [start, end) binds tighter than + (names, calls, member access, literals)"""
+        t = self.t
+        i = t.next[start - 1] if start > 0 else t.first
+        while i < end:
+            kind, text = t.kinds[i], t.texts[i]
+            if kind == PUNCT and text not in OPENERS and text != '.':
+                return False
+            if kind == NAME and text in KEYWORDS:
+                return False
+            i = t.next[self._skip(i) - 1]
+        return True
+
+    def _params(self, start, end):
+        """(parameter list, prologue) with array/object patterns replaced by _ref variables"""
+        t = self.t
+        names, declarations = [], []
+        for first, last in self._items(start, end):
+            if t.is_punct(first, '[') or t.is_punct(first, '{'):
+                self.refs += 1
+                ref = '_ref' if self.refs == 1 else f'_ref{self.refs}'
+                names.append(ref)
+                array = t.texts[first] == '['
+                for n, (a, b) in enumerate(self._items(first + 1, t.match[first])):
+                    if b - a == 1 and t.kinds[a] == NAME:
+                        declarations.append(f"{t.texts[a]} = {ref}[{n}]" if array else f"{t.texts[a]} = {ref}.{t.texts[a]}")
+                    elif b > a:
+                        raise ValueError(f"unsupported destructuring pattern {''.join(t.texts[first:t.match[first] + 1])}")
+            else:
+                names.append(''.join(t.texts[first:last]))
+        prologue = f" var {', '.join(declarations)};" if declarations else ''
+        return ', '.join(names), prologue
+
+    def arrow(self, params_start, params_end, arrow, end):
+        """Convert an arrow function; returns (text, index after it)"""
+        t = self.t
+        params, prologue = self._params(params_start, params_end)
+        body = t.next[arrow]
+        if t.is_punct(body, '{'):
+            close = t.match[body]
+            return f"function({params}) {{{prologue}{self.convert(body + 1, close)}}}", close + 1
+        body_end = self._trim(body, self._expression_end(body, end))
+        return f"function({params}) {{{prologue} return {self.convert(body, body_end)}; }}", body_end
+
+    def template(self, head):
+        """Convert a template literal; returns (text, index after it)"""
+        t = self.t
+        pieces = [_template_string(t.texts[head])]
+        start = head + 1
+        for part in t.parts[head]:
+            expression = self.convert(start, part).strip()
+            pieces.append(expression if self._simple(start, part) else f"({expression})")
+            if t.texts[part]:
+                pieces.append(_template_string(t.texts[part]))
+            start = part + 1
+        return ' + '.join(pieces), t.match[head] + 1
+
+    def spread_call(self, open_paren):
+        """f(...x) -> f.apply(null, x) (a.f(...x) -> a.f.apply(a, x)) when x is the only argument, else None"""
+        t = self.t
+        close = t.match[open_paren]
+        items = self._items(open_paren + 1, close)
+        if len(items) != 1 or not t.is_punct(items[0][0], '...'):
+            return None
+        if t.is_punct(t.next[close], '{'):
+            return None  # function f(...rest) { }: a rest parameter, not a call
+        # Callee must be a plain member chain: a, a.b, a.b.c
+        chain = []
+        i = t.prev[open_paren]
+        while True:
+            if i < 0 or t.kinds[i] != NAME:
+                return None
+            chain.insert(0, t.texts[i])
+            dot = t.prev[i]
+            if not t.is_punct(dot, '.'):
+                break
+            i = t.prev[dot]
+        if dot >= 0 and t.kinds[dot] == NAME and t.texts[dot] == 'new':
+            return None
+        this = '.'.join(chain[:-1]) or 'null'
+        argument = self.convert(t.next[items[0][0]], items[0][1])
+        return f".apply({this}, {argument})"
+
+    def spread_array(self, open_bracket):
+        """[a, ...b] -> [].concat([a], b), or None without a spread"""
+        t = self.t
+        items = self._items(open_bracket + 1, t.match[open_bracket])
+        if not any(t.is_punct(first, '...') for first, last in items):
+            return None
+        parts, plain = [], []
+        for first, last in items:
+            if t.is_punct(first, '...'):
+                if plain:
+                    parts.append('[' + ', '.join(plain) + ']')
+                    plain = []
+                parts.append(self.convert(t.next[first], last))
+            else:
+                plain.append(self.convert(first, last))
+        if plain:
+            parts.append('[' + ', '.join(plain) + ']')
+        return '[].concat(' + ', '.join(parts) + ')'
+
+    def convert(self, start, end):
+        t = self.t
+        kinds, texts, candidates = t.kinds, t.texts, t.candidates
+        out = []
+        i = start
+        k = bisect_left(candidates, start)
+        while i < end:
+            # Copy everything up to the next token that might need rewriting
+            while k < len(candidates) and candidates[k] < i:
+                k += 1
+            stop = min(candidates[k], end) if k < len(candidates) else end
+            if stop > i:
+                out.append(''.join(texts[i:stop]))
+                i = stop
+                continue
+
+            kind, text = kinds[i], texts[i]
+            if kind == TEMPLATE_HEAD:
+                text, i = self.template(i)
+                out.append(text)
+                continue
+
+            if kind == NAME:
+                following = t.next[i]
+                if t.is_punct(following, '=>') and following < end:
+                    text, i = self.arrow(i, i + 1, following, end)
+                    out.append(text)
+                    continue
+                if text in ('const', 'let') and not t.is_punct(t.prev[i], '.') and following < len(t) and (
+                        kinds[following] == NAME or t.is_punct(following, '[') or t.is_punct(following, '{')):
+                    out.append('var')
+                    i += 1
+                    continue
+
+            elif kind == PUNCT and text == '(':
+                close = t.match[i]
+                arrow = t.next[close]
+                if t.is_punct(arrow, '=>') and arrow < end:
+                    text, i = self.arrow(i + 1, close, arrow, end)
+                    out.append(text)
+                    continue
+                if t.ends_value(t.prev[i]):
+                    spread = self.spread_call(i)
+                    if spread is not None:
+                        out.append(spread)
+                        i = close + 1
+                        continue
+
+            elif kind == PUNCT and text == '[' and not t.ends_value(t.prev[i]):
+                spread = self.spread_array(i)
+                if spread is not None:
+                    out.append(spread)
+                    i = t.match[i] + 1
+                    continue
+
+            out.append(text)
+            i += 1
+        return ''.join(out)
+
+
+def to_es5(source):
+    """ES5 version of a script (see module docstring); raises ValueError on unparseable input"""
+    tokens = tokenize(source)
+    return _Converter(tokens).convert(0, len(tokens))
+
+
+def unconverted(source):
+    """[(line, construct)] for ES6 syntax to_es5 leaves behind"""
+    tokens = tokenize(source)
+    found = []
+    line = 1
+    for i, (kind, text) in enumerate(zip(tokens.kinds, tokens.texts)):
+        if kind == PUNCT and text in ('=>', '...'):
+            found.append((line, 'arrow function' if text == '=>' else 'spread'))
+        elif kind == TEMPLATE_HEAD:
+            found.append((line, 'template literal'))
+        elif kind == NAME and text in ('const', 'let', 'class') and not tokens.is_punct(tokens.prev[i], '.'):
+            following = tokens.next[i]
+            if text == 'class' or tokens.is_punct(following, '[') or tokens.is_punct(following, '{') or (
+                    following < len(tokens) and tokens.kinds[following] == NAME):
+                found.append((line, text))
+        elif kind == NAME and text == 'var' and (tokens.is_punct(tokens.next[i], '[') or tokens.is_punct(tokens.next[i], '{')):
+            found.append((line, 'destructuring'))
+        line += text.count('\n')
+    return found
@@ -0,0 +1,182 @@
+"""
+Per-state geometry for the state map
+
+Works on the Subpaths from PathGeometry.subpaths (integer grid of
+10**-precision viewBox units). Rings follow the even-odd rule: a ring
+inside an odd number of the state's other rings is a hole.
+
+state_geometry() gives the bounding box, area-weighted centroid, area and
+pole of inaccessibility (the interior point furthest from any edge, where a
+label or tooltip anchor fits best). The centroid of a C-shaped or
+multi-part state can fall outside it; the pole never does.
+"""
+
+import heapq
+import math
+
+from path_geometry import PathGeometry, point_in_ring
+
+# Pole of inaccessibility search stops once a cell can't beat the best
+# point by more than this many viewBox units
+LABEL_PRECISION = 0.5
+
+
+def ring_area(points):
+    """Signed shoelace area of a ring (positive when counter-clockwise in y-up)"""
+    total = 0
+    n = len(points)
+    for i in range(n):
+        x1, y1 = points[i - 1]
+        x2, y2 = points[i]
+        total += x1 * y2 - x2 * y1
+    return total / 2
+
+
+def ring_centroid(points, area):
+    """Centroid of a ring with the given signed area"""
+    cx = cy = 0
+    n = len(points)
+    for i in range(n):
+        x1, y1 = points[i - 1]
+        x2, y2 = points[i]
+        cross = x1 * y2 - x2 * y1
+        cx += (x1 + x2) * cross
+        cy += (y1 + y2) * cross
+    return cx / (6 * area), cy / (6 * area)
+
+
+def _segment_distance_sq(x, y, a, b):
+    ax, ay = a
+    dx, dy = b[0] - ax, b[1] - ay
+    if dx or dy:
+        t = ((x - ax) * dx + (y - ay) * dy) / (dx * dx + dy * dy)
+        if t > 1:
+            ax, ay = b
+        elif t > 0:
+            ax += dx * t
+            ay += dy * t
+    return (x - ax) ** 2 + (y - ay) ** 2
+
+
+def _signed_distance(x, y, rings):
+    """Distance to the nearest edge, negative outside the polygon"""
+    inside = False
+    best = math.inf
+    for points in rings:
+        if point_in_ring(x, y, points):
+            inside = not inside
+        for i in range(len(points)):
+            best = min(best, _segment_distance_sq(x, y, points[i - 1], points[i]))
+    distance = math.sqrt(best)
+    return distance if inside else -distance
+
+
+def pole_of_inaccessibility(rings, precision):
+    """Interior point furthest from every edge of a polygon (outer ring + holes)
+
+    Quadtree search as in Mapbox's polylabel: cells are expanded best-first
+    by the distance they could possibly reach.
+    """
+    outer = rings[0]
+    xs = [x for x, y in outer]
+    ys = [y for x, y in outer]
+    min_x, min_y, max_x, max_y = min(xs), min(ys), max(xs), max(ys)
+    cell_size = min(max_x - min_x, max_y - min_y)
+    if cell_size == 0:
+        return float(min_x), float(min_y)
+
+    def cell(x, y, half):
+        distance = _signed_distance(x, y, rings)
+        # (-potential, distance, x, y, half) so heapq pops the most promising cell
+        return (-(distance + half * math.sqrt(2)), distance, x, y, half)
+
+    queue = []
+    half = cell_size / 2
+    x = min_x
+    while x < max_x:
+        y = min_y
+        while y < max_y:
+            heapq.heappush(queue, cell(x + half, y + half, half))
+            y += cell_size
+        x += cell_size
+
+    # Start from the centroid, or the bbox centre if that scores better
+    area = ring_area(outer)
+    best = cell(*ring_centroid(outer, area), 0) if area else cell(min_x, min_y, 0)
+    centre = cell((min_x + max_x) / 2, (min_y + max_y) / 2, 0)
+    if centre[1] > best[1]:
+        best = centre
+
+    while queue:
+        potential, distance, x, y, half = heapq.heappop(queue)
+        if distance > best[1]:
+            best = (potential, distance, x, y, half)
+        if -potential - best[1] <= precision:
+            continue
+        half /= 2
+        for dx in (-half, half):
+            for dy in (-half, half):
+                heapq.heappush(queue, cell(x + dx, y + dy, half))
+    return best[2], best[3]
+
+
+def _classify_rings(subpaths):
+    """[(points, signed area, is_hole)] for every ring of a state"""
+    rings = [subpath.points for subpath in subpaths if len(subpath.points) >= 3]
+    classified = []
+    for i, points in enumerate(rings):
+        x, y = points[0]
+        depth = sum(1 for j, other in enumerate(rings) if j != i and point_in_ring(x, y, other))
+        classified.append((points, ring_area(points), depth % 2 == 1))
+    return classified
+
+
+def state_geometry(subpaths, precision):
+    """{'bbox', 'centroid', 'area', 'label'} in viewBox units for one state
+
+    bbox is [x, y, width, height]; label is the pole of inaccessibility of
+    the largest part.
+    """
+    scale = 10 ** precision
+    rings = _classify_rings(subpaths)
+    if not rings:
+        return None
+
+    geometry = PathGeometry.from_subpaths([subpath for subpath in subpaths if len(subpath.points) >= 3], precision)
+    min_x, min_y, max_x, max_y = geometry.bbox()
+
+    total = cx = cy = 0
+    for points, area, hole in rings:
+        if not area:
+            continue
+        weight = -abs(area) if hole else abs(area)
+        x, y = ring_centroid(points, area)
+        total += weight
+        cx += x * weight
+        cy += y * weight
+
+    # Label goes in the largest part, holes inside it included
+    outer, outer_area, hole = max((ring for ring in rings if not ring[2]), key=lambda ring: abs(ring[1]))
+    polygon = [outer] + [points for points, area, hole in rings
+                         if hole and point_in_ring(points[0][0], points[0][1], outer)]
+    label = pole_of_inaccessibility(polygon, LABEL_PRECISION * scale)
+
+    def units(value):
+        return round(value / scale, 1)
+
+    return {
+        'bbox': [round(min_x, 1), round(min_y, 1), round(max_x - min_x, 1), round(max_y - min_y, 1)],
+        'centroid': [units(cx / total), units(cy / total)],
+        'area': round(geometry.area()),
+        'label': [units(label[0]), units(label[1])],
+    }
+
+
+def geometry_index(shapes, precision):
+    """{state: state_geometry()} for every state with at least one ring"""
+    index = {}
+    for state in sorted(shapes):
+        geometry = state_geometry(shapes[state], precision)
+        if geometry:
+            index[state] = geometry
+    return index
@@ -0,0 +1,290 @@
+"""
+Shared-border topology for the state map
+
+Neighbouring states in US_Map.svg trace their common border through exactly
+the same vertices. build_arcs() cuts every state ring at the points where
+the set of neighbours changes (junctions), so each stretch of border becomes
+one arc referenced by both states, the same idea as TopoJSON. Anything done
+to an arc, such as simplification, happens once and both states see the
+identical result, so no gaps or overlaps open up between them.
+
+Arc references follow TopoJSON: i is arc i as stored, ~i is arc i reversed.
+
+encode_topology() stores each arc once, delta-encoded on the integer grid
+as a string of integers in path-data style (a minus sign doubles as the
+separator, which JSON number arrays can't do):
+
+    {"scale": 10,                          grid units per viewBox unit
+     "arcs": ["x0 y0 dx1 dy1 ...", ...],
+     "states": {"AL": [[0, ~3, 5], ...]},   closed rings as arc references
+     "lines": {"XX": [[7]]}}                open subpaths, if any
+
+map-interactive.js (decodeTopology) turns it back into one d per state.
+"""
+
+import re
+
+from path_geometry import DEFAULT_PRECISION, PathGeometry, Subpath
+from svg_path import simplify_points
+
+STATE_PATH_RE = re.compile(r'<path\b[^>]*\sid="state-([A-Z]{2})"[^>]*>')
+D_RE = re.compile(r'\sd="([^"]*)"')
+ARC_NUMBER_RE = re.compile(r'-?\d+')
+
+
+def load_shapes(markup, precision=DEFAULT_PRECISION):
+    """{state code: [Subpath, ...]} for every <path id="state-XX"> in markup"""
+    shapes = {}
+    for match in STATE_PATH_RE.finditer(markup):
+        d = D_RE.search(match.group(0))
+        if d:
+            shapes[match.group(1)] = PathGeometry.from_d(d.group(1)).subpaths(precision)
+    return shapes
+
+
+def _ring_points(subpath):
+    """Points without a repeated closing point"""
+    points = list(subpath.points)
+    if subpath.closed and len(points) > 1 and points[-1] == points[0]:
+        points.pop()
+    return points
+
+
+def find_junctions(shapes):
+    """Points where a border starts, ends or changes which states share it"""
+    neighbours = {}
+    junctions = set()
+    for subpaths in shapes.values():
+        for subpath in subpaths:
+            points = _ring_points(subpath)
+            n = len(points)
+            if not subpath.closed:
+                junctions.update((points[0], points[-1]))
+            for i, point in enumerate(points):
+                if subpath.closed:
+                    pair = frozenset((points[i - 1], points[(i + 1) % n]))
+                elif 0 < i < n - 1:
+                    pair = frozenset((points[i - 1], points[i + 1]))
+                else:
+                    continue
+                seen = neighbours.setdefault(point, pair)
+                if seen != pair:
+                    junctions.add(point)
+    return junctions
+
+
+def _canonical_loop(points):
+    """Rotate/reverse a junction-free ring to a canonical form
+
+    Returns (points, reversed) so two states sharing the whole ring (an
+    enclave) map it to the same arc.
+    """
+    def rotated(ring):
+        start = ring.index(min(ring))
+        return ring[start:] + ring[:start]
+
+    forward = rotated(points)
+    backward = rotated(points[::-1])
+    return (forward, False) if forward <= backward else (backward, True)
+
+
+def build_arcs(shapes):
+    """Split every ring into shared arcs
+
+    Returns (arcs, rings): arcs is a list of point lists, rings maps each
+    state to a list of (arc references, closed) per subpath.
+    """
+    junctions = find_junctions(shapes)
+    arcs = []
+    index = {}
+
+    def reference(points):
+        key = tuple(points)
+        if key in index:
+            return index[key]
+        reverse_key = key[::-1]
+        if reverse_key in index:
+            return ~index[reverse_key]
+        index[key] = len(arcs)
+        arcs.append(list(points))
+        return index[key]
+
+    rings = {}
+    for state, subpaths in shapes.items():
+        state_rings = []
+        for subpath in subpaths:
+            points = _ring_points(subpath)
+            if not points:
+                continue
+            if subpath.closed:
+                cuts = [i for i, point in enumerate(points) if point in junctions]
+                if not cuts:
+                    loop, reversed_ = _canonical_loop(points)
+                    ref = reference(loop + loop[:1])
+                    state_rings.append(([~ref if reversed_ else ref], True))
+                    continue
+                # Start at the first junction and walk round back to it
+                points = points[cuts[0]:] + points[:cuts[0]]
+                cuts = [i - cuts[0] for i in cuts] + [len(points)]
+                points = points + points[:1]
+            else:
+                cuts = [0] + [i for i, point in enumerate(points[1:-1], 1) if point in junctions] + [len(points) - 1]
+            refs = [reference(points[a:b + 1]) for a, b in zip(cuts, cuts[1:])]
+            state_rings.append((refs, subpath.closed))
+        rings[state] = state_rings
+    return arcs, rings
+
+
+def _douglas_peucker(points, tolerance):
+    """Keep the endpoints and every point further than tolerance from the chord"""
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    tolerance_sq = tolerance * tolerance
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first]
+        bx, by = points[last]
+        dx, dy = bx - ax, by - ay
+        length_sq = dx * dx + dy * dy
+        worst, worst_distance = None, tolerance_sq
+        for i in range(first + 1, last):
+            px, py = points[i]
+            if length_sq:
+                cross = (px - ax) * dy - (py - ay) * dx
+                distance = cross * cross / length_sq
+            else:
+                distance = (px - ax) ** 2 + (py - ay) ** 2
+            if distance > worst_distance:
+                worst, worst_distance = i, distance
+        if worst is not None:
+            keep[worst] = True
+            stack.append((first, worst))
+            stack.append((worst, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def simplify_arc(points, tolerance):
+    """Douglas-Peucker simplification of one arc, endpoints fixed
+
+    Closed arcs (first point == last) are split at their farthest point so
+    they never collapse below a triangle.
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+    if points[0] != points[-1]:
+        return _douglas_peucker(points, tolerance)
+
+    sx, sy = points[0]
+    far = max(range(len(points)), key=lambda i: (points[i][0] - sx) ** 2 + (points[i][1] - sy) ** 2)
+    first = _douglas_peucker(points[:far + 1], tolerance)
+    second = _douglas_peucker(points[far:], tolerance)
+    loop = first + second[1:]
+    if len(loop) < 4 and len(points) >= 4:
+        # Keep a triangle: add the point furthest from the start-far chord
+        middle = max((i for i in range(1, len(points) - 1) if i != far),
+                     key=lambda i: abs((points[i][0] - sx) * (points[far][1] - sy)
+                                       - (points[i][1] - sy) * (points[far][0] - sx)))
+        loop = [points[i] for i in sorted({0, middle, far, len(points) - 1})]
+    return loop
+
+
+def assemble(rings, arcs):
+    """Rebuild {state: [Subpath]} from arc references"""
+    shapes = {}
+    for state, state_rings in rings.items():
+        subpaths = []
+        for refs, closed in state_rings:
+            points = []
+            for ref in refs:
+                arc = arcs[~ref][::-1] if ref < 0 else arcs[ref]
+                points.extend(arc if not points else arc[1:])
+            if closed and len(points) > 1 and points[-1] == points[0]:
+                points.pop()
+            if closed and len(points) < 3:
+                # Island smaller than the tolerance
+                continue
+            subpaths.append(Subpath(points, closed))
+        shapes[state] = subpaths
+    return shapes
+
+
+def simplify_shapes(shapes, tolerance):
+    """Simplify every state with shared borders kept identical
+
+    tolerance is in grid units (see PathGeometry.subpaths).
+    """
+    arcs, rings = build_arcs(shapes)
+    return assemble(rings, [simplify_arc(arc, tolerance) for arc in arcs])
+
+
+def vertex_count(shapes):
+    return sum(len(subpath.points) for subpaths in shapes.values() for subpath in subpaths)
+
+
+def _ring_length(refs, arcs):
+    """Distinct points in a ring built from arc references"""
+    return sum(len(arcs[ref if ref >= 0 else ~ref]) - 1 for ref in refs) + 1
+
+
+def encode_topology(shapes, tolerance=0, precision=DEFAULT_PRECISION):
+    """Shared-arc encoding of every state, simplified to tolerance grid units"""
+    arcs, rings = build_arcs(shapes)
+    arcs = [simplify_points(simplify_arc(arc, tolerance), False) for arc in arcs]
+
+    # Drop islands that collapsed, then renumber the arcs still in use
+    kept = {}
+    for state, state_rings in rings.items():
+        kept[state] = [(refs, closed) for refs, closed in state_rings
+                       if not closed or _ring_length(refs, arcs) > 3]
+    order = {}
+    for state_rings in kept.values():
+        for refs, closed in state_rings:
+            for ref in refs:
+                order.setdefault(ref if ref >= 0 else ~ref, len(order))
+
+    def renumber(ref):
+        return order[ref] if ref >= 0 else ~order[~ref]
+
+    encoded_arcs = [None] * len(order)
+    for old, new in order.items():
+        text = []
+        px = py = 0
+        for x, y in arcs[old]:
+            for delta in (x - px, y - py):
+                if text and delta >= 0:
+                    text.append(' ')
+                text.append(str(delta))
+            px, py = x, y
+        encoded_arcs[new] = ''.join(text)
+
+    states, lines = {}, {}
+    for state, state_rings in kept.items():
+        for refs, closed in state_rings:
+            target = states if closed else lines
+            target.setdefault(state, []).append([renumber(ref) for ref in refs])
+
+    topology = {'scale': 10 ** precision, 'arcs': encoded_arcs, 'states': states}
+    if lines:
+        topology['lines'] = lines
+    return topology
+
+
+def decode_topology(topology):
+    """{state: [Subpath]} from encode_topology() output"""
+    arcs = []
+    for text in topology['arcs']:
+        flat = [int(number) for number in ARC_NUMBER_RE.findall(text)]
+        points = []
+        x = y = 0
+        for i in range(0, len(flat), 2):
+            x += flat[i]
+            y += flat[i + 1]
+            points.append((x, y))
+        arcs.append(points)
+
+    rings = {}
+    for key, closed in (('states', True), ('lines', False)):
+        for state, state_rings in topology.get(key, {}).items():
+            rings.setdefault(state, []).extend((refs, closed) for refs in state_rings)
+    return assemble(rings, arcs)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Debug and production builds of the generated pages
+
+The debug profile ships a page as generated: indented CSS, comments,
+console.log and debug() tracing. The production profile is what goes
+into a Custom HTML block, which the browser parses on every page view:
+
+    CSS     comments dropped, whitespace collapsed
+    JS      tokenized with js_es5, comments dropped, whitespace collapsed
+            (line breaks kept where a statement may rely on them);
+            console.log/info/debug/trace calls and debug()/debugLog()
+            calls removed, and the debug()/debugLog() helpers too once
+            nothing calls them. console.error/warn stay.
+    HTML    comments dropped (except the COPY EVERYTHING markers),
+            whitespace runs outside <pre>/<textarea> collapsed, the
+            #debug-console panel removed
+    SVG     path data minified at the precision each path is written
+            with (svg_path), so no coordinate is rounded
+
+A script js_es5 cannot tokenize, or path data svg_path cannot parse, is
+left as it is and reported.
+
+Usage:
+    python3 minify_html.py                           # wordpress-*.html and final-*.html
+    python3 minify_html.py final-gc.html -o dist     # just this page
+    python3 minify_html.py --profile debug           # copy through unchanged
+"""
+
+import re
+import glob
+import argparse
+from pathlib import Path
+
+from js_es5 import tokenize, WS, COMMENT, STRING, REGEX, NUMBER, NAME, PUNCT, TEMPLATE_HEAD, TEMPLATE_PART
+from svg_path import minify_markup
+
+PROFILES = ('debug', 'production')
+DEFAULT_FILES = ['wordpress-*.html', 'final-*.html']
+OUTPUT_DIR = Path('build/production')
+
+# console.<method>(...) calls removed in production; error and warn are kept
+LOG_METHODS = {'log', 'info', 'debug', 'trace', 'dir', 'table', 'time', 'timeEnd',
+               'group', 'groupCollapsed', 'groupEnd', 'count'}
+# Page-level tracing helpers (wordpress-final-working.html, the debug pages)
+DEBUG_FUNCTIONS = {'debug', 'debugLog'}
+
+BLOCK_RE = re.compile(r'(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2>)', re.DOTALL | re.IGNORECASE)
+HTML_COMMENT_RE = re.compile(r'<!--(.*?)-->', re.DOTALL)
+KEEP_COMMENT_RE = re.compile(r'\s*(=+|COPY EVERYTHING .*)\s*$', re.DOTALL)
+DEBUG_PANEL_RE = re.compile(r'<div id="debug-console"[^>]*>\s*</div>')
+DEBUG_PANEL_CSS_RE = re.compile(r'#debug-console\s*\{[^}]*\}')
+CSS_STRING = r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\''
+CSS_COMMENT_RE = re.compile(rf'({CSS_STRING})|/\*.*?\*/', re.DOTALL)
+CSS_STRING_RE = re.compile(rf'({CSS_STRING})', re.DOTALL)
+WORD_CHARS = set('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$\\')
+
+# Statement starts after which a removed call needs no stand-in
+STATEMENT_STARTS = {';', '{', '}'}
+
+
+# ----------------------------------------------------------------------
+# CSS
+
+def minify_css(css):
+    """CSS without comments or optional whitespace (strings untouched)"""
+    css = CSS_COMMENT_RE.sub(lambda m: m.group(1) or '', css)
+    pieces = CSS_STRING_RE.split(css)
+    for n in range(0, len(pieces), 2):
+        text = re.sub(r'\s+', ' ', pieces[n])
+        text = re.sub(r' ?([{};,>]) ?', r'\1', text)
+        pieces[n] = re.sub(r': ', ':', text)
+    return re.sub(r';}', '}', ''.join(pieces)).strip()
+
+
+# ----------------------------------------------------------------------
+# JS
+
+def _source(tokens, i):
+    """Token i as it appeared in the source (template tokens are stored without delimiters)"""
+    kind, text = tokens.kinds[i], tokens.texts[i]
+    if kind == TEMPLATE_HEAD:
+        closed = tokens.match[i] == i
+        return '`' + text + ('`' if closed else '${')
+    if kind == TEMPLATE_PART:
+        closed = tokens.match[i] != i and tokens.kinds[tokens.match[i]] == TEMPLATE_HEAD
+        return '}' + text + ('`' if closed else '${')
+    return text
+
+
+def _logging_call(tokens, i):
+    """Index of the ( of a logging call starting at token i, or None"""
+    kinds, texts = tokens.kinds, tokens.texts
+    if kinds[i] != NAME or tokens.is_punct(tokens.prev[i], '.'):
+        return None
+    before = tokens.prev[i]
+    if before >= 0 and kinds[before] == NAME and texts[before] == 'function':
+        return None
+    if texts[i] == 'console':
+        dot = tokens.next[i]
+        method = tokens.next[dot]
+        paren = tokens.next[method] if method < len(tokens) else method
+        if (tokens.is_punct(dot, '.') and kinds[method] == NAME and texts[method] in LOG_METHODS
+                and tokens.is_punct(paren, '(')):
+            return paren
+    elif texts[i] in DEBUG_FUNCTIONS and tokens.is_punct(tokens.next[i], '('):
+        return tokens.next[i]
+    return None
+
+
+def _debug_declarations(tokens, removed):
+    """{name: (start, end)} for debug helper declarations nothing calls any more"""
+    kinds, texts = tokens.kinds, tokens.texts
+    declared, used = {}, set()
+    for i, (kind, text) in enumerate(zip(kinds, texts)):
+        if kind != NAME or text not in DEBUG_FUNCTIONS or removed[i]:
+            continue
+        before = tokens.prev[i]
+        if before >= 0 and kinds[before] == NAME and texts[before] == 'function':
+            outer = tokens.prev[before]
+            paren = tokens.next[i]
+            if (outer < 0 or texts[outer] in STATEMENT_STARTS) and tokens.is_punct(paren, '('):
+                body = tokens.next[tokens.match[paren]]
+                if tokens.is_punct(body, '{'):
+                    declared[text] = (before, tokens.match[body] + 1)
+                    continue
+        if not tokens.is_punct(before, '.'):
+            used.add(text)
+    return {name: span for name, span in declared.items() if name not in used}
+
+
+def _strip_logging(tokens):
+    """[(start, end, replacement tokens)] removing logging calls and unused debug helpers"""
+    edits = []
+    removed = [False] * len(tokens)
+    i = tokens.first
+    while i < len(tokens):
+        paren = _logging_call(tokens, i)
+        if paren is None:
+            i = tokens.next[i]
+            continue
+        end = tokens.match[paren] + 1
+        before = tokens.prev[i]
+        if before < 0 or tokens.texts[before] in STATEMENT_STARTS:
+            replacement = []
+        elif tokens.is_punct(before, ')') or (tokens.kinds[before] == NAME and tokens.texts[before] in ('else', 'do')):
+            # if (...) console.log(x);  ->  if (...);
+            replacement = [(PUNCT, ';')]
+        else:
+            # used as a value: a && console.log(x)  ->  a && void 0
+            replacement = [(NAME, 'void'), (NUMBER, '0')]
+        if not replacement or replacement[0][1] == ';':
+            after = tokens.next[end - 1]
+            if tokens.is_punct(after, ';'):
+                end = after + 1
+        edits.append((i, end, replacement))
+        removed[i:end] = [True] * (end - i)
+        i = tokens.next[end - 1]
+
+    for start, end in _debug_declarations(tokens, removed).values():
+        edits.append((start, end, []))
+    return sorted(edits)
+
+
+def _ends_statement(kind, text):
+    return (kind in (NAME, NUMBER, STRING, REGEX) or text in (')', ']', '}', '++', '--')
+            or (kind in (TEMPLATE_HEAD, TEMPLATE_PART) and text.endswith('`')))
+
+
+def _starts_statement(kind, text):
+    return kind in (NAME, NUMBER, STRING, REGEX, TEMPLATE_HEAD) or text in ('(', '[', '{', '++', '--', '!', '~', '+', '-')
+
+
+def _needs_space(left_kind, left, right):
+    a, b = left[-1], right[0]
+    return ((a in WORD_CHARS or left_kind == REGEX) and b in WORD_CHARS
+            or (a in '+-' and a == b)
+            or (a == '/' and b in '/*')
+            or (a.isdigit() and b == '.'))
+
+
+def minify_js(source, strip_logging=True):
+    """Script without comments, optional whitespace or (optionally) logging calls
+
+    Raises ValueError if js_es5 cannot tokenize the script.
+    """
+    tokens = tokenize(source)
+    edits = _strip_logging(tokens) if strip_logging else []
+
+    # Significant tokens in output order, each with whether a line break preceded it
+    stream = []
+    newline = False
+    i = 0
+    edit = 0
+    while i < len(tokens):
+        # Calls inside a removed debug helper go with it
+        while edit < len(edits) and edits[edit][0] < i:
+            edit += 1
+        if edit < len(edits) and edits[edit][0] == i:
+            start, end, replacement = edits[edit]
+            stream.extend((kind, text, newline and n == 0) for n, (kind, text) in enumerate(replacement))
+            newline = newline and not replacement
+            edit += 1
+            i = end
+            continue
+        kind = tokens.kinds[i]
+        if kind in (WS, COMMENT):
+            newline = newline or '\n' in tokens.texts[i]
+        else:
+            stream.append((kind, _source(tokens, i), newline))
+            newline = False
+        i += 1
+
+    out = []
+    last_kind, last = None, None
+    for kind, text, newline in stream:
+        if last is not None:
+            if newline and _ends_statement(last_kind, last) and _starts_statement(kind, text):
+                out.append('\n')
+            elif _needs_space(last_kind, last, text):
+                out.append(' ')
+        out.append(text)
+        last_kind, last = kind, text
+    return ''.join(out)
+
+
+# ----------------------------------------------------------------------
+# Pages
+
+def _minify_text(html):
+    """Markup outside <script>/<style>/<pre>/<textarea>: comments and whitespace"""
+    html = HTML_COMMENT_RE.sub(lambda m: m.group(0) if KEEP_COMMENT_RE.match(m.group(1)) else '', html)
+    html = DEBUG_PANEL_RE.sub('', html)
+    return re.sub(r'\s+', lambda m: '\n' if '\n' in m.group(0) else ' ', html)
+
+
+def minify_page(content, profile='production'):
+    """(page, [warnings]) for a profile; debug returns the page unchanged"""
+    if profile not in PROFILES:
+        raise ValueError(f"unknown profile {profile!r} (expected one of {', '.join(PROFILES)})")
+    if profile == 'debug':
+        return content, []
+
+    warnings = []
+    try:
+        content, stats = minify_markup(content, precision=None)
+    except ValueError as e:
+        warnings.append(f"SVG paths left unminified: {e}")
+    out = []
+    pos = 0
+    script = 0
+    for match in BLOCK_RE.finditer(content):
+        out.append(_minify_text(content[pos:match.start()]))
+        open_tag, tag, body, close_tag = match.groups()
+        tag = tag.lower()
+        if tag == 'style':
+            body = minify_css(DEBUG_PANEL_CSS_RE.sub('', body))
+        elif tag == 'script':
+            script += 1
+            if 'src=' not in open_tag and body.strip():
+                try:
+                    body = minify_js(body)
+                except ValueError as e:
+                    warnings.append(f"script {script} left unminified: {e}")
+        out.append(_minify_text(open_tag) + body + close_tag)
+        pos = match.end()
+    out.append(_minify_text(content[pos:]))
+    return ''.join(out).strip() + '\n', warnings
+
+
+def print_report(rows):
+    """Before/After/Saved table of (artifact, bytes before, bytes after)"""
+    width = max([len(name) for name, b, a in rows] + [8])
+    print(f"  {'Artifact':<{width}} {'Before':>8} {'After':>8} {'Saved':>7}")
+    for name, b, a in rows:
+        saved = 100 * (b - a) / b if b else 0
+        print(f"  {name:<{width}} {b:>8} {a:>8} {saved:>6.1f}%")
+    before = sum(b for name, b, a in rows)
+    after = sum(a for name, b, a in rows)
+    saved = 100 * (before - after) / before if before else 0
+    print(f"  {'Total':<{width}} {before:>8} {after:>8} {saved:>6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build debug or production copies of the generated pages')
+    parser.add_argument('files', nargs='*', help=f'Pages to build (default: {" ".join(DEFAULT_FILES)})')
+    parser.add_argument('--profile', choices=PROFILES, default='production',
+                        help='production minifies and strips logging; debug copies pages as they are '
+                             '(default: production)')
+    parser.add_argument('--output', '-o', default=str(OUTPUT_DIR), help=f'Output directory (default: {OUTPUT_DIR})')
+    args = parser.parse_args()
+
+    files = args.files or sorted({path for pattern in DEFAULT_FILES for path in glob.glob(pattern)})
+    if not files:
+        print("✗ No pages to build")
+        return
+
+    rows = []
+    written = 0
+    for path in files:
+        with open(path, 'r') as f:
+            text = f.read()
+        page, warnings = minify_page(text, args.profile)
+        for warning in warnings:
+            print(f"⚠ {path}: {warning}")
+
+        output = Path(args.output) / Path(path).name
+        rows.append((Path(path).name, len(text.encode()), len(page.encode())))
+        if output.exists() and output.read_text() == page:
+            continue
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(page)
+        written += 1
+
+    print(f"{args.profile} build of {len(files)} pages:")
+    print_report(rows)
+    print(f"\n✅ {written} files written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Minify the state path data in US_Map.svg, processed-states.txt or a page
+
+Reports the bytes saved per state. Files are only rewritten with
+--in-place or --output.
+
+Usage:
+    python3 minify_paths.py processed-states.txt
+    python3 minify_paths.py --precision 0 --output map.min.svg US_Map.svg
+"""
+
+import sys
+import argparse
+
+from svg_path import DEFAULT_PRECISION, minify_markup
+
+
+def print_report(path, stats):
+    before = sum(b for label, b, a in stats)
+    after = sum(a for label, b, a in stats)
+    print(f"{path}: {len(stats)} paths")
+    print(f"  {'Path':<12} {'Before':>8} {'After':>8} {'Saved':>7}")
+    for label, b, a in sorted(stats, key=lambda s: s[1] - s[2], reverse=True):
+        saved = 100 * (b - a) / b if b else 0
+        print(f"  {label:<12} {b:>8} {a:>8} {saved:>6.1f}%")
+    saved = 100 * (before - after) / before if before else 0
+    print(f"  {'Total':<12} {before:>8} {after:>8} {saved:>6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Minify SVG path data and report savings per state')
+    parser.add_argument('files', nargs='*', default=['processed-states.txt'],
+                        help='SVG, HTML or processed-states.txt files (default: processed-states.txt)')
+    parser.add_argument('--precision', '-p', type=int, default=DEFAULT_PRECISION,
+                        help=f'Decimal places kept, in viewBox units (default: {DEFAULT_PRECISION}, '
+                             'the precision of US_Map.svg; 0 rounds to whole pixels)')
+    parser.add_argument('--in-place', action='store_true',
+                        help='Rewrite the input files')
+    parser.add_argument('--output', '-o',
+                        help='Write the minified file here (single input only)')
+    args = parser.parse_args()
+
+    if args.precision < 0:
+        parser.error('--precision must be 0 or more')
+    if args.output and len(args.files) != 1:
+        parser.error('--output takes a single input file')
+
+    for path in args.files:
+        with open(path, 'r') as f:
+            text = f.read()
+
+        try:
+            minified, stats = minify_markup(text, args.precision)
+        except ValueError as e:
+            print(f"✗ {path}: {e}")
+            sys.exit(1)
+
+        print_report(path, stats)
+
+        target = args.output or (path if args.in_place else None)
+        if target:
+            with open(target, 'w') as f:
+                f.write(minified)
+            print(f"✓ Wrote {target} ({len(text)} → {len(minified)} bytes)")
+        print()
+
+
+if __name__ == '__main__':
+    main()
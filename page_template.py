@@ -0,0 +1,216 @@
+"""
+Compile-once page templates
+
+A small subset of Jinja syntax, enough for the trade page skeleton:
+
+    {{ name }}  {{ item.key }}  {{ items.0 }}   value inserted as-is (no escaping)
+    {{ name|e }}                                HTML-escaped text or attribute value
+    {{ name|js }}                               escaped for a '...' or "..." JS string
+    {% if name %} {% if not name %} {% else %} {% endif %}
+    {% for item in name %} ... {% endfor %}
+
+A block tag alone on its line takes the whole line with it, so tags can
+sit on lines of their own without leaving blank lines in the output.
+
+compile_template() parses the text once into a flat list of instructions
+with jump targets. Template.render(context) walks that list and yields
+chunks, so a page can be written to a file as it is rendered. Templates
+are plain tuples underneath and pickle cheaply, so a compiled template
+can be handed to worker processes instead of being re-parsed in each.
+"""
+
+import re
+from html import escape
+
+TEXT, VAR, IF, JUMP, FOR, NEXT = range(6)
+
+TAG_RE = re.compile(
+    r'^[ \t]*\{%\s*(?P<line>[^%\n]*?)\s*%\}[ \t]*\n'   # block tag alone on its line
+    r'|\{%\s*(?P<block>[^%\n]*?)\s*%\}'
+    r'|\{\{\s*(?P<var>[^}\n]*?)\s*\}\}',
+    re.MULTILINE)
+PATH_RE = re.compile(r'[A-Za-z_]\w*(\.\w+)*$')
+FOR_RE = re.compile(r'for\s+([A-Za-z_]\w*)\s+in\s+(\S+)$')
+IF_RE = re.compile(r'if\s+(not\s+)?(\S+)$')
+
+# Inside a <script> a JS string must not close the string, the line or the element
+JS_STRING_ESCAPES = str.maketrans({
+    '\\': '\\\\', "'": "\\'", '"': '\\"', '\n': '\\n', '\r': '\\r',
+    '<': '\\u003C', '>': '\\u003E', '&': '\\u0026', '\u2028': '\\u2028', '\u2029': '\\u2029',
+})
+
+
+def js_string(value):
+    """value escaped for the inside of a quoted JS string in an inline script"""
+    return str(value).translate(JS_STRING_ESCAPES)
+
+
+FILTERS = {'e': escape, 'js': js_string}
+
+
+def _path(text, line):
+    if not PATH_RE.match(text):
+        raise ValueError(f"line {line}: bad name {text!r}")
+    return tuple(text.split('.'))
+
+
+def _filters(names, line):
+    try:
+        return tuple(FILTERS[name.strip()] for name in names)
+    except KeyError as e:
+        raise ValueError(f"line {line}: unknown filter {e.args[0]!r}") from None
+
+
+class Template:
+    """A compiled template; see compile_template()"""
+
+    __slots__ = ('ops', 'name')
+
+    def __init__(self, ops, name='<template>'):
+        self.ops = ops
+        self.name = name
+
+    def __getstate__(self):
+        return self.ops, self.name
+
+    def __setstate__(self, state):
+        self.ops, self.name = state
+
+    def _lookup(self, scopes, path):
+        for scope in reversed(scopes):
+            if path[0] in scope:
+                value = scope[path[0]]
+                break
+        else:
+            raise KeyError(f"{self.name}: {path[0]!r} is not defined")
+        for part in path[1:]:
+            if isinstance(value, dict):
+                value = value[part]
+            elif part.isdigit():
+                value = value[int(part)]
+            else:
+                value = getattr(value, part)
+        return value
+
+    def render(self, context):
+        """Yield the rendered text in chunks"""
+        ops = self.ops
+        scopes = [context]
+        loops = []
+        pc = 0
+        while pc < len(ops):
+            op = ops[pc]
+            kind = op[0]
+            if kind == TEXT:
+                yield op[1]
+            elif kind == VAR:
+                # op = (VAR, path, filters applied in order)
+                value = str(self._lookup(scopes, op[1]))
+                for apply in op[2]:
+                    value = apply(value)
+                yield value
+            elif kind == IF:
+                # op = (IF, path, value that skips the block, else target)
+                if bool(self._lookup(scopes, op[1])) == op[2]:
+                    pc = op[3]
+                    continue
+            elif kind == JUMP:
+                pc = op[1]
+                continue
+            elif kind == FOR:
+                # op = (FOR, path, NEXT index); the body starts after this op
+                loops.append(iter(self._lookup(scopes, op[1])))
+                scopes.append({})
+                pc = op[2]
+                continue
+            else:
+                # op = (NEXT, loop variable, body start)
+                try:
+                    scopes[-1][op[1]] = next(loops[-1])
+                except StopIteration:
+                    loops.pop()
+                    scopes.pop()
+                else:
+                    pc = op[2]
+                    continue
+            pc += 1
+
+    def render_to_string(self, context):
+        return ''.join(self.render(context))
+
+
+def compile_template(text, name='<template>'):
+    """Parse template text into a Template"""
+    ops = []
+    # (kind, index of the IF/FOR op, index of the ELSE jump, line) for open blocks
+    stack = []
+    pos = 0
+    # Adjacent text is merged into one op, but never across a jump target
+    mergeable = [False]
+
+    def text_op(chunk):
+        if not chunk:
+            return
+        if mergeable[0]:
+            ops[-1] = (TEXT, ops[-1][1] + chunk)
+        else:
+            ops.append((TEXT, chunk))
+            mergeable[0] = True
+
+    for match in TAG_RE.finditer(text):
+        text_op(text[pos:match.start()])
+        pos = match.end()
+        line = text.count('\n', 0, match.start()) + 1
+        mergeable[0] = False
+
+        if match.group('var') is not None:
+            name, *filters = match.group('var').split('|')
+            ops.append((VAR, _path(name.strip(), line), _filters(filters, line)))
+            continue
+
+        tag = match.group('line') if match.group('line') is not None else match.group('block')
+        if tag.startswith('if '):
+            found = IF_RE.match(tag)
+            if not found:
+                raise ValueError(f"{name} line {line}: bad tag {{% {tag} %}}")
+            stack.append(['if', len(ops), None, line])
+            ops.append([IF, _path(found.group(2), line), bool(found.group(1)), None])
+        elif tag == 'else':
+            if not stack or stack[-1][0] != 'if' or stack[-1][2] is not None:
+                raise ValueError(f"{name} line {line}: unexpected {{% else %}}")
+            stack[-1][2] = len(ops)
+            ops.append([JUMP, None])
+            ops[stack[-1][1]][3] = len(ops)
+        elif tag == 'endif':
+            if not stack or stack[-1][0] != 'if':
+                raise ValueError(f"{name} line {line}: unexpected {{% endif %}}")
+            kind, start, jump, opened = stack.pop()
+            if jump is None:
+                ops[start][3] = len(ops)
+            else:
+                ops[jump][1] = len(ops)
+        elif tag.startswith('for '):
+            found = FOR_RE.match(tag)
+            if not found:
+                raise ValueError(f"{name} line {line}: bad tag {{% {tag} %}}")
+            stack.append(['for', len(ops), found.group(1), line])
+            ops.append([FOR, _path(found.group(2), line), None])
+        elif tag == 'endfor':
+            if not stack or stack[-1][0] != 'for':
+                raise ValueError(f"{name} line {line}: unexpected {{% endfor %}}")
+            kind, start, variable, opened = stack.pop()
+            ops[start][2] = len(ops)
+            ops.append((NEXT, variable, start + 1))
+        else:
+            raise ValueError(f"{name} line {line}: unknown tag {{% {tag} %}}")
+
+    if stack:
+        kind, start, extra, line = stack[-1]
+        raise ValueError(f"{name} line {line}: {{% {kind} %}} is never closed")
+    text_op(text[pos:])
+    return Template([tuple(op) for op in ops], name)
+
+
+def load_template(path):
+    with open(path, 'r') as f:
+        return compile_template(f.read(), str(path))
@@ -0,0 +1,309 @@
+"""
+Array-backed geometry for SVG path data
+
+US_Map.svg (and everything copied from it) only uses straight-line
+commands: M/m, L/l, H/h, V/v and Z/z. A PathGeometry holds one path as two
+flat arrays instead of a d string:
+
+    commands  array('B') of MOVE / LINE / CLOSE codes
+    coords    x0, y0, x1, y1, ... in viewBox units, one pair per MOVE or LINE
+
+coords is a NumPy float64 array when NumPy is installed (array('d')
+otherwise), so transforms, bounding boxes and areas run over whole columns
+at a time. H/V and relative commands are resolved while parsing.
+
+This is the one path parser for the map scripts: svg_path, map_topology
+and map_geometry get their Subpaths (absolute points on an integer grid of
+10**-precision viewBox units) from subpaths().
+"""
+
+import re
+from array import array
+from collections import namedtuple
+
+from trade_dataset import np
+
+# Precision of the source map (one decimal place)
+DEFAULT_PRECISION = 1
+
+PATH_TOKEN_RE = re.compile(r'([MmLlHhVvZz])|([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)|([^\s,])')
+PATH_COMMAND_RE = re.compile(r'([MmLlHhVvZz])([^MmLlHhVvZz]*)')
+PATH_NUMBER_RE = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+
+# points: [(x, y), ...] in grid units; closed: ends with z
+Subpath = namedtuple('Subpath', ['points', 'closed'])
+
+MOVE, LINE, CLOSE = 0, 1, 2
+
+
+def _path_tokens_checked(d):
+    """path_tokens() one token at a time, raising on the first bad one"""
+    command = None
+    numbers = []
+    for match in PATH_TOKEN_RE.finditer(d):
+        letter, number, junk = match.groups()
+        if junk:
+            raise ValueError(f"Unsupported path command {junk!r} (only M, L, H, V and Z are handled)")
+        if letter:
+            if command is not None:
+                yield command, numbers
+            command, numbers = letter, []
+        else:
+            if command is None:
+                raise ValueError("Path data must start with a moveto")
+            numbers.append(float(number))
+    if command is not None:
+        yield command, numbers
+
+
+def _is_separator(text):
+    """True if text is only whitespace and commas"""
+    return not text.replace(',', ' ').strip()
+
+
+def path_tokens(d):
+    """Yield (command, [numbers]) groups from path data
+
+    Each command's numbers are matched in one findall; anything else
+    between commands falls back to _path_tokens_checked for the error.
+    """
+    groups = PATH_COMMAND_RE.findall(d)
+    first = PATH_COMMAND_RE.search(d)
+    if first is not None and not _is_separator(d[:first.start()]):
+        groups = None
+    tokens = []
+    for command, text in groups or ():
+        numbers = PATH_NUMBER_RE.findall(text)
+        # Everything but whitespace and commas must be part of a number
+        if sum(map(len, numbers)) != len(''.join(text.split()).replace(',', '')):
+            groups = None
+            break
+        tokens.append((command, list(map(float, numbers))))
+    if groups is None or (first is None and not _is_separator(d)):
+        return list(_path_tokens_checked(d))
+    return tokens
+
+
+def point_in_ring(x, y, points):
+    """Ray-casting test; points on the edge may go either way"""
+    inside = False
+    n = len(points)
+    for i in range(n):
+        x1, y1 = points[i - 1]
+        x2, y2 = points[i]
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+    return inside
+
+
+class PathGeometry:
+    """One path: command codes plus a flat coordinate column"""
+
+    __slots__ = ('commands', 'coords', 'use_numpy')
+
+    def __init__(self, commands=None, coords=None, use_numpy=None):
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+        self.commands = array('B', commands or ())
+        if self.use_numpy:
+            self.coords = np.asarray(coords if coords is not None else (), dtype=np.float64)
+        else:
+            self.coords = array('d', coords if coords is not None else ())
+
+    @classmethod
+    def from_d(cls, d, use_numpy=None):
+        """Parse M/L/H/V/Z path data (absolute or relative)"""
+        commands = array('B')
+        coords = array('d')
+        x = y = 0.0
+        start = (0.0, 0.0)
+        for command, numbers in path_tokens(d):
+            op = command.upper()
+            relative = command != op
+            if op == 'Z':
+                commands.append(CLOSE)
+                x, y = start
+                continue
+
+            # Absolute points for this command, flat x, y, x, y, ...
+            if op in 'ML':
+                if len(numbers) % 2:
+                    raise ValueError(f"Odd number of coordinates after {command}")
+                if relative:
+                    points = []
+                    for i in range(0, len(numbers), 2):
+                        x += numbers[i]
+                        y += numbers[i + 1]
+                        points += (x, y)
+                else:
+                    points = numbers
+                    if numbers:
+                        x, y = numbers[-2], numbers[-1]
+            else:
+                points = []
+                for value in numbers:
+                    if op == 'H':
+                        x = x + value if relative else value
+                    else:
+                        y = y + value if relative else value
+                    points += (x, y)
+            if not points:
+                continue
+
+            lines = len(points) // 2
+            if op == 'M':
+                commands.append(MOVE)
+                start = (points[0], points[1])
+                lines -= 1
+            elif not commands or commands[-1] == CLOSE:
+                # Drawing without a moveto (first, or after z) starts at the start point
+                commands.append(MOVE)
+                coords.extend(start)
+            commands.frombytes(bytes((LINE,)) * lines)
+            coords.extend(points)
+        return cls(commands, coords, use_numpy)
+
+    @classmethod
+    def from_subpaths(cls, subpaths, precision=DEFAULT_PRECISION, use_numpy=None):
+        """Build from Subpaths on the 10**-precision grid"""
+        scale = 10 ** precision
+        commands = array('B')
+        coords = array('d')
+        for subpath in subpaths:
+            for i, (x, y) in enumerate(subpath.points):
+                commands.append(LINE if i else MOVE)
+                coords.append(x / scale)
+                coords.append(y / scale)
+            if subpath.closed:
+                commands.append(CLOSE)
+        return cls(commands, coords, use_numpy)
+
+    def __len__(self):
+        """Number of points"""
+        return len(self.coords) // 2
+
+    def _new(self, coords):
+        geometry = PathGeometry.__new__(PathGeometry)
+        geometry.commands = self.commands
+        geometry.coords = coords
+        geometry.use_numpy = self.use_numpy
+        return geometry
+
+    def xs(self):
+        return self.coords[0::2]
+
+    def ys(self):
+        return self.coords[1::2]
+
+    def rings(self):
+        """Yield (first point, end point, closed) for each subpath"""
+        first = point = 0
+        started = False
+        for code in self.commands:
+            if code == MOVE:
+                if started:
+                    yield first, point, False
+                first = point
+                started = True
+                point += 1
+            elif code == LINE:
+                point += 1
+            elif started:
+                yield first, point, True
+                started = False
+        if started:
+            yield first, point, False
+
+    def subpaths(self, precision=DEFAULT_PRECISION):
+        """Subpaths on the 10**-precision integer grid
+
+        Coordinates round half to even, the same way round() does.
+        """
+        scale = 10 ** precision
+        if self.use_numpy:
+            grid = np.rint(self.coords * scale).astype(np.int64).tolist()
+        else:
+            grid = [round(value * scale) for value in self.coords]
+        return [Subpath(list(zip(grid[2 * first:2 * end:2], grid[2 * first + 1:2 * end:2])), closed)
+                for first, end, closed in self.rings()]
+
+    def transform(self, a, b, c, d, e, f):
+        """Affine transform, same argument order as SVG matrix(a b c d e f)"""
+        xs, ys = self.xs(), self.ys()
+        if self.use_numpy:
+            coords = np.empty_like(self.coords)
+            coords[0::2] = a * xs + c * ys + e
+            coords[1::2] = b * xs + d * ys + f
+        else:
+            coords = array('d', bytes(8 * len(self.coords)))
+            coords[0::2] = array('d', [a * x + c * y + e for x, y in zip(xs, ys)])
+            coords[1::2] = array('d', [b * x + d * y + f for x, y in zip(xs, ys)])
+        return self._new(coords)
+
+    def scale(self, sx, sy=None):
+        return self.transform(sx, 0, 0, sx if sy is None else sy, 0, 0)
+
+    def translate(self, dx, dy):
+        return self.transform(1, 0, 0, 1, dx, dy)
+
+    def project(self, projection):
+        """Apply projection(xs, ys) -> (xs, ys) to the whole coordinate column
+
+        With NumPy the projection receives and must return arrays, so
+        np.sin/np.log etc. run once per path, not once per point.
+        """
+        xs, ys = projection(self.xs(), self.ys())
+        if self.use_numpy:
+            coords = np.empty_like(self.coords)
+            coords[0::2] = xs
+            coords[1::2] = ys
+        else:
+            coords = array('d', bytes(8 * len(self.coords)))
+            coords[0::2] = array('d', xs)
+            coords[1::2] = array('d', ys)
+        return self._new(coords)
+
+    def bbox(self):
+        """(min_x, min_y, max_x, max_y), or None for an empty path"""
+        if not len(self.coords):
+            return None
+        xs, ys = self.xs(), self.ys()
+        if self.use_numpy:
+            return float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max())
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def _ring_areas(self):
+        """[(first, end, signed shoelace area)] for subpaths with 3+ points"""
+        xs, ys = self.xs(), self.ys()
+        areas = []
+        for first, end, closed in self.rings():
+            if end - first < 3:
+                continue
+            x, y = xs[first:end], ys[first:end]
+            if self.use_numpy:
+                total = float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+            else:
+                total = sum(x[i - 1] * y[i] - x[i] * y[i - 1] for i in range(len(x)))
+            areas.append((first, end, total / 2))
+        return areas
+
+    def area(self):
+        """Filled area, open subpaths counted as closed
+
+        A ring inside an odd number of the path's other rings is a hole (see
+        map_geometry); islands count whichever way they are wound.
+        """
+        xs, ys = self.xs(), self.ys()
+        rings = self._ring_areas()
+        outlines = [[(xs[i], ys[i]) for i in range(first, end)] for first, end, area in rings]
+        total = 0.0
+        for index, (first, end, area) in enumerate(rings):
+            depth = sum(1 for other, points in enumerate(outlines)
+                        if other != index and point_in_ring(xs[first], ys[first], points))
+            total += -abs(area) if depth % 2 else abs(area)
+        return total
+
+
+def load_states(records, use_numpy=None):
+    """{state: PathGeometry} from svg_reader PathRecords (borders and DC skipped)"""
+    return {record.state: PathGeometry.from_d(record.d, use_numpy)
+            for record in records if record.state and record.state != 'DC'}
@@ -55,6 +55,7 @@ function insurance_maps_admin_page() {
                             <input type="file" name="csv_file" id="csv_file" accept=".csv" required>
                             <p class="description">
                                 <strong>Required columns (11 total):</strong> State, GL_Premium_Low, GL_Premium_High, GL_Savings, GL_Competitiveness, WC_Class_1, WC_Rate_1, WC_Label_1, WC_Class_2, WC_Rate_2, WC_Label_2<br>
+                                <strong>More WC classes:</strong> Append WC_Class_3, WC_Rate_3, WC_Label_3 (and so on) for each extra class.<br>
                                 <strong>Note:</strong> Uploading a CSV for an existing trade will replace all data for that trade.
                             </p>
                         </td>
@@ -134,7 +135,7 @@ function insurance_maps_admin_page() {
             </ol>
 
             <h3 style="margin-top: 30px;">CSV Format Template</h3>
-            <p>Your CSV file must have exactly these 11 column headers in this order:</p>
+            <p>Your CSV file must have these 11 column headers in this order (trades with 3 or more WC classes append WC_Class_N, WC_Rate_N, WC_Label_N for each extra class):</p>
             <pre style="background: #f5f5f5; padding: 15px; overflow-x: auto; border: 1px solid #ddd; border-radius: 4px; font-size: 11px;">State,GL_Premium_Low,GL_Premium_High,GL_Savings,GL_Competitiveness,WC_Class_1,WC_Rate_1,WC_Label_1,WC_Class_2,WC_Rate_2,WC_Label_2
 
 Carpenter (2 WC classes):
@@ -183,7 +184,7 @@ AL,0.4,1.1,38.6,90,5190,3.56,,,0,
             <h2>Need Help?</h2>
             <p><strong>Common Issues:</strong></p>
             <ul style="line-height: 1.8;">
-                <li>If upload fails, check that your CSV has exactly 11 columns with the correct headers</li>
+                <li>If upload fails, check that your CSV has 11 columns (plus 3 per extra WC class) with the correct headers</li>
                 <li>Trade names must be lowercase with no spaces (use hyphens if needed: general-contractor)</li>
                 <li>Make sure you have data for all 50 states for best results</li>
                 <li>For single WC class trades, leave WC_Class_2, WC_Label_2 empty and set WC_Rate_2 to 0</li>
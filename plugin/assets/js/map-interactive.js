@@ -14,6 +14,8 @@
     var glPremiumRanges = window.insuranceMapData ? window.insuranceMapData.glPremiumRanges : {};
     var stateData = window.insuranceMapData ? window.insuranceMapData.stateData : {};
     var wcConfig = window.insuranceMapData ? window.insuranceMapData.wcConfig : {};
+    // Per-state bbox, centroid, area and label point in viewBox units
+    var geometry = (window.insuranceMapData && window.insuranceMapData.geometry) || {};
 
     var stateNames = {
         AL: 'Alabama', AK: 'Alaska', AZ: 'Arizona', AR: 'Arkansas', CA: 'California',
@@ -141,19 +143,19 @@
                 metricValueEl.textContent = formattedValue;
             }
 
-            // Position tooltip near cursor
+            // Position tooltip at the state's label point, or near the cursor
             var wrapper = document.querySelector('.map-wrapper');
             if (!wrapper) return;
 
             var containerRect = wrapper.getBoundingClientRect();
+            var anchor = stateAnchor(stateCode) || { x: event.clientX, y: event.clientY };
 
-            // Position relative to cursor position
-            var left = event.clientX - containerRect.left + 15;
-            var top = event.clientY - containerRect.top - 10;
+            var left = anchor.x - containerRect.left + 15;
+            var top = anchor.y - containerRect.top - 10;
 
             // Adjust if would go off screen
             if (left + 220 > containerRect.width) {
-                left = event.clientX - containerRect.left - 235;
+                left = anchor.x - containerRect.left - 235;
             }
 
             if (left < 10) left = 10;
@@ -167,6 +169,32 @@
         }
     }
 
+    // Screen position of a state's label point from the geometry index
+    // One rect for the whole SVG instead of getBBox() on each path
+    function stateAnchor(stateCode) {
+        var state = geometry[stateCode];
+        var svg = document.querySelector('#map-svg-container svg');
+        if (!state || !state.label || !svg || !svg.viewBox || !svg.viewBox.baseVal) {
+            return null;
+        }
+
+        var viewBox = svg.viewBox.baseVal;
+        if (!viewBox.width || !viewBox.height) {
+            return null;
+        }
+
+        // The SVG keeps its aspect ratio (xMidYMid meet), so scale uniformly and centre
+        var rect = svg.getBoundingClientRect();
+        var scale = Math.min(rect.width / viewBox.width, rect.height / viewBox.height);
+        var offsetX = (rect.width - viewBox.width * scale) / 2;
+        var offsetY = (rect.height - viewBox.height * scale) / 2;
+
+        return {
+            x: rect.left + offsetX + (state.label[0] - viewBox.x) * scale,
+            y: rect.top + offsetY + (state.label[1] - viewBox.y) * scale
+        };
+    }
+
     // Hide tooltip with error handling
     function hideTooltip() {
         try {
@@ -383,6 +411,99 @@
         }
     }
 
+    // Rebuild per-state path data from a shared-arc topology
+    // Each border is stored once as delta-encoded grid points; rings list
+    // arc indexes, with ~i meaning arc i reversed (see map_topology.py)
+    function decodeTopology(topology) {
+        var scale = topology.scale || 1;
+        var arcs = [];
+        for (var i = 0; i < topology.arcs.length; i++) {
+            var numbers = topology.arcs[i].match(/-?\d+/g) || [];
+            var points = [];
+            var x = 0;
+            var y = 0;
+            for (var j = 0; j + 1 < numbers.length; j += 2) {
+                x += parseInt(numbers[j], 10);
+                y += parseInt(numbers[j + 1], 10);
+                points.push((x / scale) + ' ' + (y / scale));
+            }
+            arcs.push(points);
+        }
+
+        function ringPoints(refs) {
+            var points = [];
+            for (var k = 0; k < refs.length; k++) {
+                var arc = refs[k] < 0 ? arcs[~refs[k]].slice().reverse() : arcs[refs[k]];
+                points = points.concat(points.length ? arc.slice(1) : arc);
+            }
+            return points;
+        }
+
+        // Closed rings end with Z; open subpaths (lines) don't
+        var paths = {};
+        var groups = [[topology.states || {}, 'Z'], [topology.lines || {}, '']];
+        for (var g = 0; g < groups.length; g++) {
+            var shapes = groups[g][0];
+            for (var code in shapes) {
+                if (shapes.hasOwnProperty(code)) {
+                    var d = paths[code] || '';
+                    for (var r = 0; r < shapes[code].length; r++) {
+                        d += 'M' + ringPoints(shapes[code][r]).join('L') + groups[g][1];
+                    }
+                    paths[code] = d;
+                }
+            }
+        }
+        return paths;
+    }
+
+    // Swap in finer state outlines on wider screens
+    // The inline SVG carries the lightest outline; mapDetail lists finer
+    // levels (widest first) so small screens never download them
+    function loadMapDetail(svg) {
+        var levels = window.insuranceMapData.mapDetail;
+        if (!levels || !levels.length || !window.XMLHttpRequest) {
+            return;
+        }
+
+        var width = window.innerWidth || document.documentElement.clientWidth;
+        var level = null;
+        for (var i = 0; i < levels.length; i++) {
+            if (width >= levels[i].minWidth && (!level || levels[i].minWidth > level.minWidth)) {
+                level = levels[i];
+            }
+        }
+        if (!level) {
+            return;
+        }
+
+        var request = new XMLHttpRequest();
+        request.open('GET', level.url);
+        request.onload = function() {
+            if (request.status !== 200) {
+                return;
+            }
+            var paths;
+            try {
+                var detail = JSON.parse(request.responseText);
+                paths = detail.arcs ? decodeTopology(detail) : detail;
+            } catch (e) {
+                console.error('Insurance Map: Could not read map detail', e);
+                return;
+            }
+            for (var code in paths) {
+                if (paths.hasOwnProperty(code)) {
+                    var path = svg.querySelector('#state-' + code);
+                    if (path) {
+                        path.setAttribute('d', paths[code]);
+                    }
+                }
+            }
+            console.log('Insurance Map: Loaded ' + level.name + ' outlines');
+        };
+        request.send();
+    }
+
     // Initialize everything
     function init() {
         try {
@@ -430,6 +551,7 @@
             // Clone the SVG and insert it into the visible container
             var svgClone = hiddenSvg.cloneNode(true);
             container.appendChild(svgClone);
+            loadMapDetail(svgClone);
 
             // Add click listener to map container (event delegation)
             container.addEventListener('click', handleStateClick);
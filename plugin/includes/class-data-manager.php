@@ -17,16 +17,52 @@ class Insurance_Maps_Data_Manager {
         $this->table_name = $wpdb->prefix . 'insurance_map_data';
     }
 
+    /**
+     * Get CSV header row
+     * Five GL columns followed by a Class/Rate/Label group per WC class
+     *
+     * @param int $wc_count Number of WC classes (minimum 2, the 11-column format)
+     * @return array Header column names
+     */
+    public function get_csv_headers($wc_count = 2) {
+        $headers = array('State', 'GL_Premium_Low', 'GL_Premium_High', 'GL_Savings', 'GL_Competitiveness');
+
+        for ($n = 1; $n <= max(2, $wc_count); $n++) {
+            $headers[] = 'WC_Class_' . $n;
+            $headers[] = 'WC_Rate_' . $n;
+            $headers[] = 'WC_Label_' . $n;
+        }
+
+        return $headers;
+    }
+
+    /**
+     * Decode WC classes beyond the second from a database row
+     *
+     * @param array $row Database row
+     * @return array List of arrays with class, rate and label keys
+     */
+    private function get_extra_wc_classes($row) {
+        if (empty($row['wc_extra'])) {
+            return array();
+        }
+
+        $extra = json_decode($row['wc_extra'], true);
+        return is_array($extra) ? $extra : array();
+    }
+
     /**
      * Validate CSV row data
      *
      * @param array $row CSV row data
+     * @param int $line_number Line number for error messages
+     * @param int $expected_columns Column count from the header row
      * @return bool|WP_Error True if valid, WP_Error otherwise
      */
-    private function validate_csv_row($row, $line_number) {
-        // Check we have 11 columns
-        if (count($row) !== 11) {
-            return new WP_Error('invalid_columns', sprintf('Line %d: Expected 11 columns, found %d', $line_number, count($row)));
+    private function validate_csv_row($row, $line_number, $expected_columns = 11) {
+        // Check we have 11 columns, plus 3 per additional WC class
+        if (count($row) !== $expected_columns) {
+            return new WP_Error('invalid_columns', sprintf('Line %d: Expected %d columns, found %d', $line_number, $expected_columns, count($row)));
         }
 
         // Validate state code (2 uppercase letters)
@@ -35,8 +71,11 @@ class Insurance_Maps_Data_Manager {
             return new WP_Error('invalid_state', sprintf('Line %d: Invalid state code "%s"', $line_number, $row[0]));
         }
 
-        // Validate numeric values are actually numeric (skip text columns 5, 7, 8, 10)
-        $numeric_columns = array(1, 2, 3, 4, 6, 9);
+        // Validate numeric values are actually numeric (GL columns and every WC rate column)
+        $numeric_columns = array(1, 2, 3, 4);
+        for ($i = 6; $i < $expected_columns; $i += 3) {
+            $numeric_columns[] = $i;
+        }
         foreach ($numeric_columns as $i) {
             if (!is_numeric($row[$i]) && $row[$i] !== '') {
                 return new WP_Error('invalid_number', sprintf('Line %d: Column %d must be numeric', $line_number, $i + 1));
@@ -67,13 +106,11 @@ class Insurance_Maps_Data_Manager {
         }
 
         // Validate WC Rates (0-1000) - reasonable upper limit
-        $wc_rate_1 = floatval($row[6]);
-        $wc_rate_2 = floatval($row[9]);
-        if ($wc_rate_1 < 0 || $wc_rate_1 > 1000) {
-            return new WP_Error('invalid_range', sprintf('Line %d: WC Rate 1 must be between 0 and 1000', $line_number));
-        }
-        if ($wc_rate_2 < 0 || $wc_rate_2 > 1000) {
-            return new WP_Error('invalid_range', sprintf('Line %d: WC Rate 2 must be between 0 and 1000', $line_number));
+        for ($i = 6, $n = 1; $i < $expected_columns; $i += 3, $n++) {
+            $wc_rate = floatval($row[$i]);
+            if ($wc_rate < 0 || $wc_rate > 1000) {
+                return new WP_Error('invalid_range', sprintf('Line %d: WC Rate %d must be between 0 and 1000', $line_number, $n));
+            }
         }
 
         return true;
@@ -98,9 +135,11 @@ class Insurance_Maps_Data_Manager {
             return new WP_Error('file_open_error', 'Could not open CSV file');
         }
 
-        // Read and validate header row
+        // Read and validate header row (11 columns, plus 3 per additional WC class)
         $header = fgetcsv($file);
-        $expected_headers = array('State', 'GL_Premium_Low', 'GL_Premium_High', 'GL_Savings', 'GL_Competitiveness', 'WC_Class_1', 'WC_Rate_1', 'WC_Label_1', 'WC_Class_2', 'WC_Rate_2', 'WC_Label_2');
+        $column_count = is_array($header) ? count($header) : 0;
+        $wc_count = ($column_count >= 11 && ($column_count - 5) % 3 === 0) ? ($column_count - 5) / 3 : 2;
+        $expected_headers = $this->get_csv_headers($wc_count);
 
         if ($header !== $expected_headers) {
             fclose($file);
@@ -122,7 +161,7 @@ class Insurance_Maps_Data_Manager {
                 }
 
                 // Validate row data
-                $validation = $this->validate_csv_row($row, $line_number);
+                $validation = $this->validate_csv_row($row, $line_number, $column_count);
                 if (is_wp_error($validation)) {
                     $wpdb->query('ROLLBACK');
                     fclose($file);
@@ -141,9 +180,23 @@ class Insurance_Maps_Data_Manager {
                     'wc_label_1' => sanitize_text_field($row[7]),
                     'wc_class_2' => sanitize_text_field($row[8]),
                     'wc_rate_2' => floatval($row[9]),
-                    'wc_label_2' => sanitize_text_field($row[10])
+                    'wc_label_2' => sanitize_text_field($row[10]),
+                    'wc_extra' => null
                 );
 
+                // WC classes 3+ are stored together so one query returns every class
+                $extra = array();
+                for ($i = 11; $i < $column_count; $i += 3) {
+                    $extra[] = array(
+                        'class' => sanitize_text_field($row[$i]),
+                        'rate' => floatval($row[$i + 1]),
+                        'label' => sanitize_text_field($row[$i + 2])
+                    );
+                }
+                if (!empty($extra)) {
+                    $data['wc_extra'] = wp_json_encode($extra);
+                }
+
                 // Insert or update (upsert)
                 $wpdb->replace($this->table_name, $data);
                 $imported++;
@@ -204,7 +257,8 @@ class Insurance_Maps_Data_Manager {
                 'label1' => '',
                 'class2' => '',
                 'label2' => '',
-                'hasTwoClasses' => false
+                'hasTwoClasses' => false,
+                'classes' => array()
             )
         );
 
@@ -216,8 +270,27 @@ class Insurance_Maps_Data_Manager {
                 'label1' => $first['wc_label_1'],
                 'class2' => $first['wc_class_2'],
                 'label2' => $first['wc_label_2'],
-                'hasTwoClasses' => !empty($first['wc_class_2'])
+                'hasTwoClasses' => !empty($first['wc_class_2']),
+                'classes' => array()
+            );
+
+            // Every WC class in button order; index + 1 matches the wcRate<n> key
+            $classes = array(
+                array('class' => $first['wc_class_1'], 'label' => $first['wc_label_1']),
+                array('class' => $first['wc_class_2'], 'label' => $first['wc_label_2'])
             );
+            foreach ($this->get_extra_wc_classes($first) as $extra) {
+                $classes[] = $extra;
+            }
+            foreach ($classes as $index => $class) {
+                if (!empty($class['class'])) {
+                    $formatted['wcConfig']['classes'][] = array(
+                        'index' => $index + 1,
+                        'code' => $class['class'],
+                        'label' => $class['label']
+                    );
+                }
+            }
         }
 
         foreach ($data as $row) {
@@ -235,6 +308,10 @@ class Insurance_Maps_Data_Manager {
             $formatted['stateData']['glCompetitiveness'][$state] = intval($row['gl_competitiveness']);
             $formatted['stateData']['wcRate1'][$state] = floatval($row['wc_rate_1']);
             $formatted['stateData']['wcRate2'][$state] = floatval($row['wc_rate_2']);
+
+            foreach ($this->get_extra_wc_classes($row) as $i => $extra) {
+                $formatted['stateData']['wcRate' . ($i + 3)][$state] = floatval($extra['rate']);
+            }
         }
 
         return $formatted;
@@ -310,15 +387,21 @@ class Insurance_Maps_Data_Manager {
             return new WP_Error('no_data', 'No data available for this trade');
         }
 
+        // Widen the export to the largest number of WC classes in the trade
+        $extra_count = 0;
+        foreach ($data as $row) {
+            $extra_count = max($extra_count, count($this->get_extra_wc_classes($row)));
+        }
+
         // Create CSV in memory (php://temp is more efficient than php://output for this)
         $output = fopen('php://temp', 'r+');
 
         // Write header row (must match import format exactly)
-        fputcsv($output, array('State', 'GL_Premium_Low', 'GL_Premium_High', 'GL_Savings', 'GL_Competitiveness', 'WC_Class_1', 'WC_Rate_1', 'WC_Label_1', 'WC_Class_2', 'WC_Rate_2', 'WC_Label_2'));
+        fputcsv($output, $this->get_csv_headers(2 + $extra_count));
 
         // Write data rows
         foreach ($data as $row) {
-            fputcsv($output, array(
+            $line = array(
                 $row['state_code'],
                 $row['gl_premium_low'],
                 $row['gl_premium_high'],
@@ -330,7 +413,18 @@ class Insurance_Maps_Data_Manager {
                 $row['wc_class_2'],
                 $row['wc_rate_2'],
                 $row['wc_label_2']
-            ));
+            );
+
+            $extra = $this->get_extra_wc_classes($row);
+            for ($i = 0; $i < $extra_count; $i++) {
+                if (isset($extra[$i])) {
+                    array_push($line, $extra[$i]['class'], $extra[$i]['rate'], $extra[$i]['label']);
+                } else {
+                    array_push($line, '', 0, '');
+                }
+            }
+
+            fputcsv($output, $line);
         }
 
         // Get CSV content
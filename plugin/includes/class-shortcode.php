@@ -44,6 +44,8 @@ class Insurance_Maps_Shortcode {
 
         // Get data from database
         $map_data = $this->data_manager->get_trade_data_for_js($trade);
+        $map_data['mapDetail'] = $this->get_map_detail_levels();
+        $map_data['geometry'] = $this->get_map_geometry();
         $raw_data = $this->data_manager->get_trade_data($trade);
 
         // Get state names
@@ -58,6 +60,50 @@ class Insurance_Maps_Shortcode {
         return ob_get_clean();
     }
 
+    /**
+     * Get the finer map outlines the script may load on wider screens
+     * Built by build_lod_maps.py; empty when the LOD files are not installed
+     *
+     * @return array List of array('name', 'minWidth', 'url')
+     */
+    private function get_map_detail_levels() {
+        $manifest = INSURANCE_MAPS_PATH . 'assets/maps/levels.json';
+        if (!file_exists($manifest) || !file_exists(INSURANCE_MAPS_PATH . 'templates/svg-map-lod.html')) {
+            return array();
+        }
+
+        $levels = json_decode(file_get_contents($manifest), true);
+        if (!is_array($levels)) {
+            return array();
+        }
+
+        $detail = array();
+        foreach ($levels as $level) {
+            $detail[] = array(
+                'name' => sanitize_key($level['name']),
+                'minWidth' => intval($level['minWidth']),
+                'url' => INSURANCE_MAPS_URL . 'assets/maps/' . rawurlencode($level['file']) . '?ver=' . INSURANCE_MAPS_VERSION
+            );
+        }
+        return $detail;
+    }
+
+    /**
+     * Get per-state bounding boxes, centroids, areas and label points
+     * Built by build_geometry_index.py; values are in SVG viewBox units
+     *
+     * @return array State code => array('bbox', 'centroid', 'area', 'label')
+     */
+    private function get_map_geometry() {
+        $index = INSURANCE_MAPS_PATH . 'assets/maps/geometry.json';
+        if (!file_exists($index)) {
+            return array();
+        }
+
+        $geometry = json_decode(file_get_contents($index), true);
+        return is_array($geometry) ? $geometry : array();
+    }
+
     /**
      * Get full state names mapped to state codes
      *
@@ -55,6 +55,7 @@ function insurance_maps_activate() {
         wc_class_2 varchar(10) DEFAULT NULL,
         wc_rate_2 decimal(5,2) DEFAULT NULL,
         wc_label_2 varchar(50) DEFAULT NULL,
+        wc_extra text DEFAULT NULL,
         updated_at datetime DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
         PRIMARY KEY  (id),
         UNIQUE KEY trade_state (trade, state_code)
@@ -70,6 +71,7 @@ function insurance_maps_activate() {
 /**
  * Check and migrate database schema on plugin load
  * Handles upgrades from v1.0 to v1.1 (adds WC class columns)
+ * and adds the wc_extra column for trades with 3+ WC classes
  */
 add_action('plugins_loaded', 'insurance_maps_check_schema');
 function insurance_maps_check_schema() {
@@ -108,6 +110,15 @@ function insurance_maps_check_schema() {
 
         // Update version
         update_option('insurance_maps_version', INSURANCE_MAPS_VERSION);
+
+        // Refresh column list for the checks below
+        $columns = $wpdb->get_col("DESCRIBE {$table_name}", 0);
+    }
+
+    // Add storage for WC classes beyond the second (JSON list of class/rate/label)
+    if (in_array('wc_label_2', $columns) && !in_array('wc_extra', $columns)) {
+        $wpdb->query("ALTER TABLE {$table_name}
+            ADD COLUMN wc_extra text DEFAULT NULL AFTER wc_label_2");
     }
 }
 
@@ -142,6 +153,39 @@ function insurance_maps_enqueue_assets() {
             true
         );
     }
+
+    // Trade blocks pasted as Custom HTML (build_engine.py --shared-css) keep
+    // only their page-specific CSS inline and share one fingerprinted sheet
+    $shared_css = insurance_maps_shared_stylesheet();
+    if ($shared_css && is_a($post, 'WP_Post') && strpos($post->post_content, 'id="insurance-map-container"') !== false) {
+        wp_enqueue_style(
+            'insurance-maps-shared',
+            INSURANCE_MAPS_URL . 'assets/css/' . $shared_css,
+            array(),
+            null // the file name changes with its content, so no ?ver= is needed
+        );
+    }
+}
+
+/**
+ * File name of the shared trade-page stylesheet from assets/css/shared-styles.json,
+ * or null if it has not been built
+ */
+function insurance_maps_shared_stylesheet() {
+    static $file = false;
+    if ($file !== false) {
+        return $file;
+    }
+
+    $file = null;
+    $manifest = INSURANCE_MAPS_PATH . 'assets/css/shared-styles.json';
+    if (file_exists($manifest)) {
+        $data = json_decode(file_get_contents($manifest), true);
+        if (!empty($data['file']) && file_exists(INSURANCE_MAPS_PATH . 'assets/css/' . basename($data['file']))) {
+            $file = basename($data['file']);
+        }
+    }
+    return $file;
 }
 
 /**
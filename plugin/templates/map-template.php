@@ -5,7 +5,7 @@
  *
  * Variables available:
  * - $trade: Trade name
- * - $map_data: Formatted data for JavaScript (glPremiumRanges, stateData)
+ * - $map_data: Formatted data for JavaScript (glPremiumRanges, stateData, mapDetail, geometry)
  * - $raw_data: Raw database rows for SEO table
  * - $show_table: Boolean to show/hide SEO table
  * - $state_names: Array of state code => state name
@@ -32,23 +32,14 @@ window.insuranceMapData = <?php echo json_encode($map_data); ?>;
 
     <!-- WC sub-buttons - dynamically generated based on WC config -->
     <div class="wc-sub-buttons" id="wc-sub-buttons" style="display:none;">
-        <?php if (!empty($map_data['wcConfig']['class1'])): ?>
-            <button class="wc-sub-btn active" data-wc-code="1">
-                Class <?php echo esc_html($map_data['wcConfig']['class1']); ?>
-                <?php if (!empty($map_data['wcConfig']['label1'])): ?>
-                    (<?php echo esc_html($map_data['wcConfig']['label1']); ?>)
+        <?php foreach ($map_data['wcConfig']['classes'] as $wc_class): ?>
+            <button class="wc-sub-btn<?php echo $wc_class['index'] === 1 ? ' active' : ''; ?>" data-wc-code="<?php echo esc_attr($wc_class['index']); ?>">
+                Class <?php echo esc_html($wc_class['code']); ?>
+                <?php if (!empty($wc_class['label'])): ?>
+                    (<?php echo esc_html($wc_class['label']); ?>)
                 <?php endif; ?>
             </button>
-        <?php endif; ?>
-
-        <?php if ($map_data['wcConfig']['hasTwoClasses']): ?>
-            <button class="wc-sub-btn" data-wc-code="2">
-                Class <?php echo esc_html($map_data['wcConfig']['class2']); ?>
-                <?php if (!empty($map_data['wcConfig']['label2'])): ?>
-                    (<?php echo esc_html($map_data['wcConfig']['label2']); ?>)
-                <?php endif; ?>
-            </button>
-        <?php endif; ?>
+        <?php endforeach; ?>
     </div>
 
     <div class="legend-container">
@@ -94,7 +85,8 @@ window.insuranceMapData = <?php echo json_encode($map_data); ?>;
 
 <!-- Hidden SVG source - loaded via file_get_contents for reliability -->
 <?php
-$svg_file = INSURANCE_MAPS_PATH . 'templates/svg-map.html';
+// Lightest outlines inline when finer levels can be loaded on demand
+$svg_file = INSURANCE_MAPS_PATH . (empty($map_data['mapDetail']) ? 'templates/svg-map.html' : 'templates/svg-map-lod.html');
 if (file_exists($svg_file)) {
     echo file_get_contents($svg_file);
 } else {
@@ -117,12 +109,9 @@ if (file_exists($svg_file)) {
                 <th>GL Premium Range</th>
                 <th>GL Savings %</th>
                 <th>GL Competitiveness</th>
-                <?php if (!empty($map_data['wcConfig']['class1'])): ?>
-                    <th>WC Rate (Class <?php echo esc_html($map_data['wcConfig']['class1']); ?>)</th>
-                <?php endif; ?>
-                <?php if ($map_data['wcConfig']['hasTwoClasses']): ?>
-                    <th>WC Rate (Class <?php echo esc_html($map_data['wcConfig']['class2']); ?>)</th>
-                <?php endif; ?>
+                <?php foreach ($map_data['wcConfig']['classes'] as $wc_class): ?>
+                    <th>WC Rate (Class <?php echo esc_html($wc_class['code']); ?>)</th>
+                <?php endforeach; ?>
             </tr>
         </thead>
         <tbody>
@@ -132,12 +121,15 @@ if (file_exists($svg_file)) {
                 <td><?php echo esc_html($row['gl_premium_low'] . '% - ' . $row['gl_premium_high'] . '%'); ?></td>
                 <td><?php echo esc_html($row['gl_savings']); ?>%</td>
                 <td><?php echo esc_html($row['gl_competitiveness']); ?></td>
-                <?php if (!empty($map_data['wcConfig']['class1'])): ?>
-                    <td>$<?php echo esc_html($row['wc_rate_1']); ?></td>
-                <?php endif; ?>
-                <?php if ($map_data['wcConfig']['hasTwoClasses']): ?>
-                    <td>$<?php echo esc_html($row['wc_rate_2']); ?></td>
-                <?php endif; ?>
+                <?php $wc_extra = !empty($row['wc_extra']) ? json_decode($row['wc_extra'], true) : array(); ?>
+                <?php foreach ($map_data['wcConfig']['classes'] as $wc_class): ?>
+                    <?php
+                    // Raw stored value, as for the GL columns; classes 3+ live in wc_extra
+                    $n = $wc_class['index'];
+                    $wc_rate = $n <= 2 ? $row['wc_rate_' . $n] : (isset($wc_extra[$n - 3]['rate']) ? $wc_extra[$n - 3]['rate'] : null);
+                    ?>
+                    <td>$<?php echo esc_html($wc_rate !== null ? $wc_rate : '--'); ?></td>
+                <?php endforeach; ?>
             </tr>
             <?php endforeach; ?>
         </tbody>
@@ -1,24 +1,14 @@
-import re
+from html import escape
 
-# Read the SVG file
-with open('/Users/curranclark/Documents/trade-maps/US_Map.svg', 'r') as f:
-    content = f.read()
+import geometry_cache
 
-# Extract all path elements with state classes
-pattern = r'<path class="([a-z]{2})"([^>]*)>(.*?)</path>'
-matches = re.findall(pattern, content, re.DOTALL)
-
-# Process each state path
-for state_code, attributes, inner_content in matches:
-    if state_code != 'dc':  # Skip DC
-        # Convert to uppercase and format
-        state_upper = state_code.upper()
-        # Clean up the attributes to get just the path data
-        path_match = re.search(r'd="([^"]+)"', attributes)
-        if path_match:
-            path_data = path_match.group(1)
-            # Output the processed path
-            print(f'<path id="state-{state_upper}" class="state-path heat-0" d="{path_data}">')
-            if inner_content.strip():
-                print(inner_content.strip())
-            print('</path>')
\ No newline at end of file
+# State paths from the SVG file (parsed once per change, then cached)
+for record in geometry_cache.load('US_Map.svg').paths:
+    if not record.state or record.state == 'DC':  # Skip borders and DC
+        continue
+    # Output the processed path
+    print(f'<path id="state-{record.state}" class="state-path heat-0" d="{record.d}">')
+    for child in record.children:
+        # The parser decoded entities; escape again so &amp; stays &amp;
+        print(f'<{child.tag}>{escape(child.text.strip(), quote=False)}</{child.tag}>')
+    print('</path>')
@@ -2,7 +2,7 @@
 import re
 
 # Read the HTML file
-with open('/Users/curranclark/Documents/trade-maps/index-complete.html', 'r') as f:
+with open('index-complete.html', 'r') as f:
     content = f.read()
 
 # Remove all <title>...</title> elements from the SVG
@@ -11,7 +11,7 @@ pattern = r'\s*<title>[^<]*</title>\s*'
 content = re.sub(pattern, '', content)
 
 # Write back
-with open('/Users/curranclark/Documents/trade-maps/index-complete.html', 'w') as f:
+with open('index-complete.html', 'w') as f:
     f.write(content)
 
 print("Removed all <title> elements from SVG paths")
\ No newline at end of file
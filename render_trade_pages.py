@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Render the final-<trade>.html pages from one shared skeleton
+
+trade-page-template.html holds the page once (CSS, hidden SVG, script)
+with placeholders for what differs between trades: title, WC classes,
+colour scaling and the data objects. It is compiled once (page_template)
+and handed to a pool of worker processes; each worker renders one trade
+from sample-data/<trade>.csv and streams the page to disk.
+
+Pages go to build/pages/ by default, not over the hand-edited
+final-*.html pages that extract-csv-data.py reads the CSVs from.
+
+With --pack, trades are read from the packed file written by
+extract-csv-data.py --pack instead: every worker maps the same file, and
+no CSV is parsed.
+
+Usage:
+    python3 render_trade_pages.py                 # every CSV in sample-data/
+    python3 render_trade_pages.py gc hvac -j 1    # just these, serially
+    python3 render_trade_pages.py --pack build/trades.pack
+"""
+
+import os
+import filecmp
+import argparse
+import tempfile
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import build_trace
+from build_engine import gl_ranges, format_ranges
+from page_template import load_template
+from trade_dataset import TradeDataset
+from trade_pack import TradePack
+
+TEMPLATE = Path('trade-page-template.html')
+SOURCE_DIR = Path('sample-data')
+OUTPUT_DIR = Path('build/pages')
+
+# Where a trade's page differs from the defaults below
+TRADE_PAGES = {
+    'carpenter': {'range_decimals': 1},
+    'gc': {'title': 'Contractor'},
+    'hvac': {'title': 'HVAC', 'percentile_scale': True,
+             'wc_description': 'Workers Compensation rate per $100 of payroll for HVAC contractors (Class 5537)'},
+    'landscaping': {'percentile_scale': True},
+}
+PAGE_DEFAULTS = {
+    'range_decimals': 2,
+    'percentile_scale': False,
+    'wc_description': 'Workers Compensation rate per $100 of payroll',
+}
+
+
+def trade_context(trade, data):
+    """Template variables for one trade's TradeDataset"""
+    page = {**PAGE_DEFAULTS, 'title': trade.capitalize(), **TRADE_PAGES.get(trade, {})}
+    ranges = gl_ranges(data)
+
+    wc_classes = [{'code': code, 'label': label, 'first': n == 1}
+                  for n, (code, label) in enumerate(data.wc_classes, 1)]
+    multi_wc = len(wc_classes) > 1
+    if multi_wc:
+        wc_button = 'WC Rate per $100'
+        wc_metrics = [(f"wcRate{wc['code']}", f'wcRate{n}') for n, wc in enumerate(wc_classes, 1)]
+    else:
+        wc = wc_classes[0] if wc_classes else {'code': '', 'label': ''}
+        wc_button = f"WC Rate - {wc['code']}" + (f" ({wc['label']})" if wc['label'] else '')
+        wc_metrics = [('wcRate', 'wcRate1')]
+
+    keys = [('glPremium', 'glPremium'), ('glSavings', 'glSavings'),
+            ('glCompetitiveness', 'glCompetitiveness')] + wc_metrics
+    keys = [(key, metric) for key, metric in keys if metric in data.columns]
+    metrics = [{'key': key, 'values': data.to_js_object(metric), 'last': n == len(keys)}
+               for n, (key, metric) in enumerate(keys, 1)]
+
+    return {
+        'title': page['title'],
+        'percentile_scale': page['percentile_scale'],
+        'wc_description': page['wc_description'],
+        'wc_button': wc_button,
+        'wc_classes': wc_classes,
+        'multi_wc': multi_wc,
+        'gl_premium_ranges': '\n        '.join(format_ranges(ranges, page['range_decimals'])),
+        'metrics': metrics,
+    }
+
+
+_template = None
+
+
+def _init_worker(template, trace):
+    """Receive the compiled template once per worker process"""
+    global _template
+    _template = template
+    if trace:
+        build_trace.enable()
+
+
+def render_trade(trade, source, output_dir):
+    """Render one trade's page from its CSV or a trade pack; returns (message, trace events)"""
+    with build_trace.span('read', source.name):
+        if source.suffix == '.csv':
+            data = TradeDataset.from_csv(source)
+        else:
+            with TradePack(source) as pack:
+                data = pack.dataset(trade)
+    context = trade_context(trade, data)
+
+    output = Path(output_dir) / f'final-{trade}.html'
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with build_trace.span('transform', f'render {trade}') as span:
+        fd, tmp = tempfile.mkstemp(dir=output.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.writelines(_template.render(context))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        span.bytes = os.path.getsize(tmp)
+
+    if output.exists() and filecmp.cmp(tmp, output, shallow=False):
+        os.unlink(tmp)
+        message = f"= {output} unchanged"
+    else:
+        os.replace(tmp, output)
+        message = f"✓ Wrote {output}"
+    return message, build_trace.collect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render every trade page from trade-page-template.html')
+    parser.add_argument('trades', nargs='*', help='Trades to render (default: every CSV in the source directory)')
+    parser.add_argument('--source', default=str(SOURCE_DIR), help=f'CSV directory (default: {SOURCE_DIR})')
+    parser.add_argument('--output', default=str(OUTPUT_DIR), help=f'Output directory (default: {OUTPUT_DIR})')
+    parser.add_argument('--pack', metavar='PATH',
+                        help='Read trades from a packed file (extract-csv-data.py --pack) instead of CSVs')
+    parser.add_argument('--template', default=str(TEMPLATE), help=f'Page skeleton (default: {TEMPLATE})')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help='Number of worker processes (default: one per CPU; 1 renders serially)')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='Write a Chrome trace (chrome://tracing, Perfetto) of every stage to PATH')
+    args = parser.parse_args()
+
+    if args.trace:
+        build_trace.start(args.trace)
+
+    source = Path(args.source)
+    if args.pack:
+        with TradePack(args.pack) as pack:
+            packed = pack.trades
+        missing = [trade for trade in args.trades if trade not in packed]
+        if missing:
+            print(f"✗ Not in {args.pack}: {', '.join(missing)}")
+            return
+        trades = args.trades or sorted(packed)
+    else:
+        trades = args.trades or sorted(p.stem for p in source.glob('*.csv'))
+    if not trades:
+        print(f"✗ No trade CSVs found in {source}")
+        return
+
+    with build_trace.span('read', Path(args.template).name):
+        template = load_template(args.template)
+
+    if args.pack:
+        sources = [Path(args.pack)] * len(trades)
+    else:
+        sources = [source / f'{trade}.csv' for trade in trades]
+    output_dirs = [args.output] * len(trades)
+    jobs = min(args.jobs, len(trades))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                 initargs=(template, bool(args.trace))) as executor:
+            results = list(executor.map(render_trade, trades, sources, output_dirs))
+    else:
+        _init_worker(template, bool(args.trace))
+        results = list(map(render_trade, trades, sources, output_dirs))
+
+    for message, events in results:
+        print(message)
+        build_trace.merge(events)
+
+    print(f"\n✅ Rendered {len(trades)} trade pages with {jobs} worker(s)")
+
+
+if __name__ == '__main__':
+    main()
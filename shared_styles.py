@@ -0,0 +1,164 @@
+"""
+One shared, content-hashed stylesheet for the per-trade pages
+
+Every trade block inlines the same <style> (#insurance-map-container,
+.metric-btn, .heat-0 ... .heat-7, ...). extract_shared() moves the rules
+that every page has into one stylesheet and leaves only the page's own
+rules inline. write_shared() saves it as
+plugin/assets/css/trade-maps-shared.<hash>.css, named by its content, so
+browsers can cache it for good across all trade pages. It also writes
+shared-styles.json, which insurance_maps_enqueue_assets() reads to find
+the file.
+
+The shared sheet loads before the block's inline <style>, so a
+page-specific rule that used to come before a shared rule now comes
+after it. A shared rule that such an earlier page rule could conflict
+with (same class, id or element name) is kept inline on every page.
+"""
+
+import re
+import json
+import hashlib
+from pathlib import Path
+
+from minify_html import minify_css
+
+CSS_DIR = Path('plugin/assets/css')
+STEM = 'trade-maps-shared'
+MANIFEST = 'shared-styles.json'
+
+STYLE_RE = re.compile(r'([ \t]*<style\b[^>]*>)(.*?)(</style>[ \t]*\n?)', re.DOTALL | re.IGNORECASE)
+CSS_SKIP_RE = re.compile(r'/\*.*?\*/|"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'', re.DOTALL)
+SELECTOR_NAME_RE = re.compile(r'-?[A-Za-z_][\w-]*')
+PSEUDO_RE = re.compile(r'::?[\w-]+')
+
+
+def split_rules(css):
+    """(top-level rules, trailing text); each rule keeps the whitespace and comments before it"""
+    rules = []
+    start = 0
+    depth = 0
+    pos = 0
+    while pos < len(css):
+        skip = CSS_SKIP_RE.match(css, pos)
+        if skip:
+            pos = skip.end()
+            continue
+        c = css[pos]
+        pos += 1
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"unexpected }} at offset {pos - 1}")
+            if depth == 0:
+                rules.append(css[start:pos])
+                start = pos
+        elif c == ';' and depth == 0:
+            # @import / @charset statements
+            rules.append(css[start:pos])
+            start = pos
+    if depth:
+        raise ValueError("unclosed { in <style>")
+    return rules, css[start:]
+
+
+def _names(rule):
+    """Class, id and element names in a rule's selectors (nested ones included, pseudo-classes not)"""
+    names = set()
+    text = CSS_SKIP_RE.sub(' ', rule)
+    for prelude in re.findall(r'(?:^|(?<=[{};]))([^{};]*)\{', text):
+        if not prelude.strip().startswith('@'):
+            names.update(SELECTOR_NAME_RE.findall(PSEUDO_RE.sub(' ', prelude)))
+    return names
+
+
+def _shared_keys(pages):
+    """Keys (minified text) of the rules every page has and can safely load first"""
+    keyed = [[(minify_css(rule), rule) for rule in rules] for rules in pages]
+    shared = set.intersection(*[{key for key, rule in page} for page in keyed])
+    changed = True
+    while changed:
+        changed = False
+        for page in keyed:
+            earlier = set()
+            for key, rule in page:
+                if key not in shared:
+                    earlier |= _names(rule)
+                elif earlier & _names(rule):
+                    shared.discard(key)
+                    earlier |= _names(rule)
+                    changed = True
+    return shared
+
+
+def _page_rules(page):
+    """[(style match, rules, trailing text)] for each <style> block"""
+    found = []
+    for match in STYLE_RE.finditer(page):
+        rules, rest = split_rules(match.group(2))
+        found.append((match, rules, rest))
+    return found
+
+
+def extract_shared(pages):
+    """(shared css, [pages without the shared rules]) for a list of page texts
+
+    Rules are compared by their minified text, so indentation and
+    comments do not matter. The shared CSS keeps the first page's
+    formatting and order. With fewer than two pages nothing is shared.
+    """
+    parsed = [_page_rules(page) for page in pages]
+    if len(pages) < 2 or not all(parsed):
+        return '', list(pages)
+    shared = _shared_keys([[rule for match, rules, rest in styles for rule in rules] for styles in parsed])
+
+    css = []
+    seen = set()
+    for match, rules, rest in parsed[0]:
+        for rule in rules:
+            key = minify_css(rule)
+            if key in shared and key not in seen:
+                seen.add(key)
+                css.append(rule.strip())
+
+    stripped = []
+    for page, styles in zip(pages, parsed):
+        out = []
+        pos = 0
+        for match, rules, rest in styles:
+            out.append(page[pos:match.start()])
+            kept = [rule for rule in rules if minify_css(rule) not in shared]
+            if kept:
+                out.append(match.group(1) + ''.join(kept) + rest + match.group(3))
+            pos = match.end()
+        out.append(page[pos:])
+        stripped.append(''.join(out))
+    return '\n\n'.join(css) + '\n' if css else '', stripped
+
+
+def write_shared(css, css_dir=CSS_DIR, sources=()):
+    """Write <STEM>.<hash>.css and the manifest, removing older hashed files
+
+    Returns (path of the stylesheet, True if anything was written).
+    """
+    css_dir = Path(css_dir)
+    digest = hashlib.sha256(css.encode()).hexdigest()[:10]
+    path = css_dir / f'{STEM}.{digest}.css'
+    manifest = json.dumps({'file': path.name, 'bytes': len(css.encode()), 'sources': list(sources)}, indent=2) + '\n'
+    manifest_path = css_dir / MANIFEST
+
+    written = False
+    css_dir.mkdir(parents=True, exist_ok=True)
+    if not path.exists():
+        path.write_text(css)
+        written = True
+    if not manifest_path.exists() or manifest_path.read_text() != manifest:
+        manifest_path.write_text(manifest)
+        written = True
+    for stale in css_dir.glob(f'{STEM}.*.css'):
+        if stale != path:
+            stale.unlink()
+            written = True
+    return path, written
@@ -0,0 +1,181 @@
+"""
+Minify SVG path data for the state map
+
+Paths are parsed by path_geometry into subpaths of absolute points on an
+integer grid of 10**-precision units of the 959x593 viewBox, so relative
+coordinates can be re-emitted without rounding drift.
+
+minify_path() rewrites a d attribute as relative commands on that grid,
+drops separators the SVG grammar doesn't need, merges collinear segments
+and picks h/v over l wherever that's shorter.
+"""
+
+import re
+
+from path_geometry import DEFAULT_PRECISION, PATH_NUMBER_RE, PathGeometry
+
+PATH_TAG_RE = re.compile(r'<path\b[^>]*>')
+D_ATTR_RE = re.compile(r'(\sd=")([^"]*)(")')
+ID_ATTR_RE = re.compile(r'\sid="(?:state-)?([^"]+)"')
+CLASS_ATTR_RE = re.compile(r'\sclass="([^"]+)"')
+
+
+def parse_path(d, precision=DEFAULT_PRECISION):
+    """Parse path data into a list of Subpaths on a 10**-precision grid"""
+    return PathGeometry.from_d(d).subpaths(precision)
+
+
+def _collinear(a, b, c):
+    """True if b lies on the straight run a -> c (same direction)"""
+    abx, aby = b[0] - a[0], b[1] - a[1]
+    bcx, bcy = c[0] - b[0], c[1] - b[1]
+    return abx * bcy - aby * bcx == 0 and abx * bcx + aby * bcy > 0
+
+
+def simplify_points(points, closed):
+    """Drop repeated points and points in the middle of a straight run"""
+    result = []
+    for point in points:
+        if result and result[-1] == point:
+            continue
+        result.append(point)
+        while len(result) >= 3 and _collinear(result[-3], result[-2], result[-1]):
+            del result[-2]
+
+    if closed and len(result) > 2:
+        # z draws the closing segment itself
+        if result[-1] == result[0]:
+            result.pop()
+        while len(result) > 2 and _collinear(result[-2], result[-1], result[0]):
+            result.pop()
+    return result
+
+
+def format_number(value, precision=DEFAULT_PRECISION):
+    """Grid units -> shortest decimal text ('.5', '-1.2', '12')"""
+    scale = 10 ** precision
+    whole, frac = divmod(abs(value), scale)
+    text = str(whole)
+    if frac:
+        text += '.' + f"{frac:0{precision}d}".rstrip('0')
+        if whole == 0:
+            text = text[1:]
+    return '-' + text if value < 0 else text
+
+
+class _PathWriter:
+    """Accumulates commands, omitting repeated letters and spare separators"""
+
+    def __init__(self, precision):
+        self.precision = precision
+        self.parts = []
+        self.command = None
+        self.last_number = None
+
+    def cost(self, command, values):
+        return len(self._encode(command, values))
+
+    def _encode(self, command, values):
+        text = '' if command == self.command else command
+        last = None if text else self.last_number
+        for value in values:
+            number = format_number(value, self.precision)
+            if last is not None and not number.startswith('-') and \
+                    not (number.startswith('.') and '.' in last):
+                text += ' '
+            text += number
+            last = number
+        return text
+
+    def add(self, command, values):
+        self.parts.append(self._encode(command, values))
+        if values:
+            self.last_number = format_number(values[-1], self.precision)
+        self.command = command
+
+    def close(self):
+        self.parts.append('z')
+        self.command = 'z'
+        self.last_number = None
+
+    def text(self):
+        return ''.join(self.parts)
+
+
+def format_path(subpaths, precision=DEFAULT_PRECISION):
+    """Serialize Subpaths as compact relative path data"""
+    writer = _PathWriter(precision)
+    cx = cy = 0
+    for subpath in subpaths:
+        points = simplify_points(subpath.points, subpath.closed)
+        if len(points) < 2:
+            # A lone moveto draws nothing
+            continue
+        sx, sy = points[0]
+        writer.add('m', [sx - cx, sy - cy])
+        # Pairs after a moveto are implicit linetos
+        writer.command = 'l'
+        cx, cy = sx, sy
+        for x, y in points[1:]:
+            dx, dy = x - cx, y - cy
+            options = [('l', [dx, dy])]
+            if dy == 0:
+                options.append(('h', [dx]))
+            if dx == 0:
+                options.append(('v', [dy]))
+            command, values = min(options, key=lambda option: writer.cost(*option))
+            writer.add(command, values)
+            cx, cy = x, y
+        if subpath.closed:
+            writer.close()
+            cx, cy = sx, sy
+    return writer.text()
+
+
+def path_precision(d):
+    """Most decimal places any number in d is written with (1.25 -> 2, 5e-1 -> 1)"""
+    places = 0
+    for number in PATH_NUMBER_RE.findall(d):
+        mantissa, _, exponent = number.lower().partition('e')
+        _, _, fraction = mantissa.partition('.')
+        places = max(places, len(fraction) - int(exponent or 0))
+    return places
+
+
+def minify_path(d, precision=DEFAULT_PRECISION):
+    """Minify one path's d attribute"""
+    return format_path(parse_path(d, precision), precision)
+
+
+def path_label(tag, index):
+    """State code (or border class) identifying a <path> tag"""
+    match = ID_ATTR_RE.search(tag)
+    if match:
+        return match.group(1).upper()
+    match = CLASS_ATTR_RE.search(tag)
+    if match:
+        return match.group(1)
+    return f"path {index + 1}"
+
+
+def minify_markup(text, precision=DEFAULT_PRECISION):
+    """Minify every <path d="..."> in an SVG or HTML document
+
+    precision=None keeps each path at the precision it is written with
+    (path_precision), so nothing is rounded away.
+
+    Returns (new_text, [(label, bytes_before, bytes_after), ...]).
+    """
+    stats = []
+
+    def replace_tag(match):
+        tag = match.group(0)
+        d_match = D_ATTR_RE.search(tag)
+        if not d_match:
+            return tag
+        before = d_match.group(2)
+        after = minify_path(before, path_precision(before) if precision is None else precision)
+        stats.append((path_label(tag, len(stats)), len(before), len(after)))
+        return tag[:d_match.start(2)] + after + tag[d_match.end(2):]
+
+    return PATH_TAG_RE.sub(replace_tag, text), stats
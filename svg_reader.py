@@ -0,0 +1,177 @@
+"""
+Stream <path> records and <svg> markup out of SVG files and HTML pages
+
+One reader for US_Map.svg, carpenter copy.html and larger (county-level)
+maps. The file is fed to html.parser in chunks, so nothing is matched with
+DOTALL regexes and only the unparsed tail of the file is held in memory;
+the exception is the raw text of an <svg> element asked for with
+read_svg_markup(), which is kept from its start tag to its end tag.
+
+html.parser rather than an XML parser because the maps are usually embedded
+in HTML pages that aren't well-formed XML. It lowercases tag and attribute
+names; raw markup from read_svg_markup() keeps the original case.
+"""
+
+import os
+import re
+from collections import namedtuple
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 64 * 1024
+
+STATE_ID_RE = re.compile(r'state-([a-z]{2})$', re.IGNORECASE)
+STATE_CLASS_RE = re.compile(r'[a-z]{2}$')
+# Inline handlers left over from the standalone pages; the plugin binds its own
+EVENT_HANDLERS = ('onclick', 'onmouseover', 'onmouseout')
+EVENT_HANDLER_RE = re.compile(r'\s+(?:onclick|onmouseover|onmouseout)="[^"]*"')
+
+# state: two-letter code (upper case) or None; attrs: {name: value};
+# children: [Child, ...] for elements nested in the path, e.g. <title>
+PathRecord = namedtuple('PathRecord', ['state', 'd', 'attrs', 'children', 'svg_index'])
+Child = namedtuple('Child', ['tag', 'attrs', 'text'])
+
+
+def state_code(attrs):
+    """State code from id="state-XX" or a two-letter class (US_Map.svg)"""
+    match = STATE_ID_RE.match(attrs.get('id') or '')
+    if match:
+        return match.group(1).upper()
+    for name in (attrs.get('class') or '').split():
+        if STATE_CLASS_RE.match(name):
+            return name.upper()
+    return None
+
+
+def strip_event_handlers(markup):
+    """Remove onclick/onmouseover/onmouseout attributes from raw markup"""
+    return EVENT_HANDLER_RE.sub('', markup)
+
+
+class _Reader(HTMLParser):
+    """Collects events as chunks are fed; the caller drains self.events"""
+
+    def __init__(self, capture_markup):
+        super().__init__(convert_charrefs=True)
+        self.capture_markup = capture_markup
+        self.events = []
+        self.svg_depth = 0
+        self.svg_index = -1
+        self.path = None
+        self.child = None
+        # Absolute offsets, for slicing raw <svg> markup
+        self.line_starts = [0]
+        self.fed = 0
+        self.chunks = []
+        self.chunks_start = 0
+        self.svg_start = None
+
+    def feed_chunk(self, chunk):
+        for match in re.finditer('\n', chunk):
+            self.line_starts.append(self.fed + match.end())
+        self.chunks.append(chunk)
+        self.fed += len(chunk)
+        self.feed(chunk)
+        # Keep raw chunks only while an <svg> is being captured, or unparsed
+        keep_from = self.svg_start if self.svg_start is not None else self.fed - len(self.rawdata)
+        while self.chunks and self.chunks_start + len(self.chunks[0]) <= keep_from:
+            self.chunks_start += len(self.chunks.pop(0))
+
+    def _offset(self):
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'svg':
+            if self.svg_depth == 0:
+                self.svg_index += 1
+                if self.capture_markup:
+                    self.svg_start = self._offset()
+            self.svg_depth += 1
+        elif tag == 'path' and self.svg_depth:
+            self.path = (attrs, [])
+        elif self.path is not None:
+            self.child = Child(tag, attrs, [])
+
+    def handle_endtag(self, tag):
+        if tag == 'svg' and self.svg_depth:
+            self.svg_depth -= 1
+            if self.svg_depth == 0 and self.svg_start is not None:
+                text = ''.join(self.chunks)
+                end = text.index('>', self._offset() - self.chunks_start) + 1
+                self.events.append(('svg', text[self.svg_start - self.chunks_start:end]))
+                self.svg_start = None
+        elif tag == 'path' and self.path is not None:
+            attrs, children = self.path
+            self.events.append(('path', PathRecord(state_code(attrs), attrs.get('d', ''), attrs,
+                                                   children, self.svg_index)))
+            self.path = None
+            self.child = None
+        elif self.child is not None and tag == self.child.tag:
+            self.path[1].append(self.child._replace(text=''.join(self.child.text)))
+            self.child = None
+
+    def handle_data(self, data):
+        if self.child is not None:
+            self.child.text.append(data)
+
+
+def _events(source, capture_markup=False, chunk_size=CHUNK_SIZE):
+    """Yield ('path', PathRecord) and, if asked, ('svg', markup) in document order"""
+    reader = _Reader(capture_markup)
+    f = open(source, 'r') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            reader.feed_chunk(chunk)
+            yield from reader.events
+            reader.events = []
+        reader.close()
+        yield from reader.events
+    finally:
+        if f is not source:
+            f.close()
+
+
+def iter_paths(source, chunk_size=CHUNK_SIZE):
+    """Yield a PathRecord for every <path> inside an <svg>
+
+    source is a file name (str or os.PathLike) or a text file object.
+    """
+    for kind, value in _events(source, chunk_size=chunk_size):
+        if kind == 'path':
+            yield value
+
+
+def iter_state_paths(source, chunk_size=CHUNK_SIZE):
+    """PathRecords of state outlines only (no borders, separators or DC)"""
+    for record in iter_paths(source, chunk_size):
+        if record.state and record.state != 'DC':
+            yield record
+
+
+def read_svg(source, index=0, chunk_size=CHUNK_SIZE):
+    """(markup, [PathRecord]) for the index-th top-level <svg>, or None
+
+    One pass over the file; reading stops as soon as that element has been
+    closed.
+    """
+    paths = []
+    seen = 0
+    for kind, value in _events(source, capture_markup=True, chunk_size=chunk_size):
+        if kind == 'path':
+            if value.svg_index == index:
+                paths.append(value)
+        elif seen == index:
+            return value, paths
+        else:
+            seen += 1
+    return None
+
+
+def read_svg_markup(source, index=0, chunk_size=CHUNK_SIZE):
+    """Raw text of the index-th top-level <svg> element, or None"""
+    found = read_svg(source, index, chunk_size)
+    return found[0] if found else None
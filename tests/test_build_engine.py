@@ -0,0 +1,81 @@
+import sys
+import importlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import build_engine
+from build_engine import Engine, code_digest, code_files
+
+
+def make_module(tmp_path, name, body):
+    path = tmp_path / f'{name}.py'
+    path.write_text(body)
+    if str(tmp_path) not in sys.path:
+        sys.path.insert(0, str(tmp_path))
+    if name in sys.modules:
+        return importlib.reload(sys.modules[name])
+    return importlib.import_module(name)
+
+
+def build(tmp_path, func, source):
+    engine = Engine(cache_dir=tmp_path / 'cache')
+    node = engine.stage('upper', func, [engine.file(source)])
+    return engine, engine.evaluate(node)[1]
+
+
+def test_second_run_reuses_cached_stage(tmp_path):
+    stage = make_module(tmp_path, 'stage_reuse', 'def run(text):\n    return text.upper()\n')
+    source = tmp_path / 'page.html'
+    source.write_text('abc')
+
+    engine, value = build(tmp_path, stage.run, source)
+    assert value == 'ABC' and engine.ran == ['upper']
+    engine, value = build(tmp_path, stage.run, source)
+    assert value == 'ABC' and engine.reused == ['upper'] and engine.ran == []
+
+
+def test_input_change_reruns_stage(tmp_path):
+    stage = make_module(tmp_path, 'stage_input', 'def run(text):\n    return text.upper()\n')
+    source = tmp_path / 'page.html'
+    source.write_text('abc')
+    build(tmp_path, stage.run, source)
+
+    source.write_text('xyz')
+    engine, value = build(tmp_path, stage.run, source)
+    assert value == 'XYZ' and engine.ran == ['upper']
+
+
+def test_code_change_reruns_stage(tmp_path):
+    stage = make_module(tmp_path, 'stage_code', 'def run(text):\n    return text.upper()\n')
+    source = tmp_path / 'page.html'
+    source.write_text('abc')
+    build(tmp_path, stage.run, source)
+
+    stage = make_module(tmp_path, 'stage_code', 'def run(text):\n    return text.upper() + "!"\n')
+    engine, value = build(tmp_path, stage.run, source)
+    assert value == 'ABC!' and engine.ran == ['upper']
+
+
+def test_code_change_in_imported_module_reruns_stage(tmp_path, monkeypatch):
+    # Like the es5 stage: the stage module only calls a transform defined elsewhere
+    monkeypatch.setattr(build_engine, 'ROOT', tmp_path.resolve())
+    make_module(tmp_path, 'transform_dep', 'def shout(text):\n    return text.upper()\n')
+    stage = make_module(tmp_path, 'stage_dep', 'from transform_dep import shout\n\ndef run(text):\n    return shout(text)\n')
+    source = tmp_path / 'page.html'
+    source.write_text('abc')
+    before = code_digest(stage.run)
+    build(tmp_path, stage.run, source)
+
+    make_module(tmp_path, 'transform_dep', 'def shout(text):\n    return text.upper() + "!"\n')
+    stage = make_module(tmp_path, 'stage_dep', 'from transform_dep import shout\n\ndef run(text):\n    return shout(text)\n')
+    assert code_digest(stage.run) != before
+    engine, value = build(tmp_path, stage.run, source)
+    assert value == 'ABC!' and engine.ran == ['upper']
+
+
+def test_code_files_cover_transform_modules():
+    names = {path.name for path in code_files(build_engine.wrap)}
+    assert {'build_engine.py', 'wordpress_transforms.py', 'js_es5.py', 'minify_html.py', 'shared_styles.py'} <= names
+    names = {path.name for path in code_files(build_engine.to_es5)}
+    assert {'wordpress_transforms.py', 'js_es5.py'} <= names
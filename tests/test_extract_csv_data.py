@@ -0,0 +1,75 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+spec = importlib.util.spec_from_file_location('extract_csv_data', ROOT / 'extract-csv-data.py')
+extractor = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(extractor)
+
+
+def test_number_object_types_each_value():
+    assert extractor.parse_js_object('{AL: 3, DE: 4}', 0) == ({'AL': 3, 'DE': 4}, 14)
+    value, _ = extractor.parse_js_object('{AL: 3, DE: 4.5, ME: 1e2}', 0)
+    assert value == {'AL': 3, 'DE': 4.5, 'ME': 100.0}
+    assert type(value['AL']) is int and type(value['DE']) is float
+
+
+def test_nested_object_with_comments_and_arrays():
+    text = '''{
+        // per-state savings
+        glSavings: {AL: 32.3, "AK": 'x'},
+        ranges: [1, [2, 3], {a: -4}],
+        /* trailing */ flag: true,
+    }'''
+    value, end = extractor.parse_js_object(text, 0)
+    assert value == {'glSavings': {'AL': 32.3, 'AK': 'x'}, 'ranges': [1, [2, 3], {'a': -4}], 'flag': 'true'}
+    assert end == len(text)
+
+
+@pytest.mark.parametrize('text, offset', [
+    ('{a: 1 + 2, b: [3]}', 6),
+    ('{a: foo(1), b: [3]}', 7),
+])
+def test_unknown_token_reports_position(text, offset):
+    with pytest.raises(ValueError, match=f'offset {offset}'):
+        extractor.parse_js_object(text, 0)
+
+
+def test_unterminated_object():
+    with pytest.raises(ValueError, match='Unterminated'):
+        extractor.parse_js_object('{a: [1, 2', 0)
+
+
+def test_missing_key():
+    with pytest.raises(ValueError, match='Missing key'):
+        extractor.parse_js_object('{a: {b: 1}, 3}', 0)
+
+
+def test_extract_js_blocks_requires_var_keyword():
+    page = 'myvar stateData = {a: 1}; $var stateData = {a: 2};\nvar stateData = {a: 3};'
+    assert extractor.extract_js_blocks(page) == {'stateData': {'a': 3}}
+
+
+def test_extract_js_blocks_bytes_matches_str():
+    page = '''<script>
+    var glPremiumRanges = {AL: "1.2% - 2.3%", AK: "0.5% - 1%"};
+    var stateData = {glSavings: {AL: 32.3, AK: 10}, wcRate5437: {AL: 4.5, AK: 7}};
+    </script>'''
+    blocks = extractor.extract_js_blocks(page)
+    assert blocks == {
+        'glPremiumRanges': {'AL': '1.2% - 2.3%', 'AK': '0.5% - 1%'},
+        'stateData': {'glSavings': {'AL': 32.3, 'AK': 10}, 'wcRate5437': {'AL': 4.5, 'AK': 7}},
+    }
+    assert extractor.extract_js_blocks(page.encode('utf-8')) == blocks
+
+
+def test_write_csv_writes_dataset_regions(tmp_path):
+    data = extractor.TradeDataset(regions=['C0001', 'C0002'])
+    data.update('glSavings', {'C0001': 12.5, 'C0002': 7})
+    config = {'classes': [('5437', 'Carpentry')]}
+    extractor.write_csv(data, tmp_path / 'trade.csv', config, log=lambda message: None)
+    rows = (tmp_path / 'trade.csv').read_text().splitlines()
+    assert [row.split(',')[0] for row in rows[1:]] == ['C0001', 'C0002']
@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from js_es5 import to_es5, unconverted
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('var f = x => x + 1;', 'var f = function(x) { return x + 1; };'),
+    ('list.map((a, b) => { return a; });', 'list.map(function(a, b) { return a; });'),
+    ('pairs.map(([a, b]) => a);', 'pairs.map(function(_ref) { var a = _ref[0], b = _ref[1]; return a; });'),
+    ('const a = 1; let b = 2;', 'var a = 1; var b = 2;'),
+    ('var s = `a ${b} c`;', "var s = 'a ' + b + ' c';"),
+    ('var s = `${a + b}px`;', "var s = '' + (a + b) + 'px';"),
+    ('Math.max(...values);', 'Math.max.apply(Math, values);'),
+    ('f(...args);', 'f.apply(null, args);'),
+    ('var all = [a, ...rest];', 'var all = [].concat([a], rest);'),
+])
+def test_rewrites(source, expected):
+    assert to_es5(source) == expected
+
+
+def test_arrow_body_ends_at_enclosing_conditional():
+    assert to_es5('x = a ? b => 1 : 2;') == 'x = a ? function(b) { return 1; } : 2;'
+    assert to_es5('x = a ? (b) => b ? 1 : 2 : 3;') == 'x = a ? function(b) { return b ? 1 : 2; } : 3;'
+    assert to_es5('x = c ? y : z => 1;') == 'x = c ? y : function(z) { return 1; };'
+
+
+def test_arrow_body_ends_at_line_break():
+    assert to_es5('var f = x => x\nfoo()') == 'var f = function(x) { return x; }\nfoo()'
+
+
+def test_strings_and_comments_untouched():
+    source = "var s = 'x => y'; // const z = `t`\n/* (a) => b */"
+    assert to_es5(source) == source
+
+
+def test_spread_after_other_arguments_is_reported():
+    source = 'f(a, ...b);'
+    assert to_es5(source) == source
+    assert unconverted(source) == [(1, 'spread')]
+
+
+def test_nothing_left_after_conversion():
+    source = 'const f = (a) => `${a}`;\nlet g = [...f(1)].map(x => x ? 1 : 2);'
+    assert unconverted(to_es5(source)) == []
@@ -0,0 +1,73 @@
+import sys
+import pickle
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from page_template import compile_template, js_string, load_template
+from render_trade_pages import trade_context
+from trade_dataset import TradeDataset
+
+
+def render(source, **context):
+    return compile_template(source).render_to_string(context)
+
+
+def test_variables_blocks_and_loops():
+    text = '{% for item in items %}{{ item.name }}{% if not item.last %}, {% endif %}{% endfor %}\n'
+    items = [{'name': 'a', 'last': False}, {'name': 'b', 'last': True}]
+    assert render(text, items=items) == 'a, b\n'
+    assert render('{% if flag %}yes{% else %}no{% endif %}', flag=0) == 'no'
+    assert render('{{ items.1 }}', items=['x', 'y']) == 'y'
+
+
+def test_block_tag_alone_on_line_leaves_no_blank_line():
+    text = 'a\n    {% if flag %}\nb\n    {% endif %}\nc\n'
+    assert render(text, flag=True) == 'a\nb\nc\n'
+
+
+def test_html_filter():
+    assert render('<b>{{ label|e }}</b>', label='Tile & "Stone" <x>') == \
+        '<b>Tile &amp; &quot;Stone&quot; &lt;x&gt;</b>'
+    assert render('{{ label }}', label='a & b') == 'a & b'
+
+
+def test_js_filter():
+    value = "Workers' Comp \\ \"rate\"\n</script>"
+    assert render("'{{ text|js }}'", text=value) == \
+        "'Workers\\' Comp \\\\ \\\"rate\\\"\\n\\u003C/script\\u003E'"
+    assert js_string('\u2028') == '\\u2028'
+
+
+def test_errors():
+    with pytest.raises(ValueError, match='unknown filter'):
+        compile_template('{{ name|upper }}')
+    with pytest.raises(ValueError, match='never closed'):
+        compile_template('{% if name %}')
+    with pytest.raises(KeyError):
+        render('{{ missing }}')
+
+
+def test_compiled_template_pickles():
+    template = pickle.loads(pickle.dumps(compile_template('{{ text|js }}|{{ text|e }}')))
+    assert template.render_to_string({'text': "'<"}) == "\\'\\u003C|&#x27;&lt;"
+
+
+def page(classes, **overrides):
+    data = TradeDataset()
+    data.wc_classes = classes
+    for n, (code, label) in enumerate(classes, 1):
+        data.set('AL', f'wcRate{n}', 4.5)
+    data.set('AL', 'glSavings', 30)
+    context = {**trade_context('carpenter', data), **overrides}
+    return load_template(ROOT / 'trade-page-template.html').render_to_string(context)
+
+
+def test_trade_page_escapes_description_and_labels():
+    html = page([('5437', 'Framing & Trim'), ('5645', '')], wc_description="Workers' Comp rate")
+    assert "descEl.textContent = 'Workers\\' Comp rate';" in html
+    assert '>Class 5437 (Framing &amp; Trim)</button>' in html
+    assert '>Class 5645</button>' in html
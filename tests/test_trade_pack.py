@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from trade_dataset import STATE_CODES, TradeDataset
+from trade_pack import TradePack, write_pack
+
+TRADES = ['carpenter', 'landscaping']
+
+
+def load_datasets():
+    return {trade: TradeDataset.from_csv(ROOT / 'sample-data' / f'{trade}.csv') for trade in TRADES}
+
+
+def test_round_trip_matches_csv(tmp_path):
+    datasets = load_datasets()
+    path = tmp_path / 'trades.pack'
+    assert write_pack(path, datasets)
+    assert not write_pack(path, datasets)
+
+    with TradePack(path) as pack:
+        assert pack.trades == TRADES
+        assert pack.regions == STATE_CODES
+        for trade, expected in datasets.items():
+            assert pack.wc_classes(trade) == expected.wc_classes
+            copy = pack.dataset(trade)
+            for metric in expected.metrics:
+                assert copy.values(metric) == expected.values(metric)
+
+
+def test_column_matches_little_endian_values(tmp_path):
+    datasets = load_datasets()
+    write_pack(tmp_path / 'trades.pack', datasets)
+    with TradePack(tmp_path / 'trades.pack') as pack:
+        column = pack.column('carpenter', 'glSavings')
+        assert list(column) == [pack.get('carpenter', region, 'glSavings', 0.0) for region in STATE_CODES]
+        assert column[0] == datasets['carpenter'].get('AL', 'glSavings')
+
+
+def test_missing_values_are_absent(tmp_path):
+    dataset = TradeDataset()
+    dataset.set('AL', 'glSavings', 12.5)
+    write_pack(tmp_path / 'trades.pack', {'solo': dataset})
+    with TradePack(tmp_path / 'trades.pack') as pack:
+        assert pack.has('solo', 'AL', 'glSavings')
+        assert not pack.has('solo', 'AK', 'glSavings')
+        assert pack.get('solo', 'AK', 'glSavings', None) is None
+        assert pack.dataset('solo').values('glSavings') == {'AL': 12.5}
+
+
+def test_column_released_on_close(tmp_path):
+    write_pack(tmp_path / 'trades.pack', load_datasets())
+    pack = TradePack(tmp_path / 'trades.pack')
+    column = pack.column('carpenter', 'glSavings')
+    pack.close()
+    with pytest.raises(ValueError):
+        column[0]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'trades.pack'
+    path.write_bytes(b'NOPE' + bytes(64))
+    with pytest.raises(ValueError, match='not a trade pack'):
+        TradePack(path)
@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from trade_dataset import STATE_CODES
+from validate_trade_data import expected_header, validate_csv
+
+
+def write_trade(path, rows, wc_count=2):
+    """Write a trade CSV with one row per state; rows maps state -> WC (class, rate) pairs"""
+    lines = [','.join(expected_header(wc_count))]
+    for state in STATE_CODES:
+        cells = [state, '0.5', '1.0', '30', '50']
+        for code, rate in rows.get(state, [('5437', '4.5')] * wc_count):
+            cells += [code, rate, 'Carpentry' if code else '']
+        lines.append(','.join(cells))
+    path.write_text('\n'.join(lines) + '\n')
+    return path
+
+
+def codes(violations):
+    return [(v.line, v.column, v.code) for v in violations]
+
+
+def test_valid_trade(tmp_path):
+    assert validate_csv(write_trade(tmp_path / 'trade.csv', {})) == []
+
+
+def test_rate_without_class_checked_per_row(tmp_path):
+    # Row 2 (AL) has class 2; AK has a rate with no class, AZ has neither
+    rows = {
+        'AL': [('5437', '4.5'), ('5645', '9.1')],
+        'AK': [('5437', '4.5'), ('', '7.2')],
+        'AZ': [('5437', '4.5'), ('', '')],
+    }
+    found = codes(validate_csv(write_trade(tmp_path / 'trade.csv', rows)))
+    assert (3, 'WC_Rate_2', 'inconsistent_wc_class') in found
+    assert (4, 'WC_Rate_2', 'inconsistent_wc_class') not in found
+    assert not any(line == 2 and column == 'WC_Rate_2' for line, column, code in found)
+
+
+def test_rate_without_class_when_first_row_empty(tmp_path):
+    # First row has no class 2 at all; a later row with a class and a rate is fine
+    rows = {state: [('5437', '4.5'), ('', '')] for state in STATE_CODES}
+    rows['AK'] = [('5437', '4.5'), ('5645', '7.2')]
+    rows['AZ'] = [('5437', '4.5'), ('', '3.1')]
+    found = codes(validate_csv(write_trade(tmp_path / 'trade.csv', rows)))
+    assert (4, 'WC_Rate_2', 'inconsistent_wc_class') in found
+    assert (3, 'WC_Rate_2', 'inconsistent_wc_class') not in found
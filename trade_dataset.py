@@ -0,0 +1,156 @@
+"""
+Columnar in-memory dataset for trade insurance metrics
+Shared by CSV extraction, validation and the page build scripts
+
+Each region (state) maps to an integer ordinal. Every metric is stored as one
+contiguous float column (NumPy when installed, array('d') otherwise) with a
+presence bitmap, instead of nested data[state][metric] dicts.
+"""
+
+import csv
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# State codes for all 50 states
+STATE_CODES = [
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
+    'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
+    'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ',
+    'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
+    'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY'
+]
+
+# State code -> ordinal
+STATE_INDEX = {code: i for i, code in enumerate(STATE_CODES)}
+
+# Metrics stored as floats but reported as integers
+INT_METRICS = frozenset(['glCompetitiveness'])
+
+# CSV column -> metric for the fixed GL columns
+GL_CSV_COLUMNS = [
+    ('GL_Premium_Low', 'glPremiumLow'),
+    ('GL_Premium_High', 'glPremiumHigh'),
+    ('GL_Savings', 'glSavings'),
+    ('GL_Competitiveness', 'glCompetitiveness')
+]
+
+
+class TradeDataset:
+    """Metrics for one trade, one float column per metric
+
+    wc_classes holds the (code, label) pair for each WC class; the rate for
+    class n lives in the 'wcRate<n>' column.
+    """
+
+    def __init__(self, regions=STATE_CODES, use_numpy=None):
+        self.regions = list(regions)
+        self.index = STATE_INDEX if regions is STATE_CODES else {r: i for i, r in enumerate(self.regions)}
+        self.use_numpy = (np is not None) if use_numpy is None else (use_numpy and np is not None)
+        self.columns = {}
+        self.presence = {}
+        self.wc_classes = []
+        # Regions with at least one metric set
+        self._any = bytearray((len(self.regions) + 7) // 8)
+
+    def __len__(self):
+        """Number of regions with any data"""
+        return sum(bin(byte).count('1') for byte in self._any)
+
+    def __contains__(self, region):
+        return self.has(region)
+
+    @property
+    def metrics(self):
+        return list(self.columns)
+
+    def _column(self, metric):
+        """Return the column for metric, creating it on first use"""
+        column = self.columns.get(metric)
+        if column is None:
+            size = len(self.regions)
+            column = np.zeros(size, dtype=np.float64) if self.use_numpy else array('d', bytes(8 * size))
+            self.columns[metric] = column
+            self.presence[metric] = bytearray(len(self._any))
+        return column
+
+    def set(self, region, metric, value):
+        """Set one value; raises KeyError for unknown regions"""
+        i = self.index[region]
+        self._column(metric)[i] = float(value)
+        self.presence[metric][i >> 3] |= 1 << (i & 7)
+        self._any[i >> 3] |= 1 << (i & 7)
+
+    def update(self, metric, values):
+        """Set a metric from a {region: value} mapping
+
+        Regions outside the dataset (e.g. DC) are skipped; returns their codes.
+        """
+        skipped = []
+        for region, value in values.items():
+            if region in self.index:
+                self.set(region, metric, value)
+            else:
+                skipped.append(region)
+        return skipped
+
+    def has(self, region, metric=None):
+        """True if region has metric (or any metric when metric is None)"""
+        i = self.index.get(region)
+        if i is None:
+            return False
+        bitmap = self._any if metric is None else self.presence.get(metric)
+        return bitmap is not None and bool(bitmap[i >> 3] & (1 << (i & 7)))
+
+    def get(self, region, metric, default=0):
+        """Return a value, or default if it was never set"""
+        if not self.has(region, metric):
+            return default
+        value = self.columns[metric][self.index[region]]
+        return int(value) if metric in INT_METRICS else float(value)
+
+    def column(self, metric):
+        """Raw float column for metric, indexed by region ordinal"""
+        return self._column(metric)
+
+    def values(self, metric):
+        """{region: value} for every region that has metric"""
+        return {region: self.get(region, metric) for region in self.regions if self.has(region, metric)}
+
+    def to_js_object(self, metric, per_line=5, indent='            '):
+        """Render a metric as the body of a JS object literal (AL: 1.2, AK: ...)"""
+        entries = [f"{region}: {_js_number(value)}" for region, value in self.values(metric).items()]
+        lines = [', '.join(entries[i:i + per_line]) for i in range(0, len(entries), per_line)]
+        return (',\n' + indent).join(lines)
+
+    @classmethod
+    def from_csv(cls, csv_file, **kwargs):
+        """Load a trade CSV (11 columns, plus 3 per extra WC class)"""
+        dataset = cls(**kwargs)
+        with open(csv_file, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            wc_count = (len(reader.fieldnames) - 5) // 3
+            for row in reader:
+                region = row['State'].strip().upper()
+                if region not in dataset.index:
+                    continue
+                for column, metric in GL_CSV_COLUMNS:
+                    if row[column] != '':
+                        dataset.set(region, metric, row[column])
+                for n in range(1, wc_count + 1):
+                    if row[f'WC_Rate_{n}'] != '':
+                        dataset.set(region, f'wcRate{n}', row[f'WC_Rate_{n}'])
+                if not dataset.wc_classes:
+                    dataset.wc_classes = [(row[f'WC_Class_{n}'], row[f'WC_Label_{n}'])
+                                          for n in range(1, wc_count + 1) if row[f'WC_Class_{n}']]
+        return dataset
+
+
+def _js_number(value):
+    """Format a number the way the hand-written pages do (no trailing .0)"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
@@ -0,0 +1,265 @@
+"""
+Packed binary file holding every trade's metrics, with a zero-copy mmap reader
+
+Layout (little-endian, all offsets from the start of the file):
+
+    header      magic 'TMAP', version, trade/region/metric counts,
+                string table offset and size
+    regions     2-byte ASCII code per region, in ordinal order
+    metrics     u32 string offset per metric name
+    trades      per trade: name offset, WC class count, WC table offset,
+                column block offset
+    wc table    per WC class: code offset, label offset
+    columns     per trade, per metric: region_count float64 values
+    presence    per trade, per metric: ceil(region_count / 8) bitmap bytes
+    strings     NUL-terminated UTF-8 strings
+
+Columns are 8-byte aligned, so a reader can hand out memoryviews straight
+into the mapping instead of parsing CSVs. The views are only zero-copy on
+little-endian hosts; big-endian hosts get byte-swapped array('d') copies.
+"""
+
+import sys
+import mmap
+import struct
+from array import array
+
+from trade_dataset import STATE_CODES, GL_CSV_COLUMNS, INT_METRICS, TradeDataset
+
+MAGIC = b'TMAP'
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct('<4sHHHHII')
+TRADE_ENTRY = struct.Struct('<IHHII')
+WC_ENTRY = struct.Struct('<II')
+
+# float64 columns can be viewed in place only when native order matches the file
+LITTLE_ENDIAN_HOST = sys.byteorder == 'little'
+
+
+class _StringTable:
+    """Collects unique strings and their offsets within the table"""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = {}
+
+    def add(self, text):
+        offset = self.offsets.get(text)
+        if offset is None:
+            offset = len(self.data)
+            self.offsets[text] = offset
+            self.data += text.encode('utf-8') + b'\0'
+        return offset
+
+
+def _align(size, to=8):
+    return (size + to - 1) // to * to
+
+
+def pack_metrics(datasets):
+    """Metric order shared by every trade: GL metrics, then wcRate1..N"""
+    wc_count = max([len(d.wc_classes) for d in datasets.values()] + [2])
+    metrics = [metric for column, metric in GL_CSV_COLUMNS]
+    metrics += [f'wcRate{n}' for n in range(1, wc_count + 1)]
+    for dataset in datasets.values():
+        metrics += [m for m in dataset.metrics if m not in metrics]
+    return metrics
+
+
+def build_pack(datasets, regions=STATE_CODES):
+    """Serialize {trade: TradeDataset} into the packed format; returns bytes"""
+    trades = list(datasets)
+    metrics = pack_metrics(datasets)
+    strings = _StringTable()
+    bitmap_size = (len(regions) + 7) // 8
+
+    # Fixed-size sections first so every later offset is known up front
+    offset = HEADER.size + 2 * len(regions) + 4 * len(metrics) + TRADE_ENTRY.size * len(trades)
+    wc_offsets = []
+    for trade in trades:
+        wc_offsets.append(offset)
+        offset += WC_ENTRY.size * len(datasets[trade].wc_classes)
+    offset = _align(offset)
+
+    column_block = 8 * len(regions) * len(metrics)
+    presence_block = bitmap_size * len(metrics)
+    data_offsets = []
+    for trade in trades:
+        data_offsets.append(offset)
+        offset = _align(offset + column_block + presence_block)
+
+    out = bytearray(offset)
+    pos = HEADER.size
+
+    for region in regions:
+        out[pos:pos + 2] = region.encode('ascii')
+        pos += 2
+    for metric in metrics:
+        struct.pack_into('<I', out, pos, strings.add(metric))
+        pos += 4
+
+    for trade, wc_offset, data_offset in zip(trades, wc_offsets, data_offsets):
+        dataset = datasets[trade]
+        TRADE_ENTRY.pack_into(out, pos, strings.add(trade), len(dataset.wc_classes), 0,
+                              wc_offset, data_offset)
+        pos += TRADE_ENTRY.size
+
+        for n, (code, label) in enumerate(dataset.wc_classes):
+            WC_ENTRY.pack_into(out, wc_offset + n * WC_ENTRY.size, strings.add(code), strings.add(label))
+
+        for m, metric in enumerate(metrics):
+            values = array('d', (dataset.get(region, metric, 0.0) for region in regions))
+            if not LITTLE_ENDIAN_HOST:
+                values.byteswap()
+            start = data_offset + m * 8 * len(regions)
+            out[start:start + 8 * len(regions)] = values.tobytes()
+
+            bitmap = bytearray(bitmap_size)
+            for i, region in enumerate(regions):
+                if dataset.has(region, metric):
+                    bitmap[i >> 3] |= 1 << (i & 7)
+            start = data_offset + column_block + m * bitmap_size
+            out[start:start + bitmap_size] = bitmap
+
+    HEADER.pack_into(out, 0, MAGIC, FORMAT_VERSION, len(trades), len(regions), len(metrics),
+                     len(out), len(strings.data))
+    return bytes(out + strings.data)
+
+
+def write_pack(path, datasets, regions=STATE_CODES):
+    """Write the packed file, leaving it untouched if the bytes are identical
+
+    Returns True if the file was (re)written.
+    """
+    packed = build_pack(datasets, regions)
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == packed:
+                return False
+    except FileNotFoundError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(packed)
+    return True
+
+
+class TradePack:
+    """Read-only view of a packed trade file
+
+    Opening costs one mmap and a header parse regardless of trade count.
+    Columns are returned as memoryviews into the mapping, so several
+    processes reading the same file share its pages. close() releases
+    every column view it handed out, so use them before closing (or
+    copy them with list()/bytes()).
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        # Column views (and the slices they were cast from), released on close
+        self._exports = []
+
+        magic, version, n_trades, n_regions, n_metrics, strings_offset, strings_size = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a trade pack file")
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} has unsupported pack version {version}")
+
+        self._strings_offset = strings_offset
+        pos = HEADER.size
+
+        self.regions = [bytes(self._mmap[pos + 2 * i:pos + 2 * i + 2]).decode('ascii') for i in range(n_regions)]
+        self.region_index = {region: i for i, region in enumerate(self.regions)}
+        pos += 2 * n_regions
+
+        self.metrics = [self._string(struct.unpack_from('<I', self._mmap, pos + 4 * i)[0]) for i in range(n_metrics)]
+        self.metric_index = {metric: i for i, metric in enumerate(self.metrics)}
+        pos += 4 * n_metrics
+
+        self._trades = {}
+        for i in range(n_trades):
+            name, wc_count, _, wc_offset, data_offset = TRADE_ENTRY.unpack_from(self._mmap, pos + i * TRADE_ENTRY.size)
+            self._trades[self._string(name)] = (wc_count, wc_offset, data_offset)
+
+        self._bitmap_size = (n_regions + 7) // 8
+
+    def close(self):
+        """Release every column view, then unmap the file"""
+        for view in reversed(self._exports):
+            view.release()
+        self._exports = []
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _string(self, offset):
+        start = self._strings_offset + offset
+        end = self._mmap.find(b'\0', start)
+        return self._mmap[start:end].decode('utf-8')
+
+    @property
+    def trades(self):
+        return list(self._trades)
+
+    def wc_classes(self, trade):
+        """[(code, label), ...] for a trade"""
+        wc_count, wc_offset, data_offset = self._trades[trade]
+        classes = []
+        for n in range(wc_count):
+            code, label = WC_ENTRY.unpack_from(self._mmap, wc_offset + n * WC_ENTRY.size)
+            classes.append((self._string(code), self._string(label)))
+        return classes
+
+    def column(self, trade, metric):
+        """Zero-copy float64 memoryview of one metric, indexed by region ordinal
+
+        On a big-endian host the column is copied into a byte-swapped
+        array('d') instead, since a cast view would read the bytes in
+        native order.
+        """
+        wc_count, wc_offset, data_offset = self._trades[trade]
+        start = data_offset + self.metric_index[metric] * 8 * len(self.regions)
+        raw = self._view[start:start + 8 * len(self.regions)]
+        if not LITTLE_ENDIAN_HOST:
+            column = array('d', raw.tobytes())
+            raw.release()
+            column.byteswap()
+            return column
+        column = raw.cast('d')
+        self._exports += (raw, column)
+        return column
+
+    def has(self, trade, region, metric):
+        wc_count, wc_offset, data_offset = self._trades[trade]
+        i = self.region_index[region]
+        start = data_offset + 8 * len(self.regions) * len(self.metrics)
+        byte = self._mmap[start + self.metric_index[metric] * self._bitmap_size + (i >> 3)]
+        return bool(byte & (1 << (i & 7)))
+
+    def get(self, trade, region, metric, default=0):
+        if metric not in self.metric_index or not self.has(trade, region, metric):
+            return default
+        wc_count, wc_offset, data_offset = self._trades[trade]
+        start = data_offset + (self.metric_index[metric] * len(self.regions) + self.region_index[region]) * 8
+        value = struct.unpack_from('<d', self._mmap, start)[0]
+        return int(value) if metric in INT_METRICS else value
+
+    def dataset(self, trade):
+        """Copy one trade into a TradeDataset"""
+        dataset = TradeDataset(self.regions)
+        dataset.wc_classes = self.wc_classes(trade)
+        for metric in self.metrics:
+            for region in self.regions:
+                if self.has(trade, region, metric):
+                    dataset.set(region, metric, self.get(trade, region, metric))
+        return dataset
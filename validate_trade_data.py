@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Validate trade CSV files before uploading them to WordPress
+
+Mirrors Insurance_Maps_Data_Manager::validate_csv_row in the plugin, plus
+checks the plugin cannot make one row at a time: GL low <= high across the
+trade, decimal column limits of the insurance_map_data table, all 50 states
+present, and one consistent set of WC classes per trade.
+
+Checks run a whole column at a time and every violation is reported, instead
+of stopping at the first bad row like the admin upload does.
+
+Usage:
+    python3 validate_trade_data.py sample-data/*.csv
+"""
+
+import re
+import sys
+import csv
+from collections import namedtuple
+
+from trade_dataset import STATE_CODES, np
+
+Violation = namedtuple('Violation', ['line', 'column', 'code', 'message'])
+
+# Same as PHP is_numeric() for the values we accept
+NUMERIC_RE = re.compile(r'^\s*[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?\s*$')
+STATE_RE = re.compile(r'^[A-Z]{2}$')
+
+# (column, label, min, max) - validate_csv_row ranges
+GL_RANGES = [
+    ('GL_Premium_Low', 'GL Premium', 0, 100),
+    ('GL_Premium_High', 'GL Premium', 0, 100),
+    ('GL_Savings', 'GL Savings', 0, 100),
+    ('GL_Competitiveness', 'GL Competitiveness', 0, 100),
+]
+WC_RATE_RANGE = (0, 1000)
+
+# (digits, places) of the insurance_map_data decimal columns
+DECIMAL_LIMITS = {
+    'GL_Premium_Low': (4, 2),
+    'GL_Premium_High': (4, 2),
+    'GL_Savings': (5, 2),
+    'WC_Rate': (5, 2),
+}
+
+MAX_LABEL_LENGTH = 50
+MAX_CLASS_LENGTH = 10
+
+
+def read_columns(csv_file):
+    """Read a CSV into (header, line_numbers, {column: [text, ...]})
+
+    Rows with an empty first cell are skipped, as the plugin does.
+    Rows with the wrong column count are returned separately.
+    """
+    with open(csv_file, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        lines = []
+        bad_rows = []
+        cells = [[] for _ in header]
+        for line_number, row in enumerate(reader, 2):
+            if not row or not row[0]:
+                continue
+            if len(row) != len(header):
+                bad_rows.append((line_number, len(row)))
+                continue
+            lines.append(line_number)
+            for i, value in enumerate(row):
+                cells[i].append(value)
+    return header, lines, bad_rows, dict(zip(header, cells))
+
+
+def _to_floats(values):
+    """Column of text -> float column (PHP floatval semantics for '')"""
+    floats = [float(v) if NUMERIC_RE.match(v) else 0.0 for v in values]
+    return np.array(floats, dtype=np.float64) if np is not None else floats
+
+
+def _where(column, predicate_np, predicate_py):
+    """Row indexes where the predicate holds, vectorized when NumPy is available"""
+    if np is not None:
+        return np.nonzero(predicate_np(column))[0].tolist()
+    return [i for i, value in enumerate(column) if predicate_py(value)]
+
+
+def _out_of_range(column, low, high):
+    return _where(column,
+                  lambda c: (c < low) | (c > high),
+                  lambda v: v < low or v > high)
+
+
+def _greater(a, b):
+    """Row indexes where a > b"""
+    if np is not None:
+        return np.nonzero(a > b)[0].tolist()
+    return [i for i, (x, y) in enumerate(zip(a, b)) if x > y]
+
+
+def _over_limit(column, digits, places):
+    """Rows that would overflow or be rounded by a decimal(digits, places) column"""
+    limit = 10 ** (digits - places) - 10 ** -places
+    scale = 10 ** places
+    return _where(column,
+                  lambda c: (np.abs(c) > limit + 1e-9) | (np.abs(np.round(c * scale) - c * scale) > 1e-6),
+                  lambda v: abs(v) > limit + 1e-9 or abs(round(v * scale) - v * scale) > 1e-6)
+
+
+def expected_header(wc_count):
+    header = ['State', 'GL_Premium_Low', 'GL_Premium_High', 'GL_Savings', 'GL_Competitiveness']
+    for n in range(1, wc_count + 1):
+        header += [f'WC_Class_{n}', f'WC_Rate_{n}', f'WC_Label_{n}']
+    return header
+
+
+def validate_csv(csv_file, partial=False):
+    """Return every Violation found in one trade CSV
+
+    partial=True is for delta files holding only some states: the all-states
+    check is skipped.
+    """
+    header, lines, bad_rows, columns = read_columns(csv_file)
+    violations = []
+
+    # Header: 11 columns, plus 3 per additional WC class
+    wc_count = (len(header) - 5) // 3
+    if len(header) < 11 or (len(header) - 5) % 3 != 0 or header != expected_header(wc_count):
+        violations.append(Violation(1, None, 'invalid_format',
+                                    'Invalid CSV format. Expected headers: ' + ', '.join(expected_header(max(2, wc_count)))))
+        return violations
+
+    for line_number, count in bad_rows:
+        violations.append(Violation(line_number, None, 'invalid_columns',
+                                    f'Line {line_number}: Expected {len(header)} columns, found {count}'))
+
+    # State codes
+    states = [value.strip().upper() for value in columns['State']]
+    for i, state in enumerate(states):
+        if not STATE_RE.match(state):
+            violations.append(Violation(lines[i], 'State', 'invalid_state',
+                                        f'Line {lines[i]}: Invalid state code "{columns["State"][i]}"'))
+
+    seen = {}
+    for i, state in enumerate(states):
+        if state in seen:
+            violations.append(Violation(lines[i], 'State', 'duplicate_state',
+                                        f'Line {lines[i]}: Duplicate state {state} (first on line {seen[state]})'))
+        else:
+            seen[state] = lines[i]
+
+    missing = [state for state in STATE_CODES if state not in seen]
+    if missing and not partial:
+        violations.append(Violation(None, 'State', 'missing_state',
+                                    'Missing states: ' + ', '.join(missing)))
+
+    # Numeric columns (GL columns and every WC rate)
+    numeric_columns = [column for column, label, low, high in GL_RANGES]
+    numeric_columns += [f'WC_Rate_{n}' for n in range(1, wc_count + 1)]
+    for column in numeric_columns:
+        for i, value in enumerate(columns[column]):
+            if value != '' and not NUMERIC_RE.match(value):
+                violations.append(Violation(lines[i], column, 'invalid_number',
+                                            f'Line {lines[i]}: Column {header.index(column) + 1} must be numeric'))
+
+    floats = {column: _to_floats(columns[column]) for column in numeric_columns}
+
+    # Ranges
+    for column, label, low, high in GL_RANGES:
+        for i in _out_of_range(floats[column], low, high):
+            violations.append(Violation(lines[i], column, 'invalid_range',
+                                        f'Line {lines[i]}: {label} must be between {low} and {high}'))
+
+    for n in range(1, wc_count + 1):
+        for i in _out_of_range(floats[f'WC_Rate_{n}'], *WC_RATE_RANGE):
+            violations.append(Violation(lines[i], f'WC_Rate_{n}', 'invalid_range',
+                                        f'Line {lines[i]}: WC Rate {n} must be between {WC_RATE_RANGE[0]} and {WC_RATE_RANGE[1]}'))
+
+    # Cross-field: low <= high
+    for i in _greater(floats['GL_Premium_Low'], floats['GL_Premium_High']):
+        violations.append(Violation(lines[i], 'GL_Premium_Low', 'invalid_range',
+                                    f'Line {lines[i]}: GL Premium Low cannot be greater than High'))
+
+    # Database column limits
+    for column in numeric_columns:
+        digits, places = DECIMAL_LIMITS['WC_Rate' if column.startswith('WC_Rate_') else column] \
+            if column in DECIMAL_LIMITS or column.startswith('WC_Rate_') else (None, None)
+        if digits is None:
+            continue
+        for i in _over_limit(floats[column], digits, places):
+            violations.append(Violation(lines[i], column, 'invalid_precision',
+                                        f'Line {lines[i]}: {column} value {columns[column][i]} does not fit decimal({digits},{places})'))
+
+    for i in _where(floats['GL_Competitiveness'],
+                    lambda c: c != np.floor(c),
+                    lambda v: v != int(v)):
+        violations.append(Violation(lines[i], 'GL_Competitiveness', 'invalid_precision',
+                                    f'Line {lines[i]}: GL Competitiveness must be a whole number'))
+
+    # WC classes must be the same on every row of a trade
+    for n in range(1, wc_count + 1):
+        for field, limit in ((f'WC_Class_{n}', MAX_CLASS_LENGTH), (f'WC_Label_{n}', MAX_LABEL_LENGTH)):
+            values = columns[field]
+            if not values:
+                continue
+            expected = values[0]
+            for i, value in enumerate(values):
+                if value != expected:
+                    violations.append(Violation(lines[i], field, 'inconsistent_wc_class',
+                                                f'Line {lines[i]}: {field} is "{value}" but line {lines[0]} has "{expected}"'))
+                if len(value) > limit:
+                    violations.append(Violation(lines[i], field, 'invalid_length',
+                                                f'Line {lines[i]}: {field} longer than {limit} characters'))
+
+        # Rates without a class code would be imported but never shown
+        classes = columns[f'WC_Class_{n}']
+        for i in _where(floats[f'WC_Rate_{n}'], lambda c: c != 0, lambda v: v != 0):
+            if not classes[i]:
+                violations.append(Violation(lines[i], f'WC_Rate_{n}', 'inconsistent_wc_class',
+                                            f'Line {lines[i]}: WC Rate {n} is set but WC_Class_{n} is empty'))
+
+    violations.sort(key=lambda v: (v.line is None, v.line or 0))
+    return violations
+
+
+def main(argv=None):
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths:
+        print("Usage: validate_trade_data.py FILE.csv [FILE.csv ...]")
+        return 2
+
+    failed = 0
+    for path in paths:
+        violations = validate_csv(path)
+        if violations:
+            failed += 1
+            print(f"✗ {path}: {len(violations)} problem(s)")
+            for violation in violations:
+                print(f"  [{violation.code}] {violation.message}")
+        else:
+            print(f"✓ {path}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+Watch source files and re-run only the build stages whose inputs changed
+
+Each stage is one of the existing scripts with the files it reads and writes.
+A stage whose outputs feed another stage's inputs (e.g. sample-data/*.csv)
+forms an edge, so editing final-carpenter.html re-runs the extractor and then
+wordpress-final-working.py, and nothing else.
+
+Uses inotify on Linux and falls back to polling file stats elsewhere.
+--build and --once judge a stage out of date by the digest of its inputs
+at its last successful run (.build-cache/watch-state.json), so stages that
+leave unchanged outputs alone are not re-run on every start.
+
+Usage:
+    python3 watch.py            # watch and rebuild on change
+    python3 watch.py --build    # first run stages whose outputs are out of date
+    python3 watch.py --once     # only run out-of-date stages, then exit
+    python3 watch.py --list     # show stages and dependencies
+"""
+
+import os
+import sys
+import json
+import time
+import ctypes
+import hashlib
+import select
+import struct
+import argparse
+import subprocess
+import ctypes.util
+from fnmatch import fnmatch
+from collections import namedtuple
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# stdout: file the script's printed output is written to, for scripts that print
+# args: extra command-line arguments for the script
+Stage = namedtuple('Stage', ['name', 'script', 'inputs', 'outputs', 'stdout', 'args'], defaults=((),))
+
+# Input digest of each stage's last successful run
+STATE_FILE = Path('.build-cache/watch-state.json')
+
+WORDPRESS_BLOCK_INPUTS = ['final-*.html', 'sample-data/*.csv', 'wordpress_transforms.py', 'js_es5.py', 'svg_reader.py',
+                          'trade_dataset.py', 'build_trace.py', 'minify_html.py', 'shared_styles.py', 'svg_path.py',
+                          'path_geometry.py']
+
+STAGES = [
+    Stage('extract', 'extract-csv-data.py',
+          ['final-*.html', 'trade_dataset.py', 'validate_trade_data.py', 'trade_pack.py', 'wxr_source.py',
+           'build_trace.py'],
+          ['sample-data/*.csv'], None),
+    Stage('svg-paths', 'process_svg.py',
+          ['US_Map.svg', 'svg_reader.py', 'geometry_cache.py'],
+          ['processed-states.txt'], 'processed-states.txt'),
+    Stage('extract-svg', 'extract_svg.py',
+          ['carpenter copy.html', 'svg_reader.py', 'geometry_cache.py'],
+          ['cleaned_svg.txt'], None),
+    Stage('wordpress-ready', 'make_wordpress_version.py',
+          ['carpenter copy.html'],
+          ['wordpress-ready.html'], None),
+    Stage('wordpress-final', 'fix_for_wordpress.py',
+          ['carpenter copy.html', 'build_trace.py', 'wordpress_transforms.py', 'js_es5.py'],
+          ['wordpress-final.html'], None),
+    Stage('wordpress-proper', 'create_wordpress_proper.py',
+          ['carpenter copy.html'],
+          ['wordpress-proper.html'], None),
+    Stage('wordpress-complete', 'create_wordpress_complete.py',
+          ['carpenter copy.html', 'build_trace.py', 'svg_reader.py', 'geometry_cache.py'],
+          ['wordpress-complete.html'], None),
+    Stage('wordpress-exact-match', 'wordpress-exact-match.py',
+          ['carpenter copy.html', 'build_trace.py', 'svg_reader.py', 'geometry_cache.py'],
+          ['wordpress-exact-match.html'], None),
+    Stage('wordpress-hidden-svg', 'wordpress-hidden-svg.py',
+          ['carpenter copy.html', 'build_trace.py', 'svg_reader.py', 'geometry_cache.py'],
+          ['wordpress-hidden-svg.html'], None),
+    Stage('wordpress-final-working', 'wordpress-final-working.py',
+          ['carpenter copy.html', 'wordpress-es5-safe.html', 'trade_dataset.py', 'svg_reader.py', 'geometry_cache.py'],
+          ['wordpress-final-working.html'], None),
+    Stage('lod-maps', 'build_lod_maps.py',
+          ['processed-states.txt', 'plugin/templates/svg-map.html', 'svg_path.py', 'path_geometry.py', 'map_topology.py'],
+          ['plugin/templates/svg-map-lod.html', 'plugin/assets/maps/map-*.json', 'plugin/assets/maps/levels.json'], None),
+    Stage('geometry-index', 'build_geometry_index.py',
+          ['processed-states.txt', 'svg_path.py', 'path_geometry.py', 'map_topology.py', 'map_geometry.py', 'build_lod_maps.py'],
+          ['plugin/assets/maps/geometry.json'], None),
+    Stage('wordpress-blocks', 'build_engine.py', WORDPRESS_BLOCK_INPUTS,
+          ['build/wordpress/*.html'], None),
+    Stage('wordpress-blocks-production', 'build_engine.py', WORDPRESS_BLOCK_INPUTS,
+          ['build/wordpress-production/*.html'], None, ['--profile', 'production']),
+    Stage('wordpress-blocks-shared', 'build_engine.py', WORDPRESS_BLOCK_INPUTS,
+          ['build/wordpress-shared/*.html', 'plugin/assets/css/trade-maps-shared.*.css',
+           'plugin/assets/css/shared-styles.json'], None, ['--shared-css', '--output', 'build/wordpress-shared']),
+    Stage('trade-pages', 'render_trade_pages.py',
+          ['trade-page-template.html', 'sample-data/*.csv', 'page_template.py', 'build_engine.py', 'trade_dataset.py',
+           'trade_pack.py', 'build_trace.py'],
+          ['build/pages/*.html'], None),
+    Stage('production', 'minify_html.py',
+          ['wordpress-*.html', 'final-*.html', 'js_es5.py', 'svg_path.py', 'path_geometry.py'],
+          ['build/production/*.html'], None),
+]
+
+DEBOUNCE = 0.05
+
+
+def stage_inputs(stage):
+    """Input patterns, including the stage's own script"""
+    return [stage.script] + stage.inputs
+
+
+def _overlaps(a, b):
+    """True if two path patterns can name the same file"""
+    return fnmatch(a, b) or fnmatch(b, a)
+
+
+def build_graph(stages):
+    """{stage name: [names of stages that read its outputs]}"""
+    graph = {stage.name: [] for stage in stages}
+    for producer in stages:
+        for consumer in stages:
+            if consumer is producer:
+                continue
+            if any(_overlaps(out, inp) for out in producer.outputs for inp in stage_inputs(consumer)):
+                graph[producer.name].append(consumer.name)
+    return graph
+
+
+def affected_stages(stages, graph, changed, stale=()):
+    """Stages to run for a set of changed paths (plus stale stage names), in dependency order"""
+    by_name = {stage.name: stage for stage in stages}
+    dirty = {stage.name for stage in stages
+             if any(fnmatch(path, pattern) for path in changed for pattern in stage_inputs(stage))}
+    dirty |= set(stale)
+
+    pending = list(dirty)
+    while pending:
+        for name in graph[pending.pop()]:
+            if name not in dirty:
+                dirty.add(name)
+                pending.append(name)
+
+    # Topological order, ties broken by STAGES order
+    ordered = []
+    visited = set()
+
+    def visit(name):
+        if name in visited:
+            return
+        visited.add(name)
+        for stage in stages:
+            if name in graph[stage.name] and stage.name in dirty:
+                visit(stage.name)
+        ordered.append(by_name[name])
+
+    for stage in stages:
+        if stage.name in dirty:
+            visit(stage.name)
+    return ordered
+
+
+def _expand(patterns):
+    paths = []
+    for pattern in patterns:
+        paths.extend(sorted(ROOT.glob(pattern)))
+    return paths
+
+
+def load_state(state_file=STATE_FILE):
+    try:
+        with open(ROOT / state_file, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(state, state_file=STATE_FILE):
+    path = ROOT / state_file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def input_digest(stage):
+    """sha256 over the stage's arguments and the names and contents of its inputs"""
+    digest = hashlib.sha256('\0'.join(stage.args).encode())
+    for path in _expand(stage_inputs(stage)):
+        digest.update(path.relative_to(ROOT).as_posix().encode() + b'\0')
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def is_stale(stage, state):
+    """True if an output is missing or the inputs changed since the last run
+
+    Scripts such as the extractor leave unchanged outputs alone, so their
+    mtimes say nothing; a stage watch has run before is judged by the digest
+    of its inputs. Other stages fall back to the make-style mtime check.
+    """
+    outputs = _expand(stage.outputs)
+    if not outputs:
+        return True
+    if stage.name in state:
+        return state[stage.name] != input_digest(stage)
+    newest_input = max((p.stat().st_mtime_ns for p in _expand(stage_inputs(stage))), default=0)
+    return newest_input > min(p.stat().st_mtime_ns for p in outputs)
+
+
+def run_stage(stage, state=None):
+    """Run one stage's script; returns True on success
+
+    On success the stage's input digest is recorded in state (and saved).
+    """
+    start = time.perf_counter()
+    digest = input_digest(stage) if state is not None else None
+    stdout = open(ROOT / stage.stdout, 'w') if stage.stdout else subprocess.DEVNULL
+    try:
+        result = subprocess.run([sys.executable, stage.script, *stage.args], cwd=ROOT,
+                                stdout=stdout, stderr=subprocess.PIPE, text=True)
+    finally:
+        if stage.stdout:
+            stdout.close()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if result.returncode == 0:
+        print(f"✓ {stage.name} ({elapsed:.0f} ms)")
+        if state is not None:
+            state[stage.name] = digest
+            save_state(state)
+        return True
+    print(f"✗ {stage.name} failed (exit {result.returncode}, {elapsed:.0f} ms)")
+    if result.stderr.strip():
+        print('  ' + result.stderr.strip().replace('\n', '\n  '))
+    return False
+
+
+def _stat_outputs(stage):
+    state = {}
+    for path in _expand(stage.outputs):
+        stat = path.stat()
+        state[path.relative_to(ROOT).as_posix()] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def run_stages(stages, graph, changed, state=None, stale=()):
+    """Run stages in order for a set of changed paths
+
+    Stages named in stale always run. A downstream stage only runs if an
+    upstream stage actually rewrote one of its inputs (the extractor, for
+    one, leaves unchanged CSVs alone), and is skipped if an upstream stage
+    failed. Returns True if nothing failed.
+    """
+    changed = set(changed)
+    failed = set()
+    for stage in stages:
+        upstream = [name for name, consumers in graph.items() if stage.name in consumers]
+        if any(name in failed for name in upstream):
+            print(f"⚠ {stage.name} skipped (input stage failed)")
+            failed.add(stage.name)
+            continue
+        if stage.name not in stale and \
+                not any(fnmatch(path, pattern) for path in changed for pattern in stage_inputs(stage)):
+            continue
+        before = _stat_outputs(stage)
+        if not run_stage(stage, state):
+            failed.add(stage.name)
+        after = _stat_outputs(stage)
+        changed |= {path for path in before.keys() | after.keys() if before.get(path) != after.get(path)}
+    return not failed
+
+
+class InotifyWatcher:
+    """Directory watches via the Linux inotify API (ctypes, no dependencies)"""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_DELETE = 0x200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches = {}
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_DELETE
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(ROOT / directory), mask)
+            if wd >= 0:
+                self.watches[wd] = directory
+
+    def _read(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self.fd, 65536)
+        changed = set()
+        pos = 0
+        while pos < len(data):
+            wd, mask, cookie, length = self.EVENT.unpack_from(data, pos)
+            pos += self.EVENT.size
+            name = data[pos:pos + length].rstrip(b'\0').decode('utf-8', 'replace')
+            pos += length
+            directory = self.watches.get(wd)
+            if directory is not None and name:
+                changed.add(name if directory == '.' else f"{directory}/{name}")
+        return changed
+
+    def wait(self, timeout=None):
+        """Block until something changes; returns the changed relative paths"""
+        changed = self._read(timeout)
+        # Editors often write a file in several steps; collect the burst
+        while changed:
+            more = self._read(DEBOUNCE)
+            if not more:
+                break
+            changed |= more
+        return changed
+
+    def drain(self):
+        return self._read(0)
+
+
+class PollingWatcher:
+    """Fallback: compare (mtime, size) of the watched files"""
+
+    def __init__(self, patterns, interval=0.25):
+        self.patterns = patterns
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        state = {}
+        for path in _expand(self.patterns):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            state[path.relative_to(ROOT).as_posix()] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def _changes(self):
+        current = self._scan()
+        changed = {path for path in current.keys() | self.snapshot.keys()
+                   if current.get(path) != self.snapshot.get(path)}
+        self.snapshot = current
+        return changed
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self._changes()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def drain(self):
+        return self._changes()
+
+
+def make_watcher(stages, force_polling=False, interval=0.25):
+    patterns = sorted({pattern for stage in stages for pattern in stage_inputs(stage)})
+    if not force_polling and sys.platform.startswith('linux'):
+        directories = sorted({Path(pattern).parent.as_posix() for pattern in patterns})
+        try:
+            return InotifyWatcher([d for d in directories if (ROOT / d).is_dir()]), 'inotify'
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(patterns, interval), 'polling'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild generated files when their sources change')
+    parser.add_argument('--build', action='store_true',
+                        help='Run out-of-date stages before watching')
+    parser.add_argument('--once', action='store_true',
+                        help='Run out-of-date stages and exit')
+    parser.add_argument('--list', action='store_true',
+                        help='Print the stages and their dependencies and exit')
+    parser.add_argument('--poll', action='store_true',
+                        help='Poll file stats instead of using inotify')
+    parser.add_argument('--interval', type=float, default=0.25,
+                        help='Polling interval in seconds (default: 0.25)')
+    args = parser.parse_args()
+
+    graph = build_graph(STAGES)
+
+    if args.list:
+        for stage in STAGES:
+            print(f"{stage.name}: {' '.join([stage.script, *stage.args])}")
+            print(f"  in:  {', '.join(stage.inputs)}")
+            print(f"  out: {', '.join(stage.outputs)}")
+            if graph[stage.name]:
+                print(f"  → {', '.join(graph[stage.name])}")
+        return
+
+    state = load_state()
+
+    if args.build or args.once:
+        stale = {stage.name for stage in STAGES if is_stale(stage, state)}
+        # Stages downstream of a stale stage run if it rewrites their inputs
+        todo = affected_stages(STAGES, graph, set(), stale)
+        if todo:
+            run_stages(todo, graph, set(), state, stale)
+        else:
+            print("= Everything up to date")
+        if args.once:
+            return
+
+    watcher, kind = make_watcher(STAGES, args.poll, args.interval)
+    print(f"Watching {len(STAGES)} stages ({kind}). Press Ctrl+C to stop.\n")
+
+    try:
+        while True:
+            changed = watcher.wait()
+            while changed:
+                todo = affected_stages(STAGES, graph, changed)
+                if not todo:
+                    break
+                relevant = [path for path in sorted(changed)
+                            if any(fnmatch(path, pattern) for stage in todo for pattern in stage_inputs(stage))]
+                print(f"Changed: {', '.join(relevant)}")
+                start = time.perf_counter()
+                run_stages(todo, graph, changed, state)
+                print(f"  rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+                # Our own outputs were rebuilt in order above; only react to other edits
+                outputs = [pattern for stage in todo for pattern in stage.outputs]
+                changed = {path for path in watcher.drain()
+                           if not any(fnmatch(path, pattern) for pattern in outputs)}
+    except KeyboardInterrupt:
+        print("\nStopped.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,26 @@
 #!/usr/bin/env python3
 
-import re
+import build_trace
+import geometry_cache
 
-print("Creating exact WordPress match version...")
+build_trace.from_argv()
 
-# Read carpenter copy.html to get the exact styles and layout
-with open('carpenter copy.html', 'r') as f:
-    carpenter_content = f.read()
+print("Creating exact WordPress match version...")
 
-# Extract the exact SVG
-svg_match = re.search(r'<svg.*?</svg>', carpenter_content, re.DOTALL)
-if not svg_match:
+# The exact SVG from carpenter copy.html, inline event handlers removed
+with build_trace.span('read', 'carpenter copy.html') as span:
+    geometry = geometry_cache.load('carpenter copy.html')
+    span.bytes = len(geometry.svg) if geometry else 0
+if geometry is None:
     print("ERROR: Could not find SVG")
     exit(1)
-
-real_svg = svg_match.group(0)
-
-# Remove inline event handlers
-real_svg = re.sub(r'\s+onclick="[^"]*"', '', real_svg)
-real_svg = re.sub(r'\s+onmouseover="[^"]*"', '', real_svg)
-real_svg = re.sub(r'\s+onmouseout="[^"]*"', '', real_svg)
+real_svg = geometry.svg
 
 state_count = real_svg.count('id="state-')
 print(f"Extracted SVG with {state_count} states")
 
 # Create the exact match HTML
+step = build_trace.span('transform', 'assemble page')
 html_content = '''<!DOCTYPE html>
 <html>
 <head>
@@ -441,12 +437,12 @@ html_content = '''<!DOCTYPE html>
         wcRate5437: {
             label: 'WC Rate per $100 (Class 5437)',
             format: function(val) { return '$' + val.toFixed(2); },
-            description: 'Workers\' Comp rate for Class Code 5437 (Carpentry-framing)'
+            description: 'Workers\\' Comp rate for Class Code 5437 (Carpentry-framing)'
         },
         wcRate5645: {
             label: 'WC Rate per $100 (Class 5645)',
             format: function(val) { return '$' + val.toFixed(2); },
-            description: 'Workers\' Comp rate for Class Code 5645 (Carpentry-interior)'
+            description: 'Workers\\' Comp rate for Class Code 5645 (Carpentry-interior)'
         }
     };
     
@@ -680,9 +676,12 @@ html_content = '''<!DOCTYPE html>
 </body>
 </html>'''
 
+step.end(bytes=len(html_content))
+
 # Save the file
-with open('wordpress-exact-match.html', 'w', encoding='utf-8') as f:
+with build_trace.span('write', 'wordpress-exact-match.html') as span, open('wordpress-exact-match.html', 'w', encoding='utf-8') as f:
     f.write(html_content)
+    span.bytes = len(html_content)
 
 print("\n✅ Created wordpress-exact-match.html")
 print("\nThis version exactly matches the original with:")
@@ -1,30 +1,26 @@
 #!/usr/bin/env python3
 
-import re
+import build_trace
+import geometry_cache
 
-print("Creating WordPress version with hidden SVG approach...")
+build_trace.from_argv()
 
-# Read the carpenter copy.html to get the real SVG
-with open('carpenter copy.html', 'r') as f:
-    carpenter_content = f.read()
+print("Creating WordPress version with hidden SVG approach...")
 
-# Extract the real SVG
-svg_match = re.search(r'<svg.*?</svg>', carpenter_content, re.DOTALL)
-if not svg_match:
+# The real SVG from carpenter copy.html, inline event handlers removed
+with build_trace.span('read', 'carpenter copy.html') as span:
+    geometry = geometry_cache.load('carpenter copy.html')
+    span.bytes = len(geometry.svg) if geometry else 0
+if geometry is None:
     print("ERROR: Could not find SVG in carpenter copy.html")
     exit(1)
-
-real_svg = svg_match.group(0)
-
-# Remove all inline event handlers
-real_svg = re.sub(r'\s+onclick="[^"]*"', '', real_svg)
-real_svg = re.sub(r'\s+onmouseover="[^"]*"', '', real_svg)
-real_svg = re.sub(r'\s+onmouseout="[^"]*"', '', real_svg)
+real_svg = geometry.svg
 
 state_count = real_svg.count('id="state-')
 print(f"Extracted SVG with {state_count} states")
 
 # Create the HTML with hidden SVG
+step = build_trace.span('transform', 'assemble page')
 html_content = '''<!DOCTYPE html>
 <html>
 <head>
@@ -439,9 +435,12 @@ html_content = '''<!DOCTYPE html>
 </body>
 </html>'''
 
+step.end(bytes=len(html_content))
+
 # Save the file
-with open('wordpress-hidden-svg.html', 'w', encoding='utf-8') as f:
+with build_trace.span('write', 'wordpress-hidden-svg.html') as span, open('wordpress-hidden-svg.html', 'w', encoding='utf-8') as f:
     f.write(html_content)
+    span.bytes = len(html_content)
 
 print("\n✅ Created wordpress-hidden-svg.html")
 print("\nThis version:")
@@ -0,0 +1,185 @@
+"""
+Page transforms shared by the WordPress build scripts
+
+Each function takes page text and returns the transformed text, so
+fix_for_wordpress.py and build_engine.py run the same steps:
+
+    strip_inline_handlers   WordPress strips on* attributes from Custom HTML
+    to_es5                  inline scripts down-levelled to ES5 by js_es5
+    add_wordpress_init      event delegation + DOM-ready layer (carpenter copy.html)
+    wrap_scripts_iife       each <script> in a strict IIFE unless already wrapped
+    wordpress_block         the part of a page between the COPY markers
+"""
+
+import re
+
+import js_es5
+
+INLINE_HANDLERS = ('onclick', 'onmouseover', 'onmouseout', 'onload')
+
+SCRIPT_END_RE = re.compile(r'(</script>)')
+SCRIPT_RE = re.compile(r'<script>(.*?)</script>', re.DOTALL)
+INLINE_SCRIPT_RE = re.compile(r'(<script\b[^>]*>)(.*?)(</script>)', re.DOTALL)
+SCRIPT_TYPE_RE = re.compile(r'\btype=["\']?([^"\'\s>]+)', re.IGNORECASE)
+
+BLOCK_START_RE = re.compile(r'<!-- =+ -->\s*<!-- COPY EVERYTHING BELOW THIS LINE INTO WORDPRESS -->\s*<!-- =+ -->\s*')
+BLOCK_END_RE = re.compile(r'\s*<!-- =+ -->\s*<!-- COPY EVERYTHING ABOVE THIS LINE INTO WORDPRESS -->')
+
+
+def strip_inline_handlers(content, handlers=INLINE_HANDLERS):
+    """Remove on*="..." attributes, one pass per handler"""
+    for handler in handlers:
+        content = re.sub(r'\s+' + handler + r'="[^"]*"', '', content)
+    return content
+
+
+def _inline_js(open_tag):
+    """True for <script> tags holding inline JavaScript (no src, no JSON/template type)"""
+    if 'src=' in open_tag:
+        return False
+    found = SCRIPT_TYPE_RE.search(open_tag)
+    return not found or 'javascript' in found.group(1) or found.group(1) == 'module'
+
+
+def to_es5(content):
+    """Down-level every inline <script> to ES5 (see js_es5); markup is left alone"""
+    def convert(match):
+        if not _inline_js(match.group(1)):
+            return match.group(0)
+        return match.group(1) + js_es5.to_es5(match.group(2)) + match.group(3)
+    return INLINE_SCRIPT_RE.sub(convert, content)
+
+
+def es5_leftovers(content):
+    """[(script number, line, construct)] that to_es5 could not convert"""
+    found = []
+    for number, match in enumerate(INLINE_SCRIPT_RE.finditer(content), 1):
+        if _inline_js(match.group(1)):
+            found.extend((number, line, construct) for line, construct in js_es5.unconverted(match.group(2)))
+    return found
+
+
+WORDPRESS_INIT = """
+    // WordPress Compatibility Layer
+    console.log('WordPress compatibility layer loading...');
+    
+    // Ensure DOM is ready for WordPress
+    function ensureReady(callback) {
+        if (document.readyState === 'loading') {
+            document.addEventListener('DOMContentLoaded', callback);
+        } else {
+            setTimeout(callback, 100); // Small delay for WordPress
+        }
+    }
+    
+    // Initialize event listeners for WordPress
+    function initWordPressListeners() {
+        console.log('Initializing WordPress event listeners...');
+        
+        // Add click listeners to all states using event delegation
+        var mapContainer = document.querySelector('#us-map-svg');
+        if (mapContainer) {
+            mapContainer.addEventListener('click', function(e) {
+                var target = e.target;
+                while (target && target !== mapContainer) {
+                    if (target.classList && target.classList.contains('state-path')) {
+                        var stateCode = target.id.replace('state-', '');
+                        if (window.handleStateClick) {
+                            window.handleStateClick(stateCode);
+                        }
+                        break;
+                    }
+                    target = target.parentNode;
+                }
+            });
+            
+            mapContainer.addEventListener('mouseover', function(e) {
+                var target = e.target;
+                while (target && target !== mapContainer) {
+                    if (target.classList && target.classList.contains('state-path')) {
+                        var stateCode = target.id.replace('state-', '');
+                        if (window.handleStateHover) {
+                            window.handleStateHover(stateCode);
+                        }
+                        break;
+                    }
+                    target = target.parentNode;
+                }
+            });
+            
+            mapContainer.addEventListener('mouseout', function(e) {
+                var target = e.target;
+                if (target.classList && target.classList.contains('state-path')) {
+                    if (window.handleStateMouseOut) {
+                        window.handleStateMouseOut();
+                    }
+                }
+            });
+        }
+        
+        // Add click listeners to metric buttons using event delegation
+        var buttonContainer = document.querySelector('.metric-toggles');
+        if (buttonContainer) {
+            buttonContainer.addEventListener('click', function(e) {
+                var target = e.target;
+                if (target.classList && target.classList.contains('metric-btn')) {
+                    var metric = target.getAttribute('data-metric');
+                    if (window.handleMetricToggle) {
+                        window.handleMetricToggle(metric);
+                    }
+                }
+            });
+        }
+        
+        // Add click listeners to WC buttons
+        var wcContainer = document.querySelector('.wc-sub-buttons');
+        if (wcContainer) {
+            wcContainer.addEventListener('click', function(e) {
+                var target = e.target;
+                if (target.classList && target.classList.contains('wc-sub-btn')) {
+                    var code = target.getAttribute('data-wc-code');
+                    if (window.handleWCCodeToggle) {
+                        window.handleWCCodeToggle(code);
+                    }
+                }
+            });
+        }
+        
+        console.log('WordPress event listeners initialized!');
+    }
+    
+    // Run initialization
+    ensureReady(function() {
+        initWordPressListeners();
+        
+        // Initialize the map if function exists
+        if (window.updateMapColors) {
+            window.updateMapColors();
+        }
+    });
+    
+"""
+
+
+def add_wordpress_init(content):
+    """Insert WORDPRESS_INIT before the first closing script tag"""
+    return SCRIPT_END_RE.sub(WORDPRESS_INIT + r'\1', content, count=1)
+
+
+def wrap_scripts_iife(content):
+    """Wrap each <script> in a strict IIFE to avoid conflicts with the theme"""
+    def wrap_script(match):
+        script_content = match.group(1)
+        if '(function()' not in script_content[:100]:  # Check if not already wrapped
+            return '<script>\n(function() {\n    "use strict";\n' + script_content + '\n})();\n</script>'
+        return match.group(0)
+    return SCRIPT_RE.sub(wrap_script, content)
+
+
+def wordpress_block(content):
+    """Markup between the COPY EVERYTHING BELOW/ABOVE markers, or the whole page"""
+    start = BLOCK_START_RE.search(content)
+    end = BLOCK_END_RE.search(content, start.end() if start else 0)
+    if not start or not end:
+        return content
+    return content[start.end():end.start()] + '\n'
@@ -0,0 +1,107 @@
+"""
+Stream map blocks out of a WordPress WXR export
+
+WXR dumps of the whole site run to hundreds of MB, so the export is read with
+ElementTree.iterparse and each <item> is dropped as soon as it has been
+looked at; only one post's content is held in memory at a time.
+
+A map block is a Custom HTML block (<!-- wp:html --> ... <!-- /wp:html -->)
+whose markup defines stateData. Posts from the classic editor have no block
+comments, so their whole content is checked instead.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+CONTENT_NS = 'http://purl.org/rss/1.0/modules/content/'
+# wp: namespace, versioned as .../export/1.0/, 1.1/, 1.2/
+WP_NS_PREFIX = 'http://wordpress.org/export/'
+
+HTML_BLOCK_RE = re.compile(r'<!-- wp:html -->(.*?)<!-- /wp:html -->', re.DOTALL)
+MAP_MARKER = 'stateData'
+
+MapBlock = namedtuple('MapBlock', ['slug', 'title', 'post_type', 'status', 'index', 'html'])
+
+# Words that identify a trade in a page slug, besides the trade name itself
+TRADE_ALIASES = {
+    'gc': ('general-contractor', 'general-contractors'),
+    'hvac': ('heating', 'air-conditioning'),
+    'landscaping': ('landscaper', 'landscapers', 'lawn-care', 'lawncare'),
+    'electrician': ('electrical', 'electricians'),
+    'plumber': ('plumbing', 'plumbers'),
+    'painter': ('painting', 'painters'),
+    'carpenter': ('carpentry', 'carpenters'),
+}
+
+
+def _split_tag(tag):
+    """'{namespace}name' -> (namespace, name)"""
+    if tag[0] == '{':
+        namespace, name = tag[1:].split('}', 1)
+        return namespace, name
+    return '', tag
+
+
+def iter_items(source):
+    """Yield one {field: text} dict per <item> in a WXR file or file object
+
+    Fields are content, title, post_name, post_type and status. Processed
+    items are removed from the tree so memory use stays flat.
+    """
+    channel = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == 'channel':
+                channel = elem
+            continue
+        if elem.tag != 'item':
+            continue
+
+        item = {}
+        for child in elem:
+            namespace, name = _split_tag(child.tag)
+            if namespace == CONTENT_NS and name == 'encoded':
+                item['content'] = child.text or ''
+            elif namespace == '' and name == 'title':
+                item['title'] = child.text or ''
+            elif namespace.startswith(WP_NS_PREFIX) and name in ('post_name', 'post_type', 'status'):
+                item[name] = child.text or ''
+        yield item
+
+        elem.clear()
+        if channel is not None:
+            channel.remove(elem)
+
+
+def map_blocks(content):
+    """Yield the HTML of every map block in one post's content"""
+    blocks = HTML_BLOCK_RE.findall(content)
+    if not blocks and '<!-- wp:' not in content:
+        blocks = [content]
+    for block in blocks:
+        if MAP_MARKER in block:
+            yield block
+
+
+def iter_map_blocks(source, post_types=('page', 'post'), statuses=('publish',)):
+    """Yield a MapBlock for each map block in published pages and posts"""
+    for item in iter_items(source):
+        if item.get('post_type') not in post_types or item.get('status') not in statuses:
+            continue
+        for index, html in enumerate(map_blocks(item.get('content', ''))):
+            yield MapBlock(item.get('post_name', ''), item.get('title', ''),
+                           item['post_type'], item['status'], index, html)
+
+
+def guess_trade(slug, trades):
+    """Trade whose name or alias appears in a page slug, or None"""
+    words = slug.lower().split('-')
+    for trade in trades:
+        if trade in words:
+            return trade
+    padded = f"-{slug.lower()}-"
+    for trade in trades:
+        if any(f"-{alias}-" in padded for alias in TRADE_ALIASES.get(trade, ())):
+            return trade
+    return None